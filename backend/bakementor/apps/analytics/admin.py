@@ -3,16 +3,30 @@ from __future__ import annotations
 
 from django.contrib import admin
 
-from .models import PageDailySummary, PageVisit
+from .models import PageDailySummary, PageVisit, ReferrerHost, UserAgent
 
 
 @admin.register(PageVisit)
 class PageVisitAdmin(admin.ModelAdmin):
     list_display = ("page", "visited_at", "user", "ip_address")
     list_filter = ("visited_at",)
-    search_fields = ("page__title", "ip_address", "user_agent")
+    search_fields = ("page__title", "ip_address", "agent__value")
     readonly_fields = ("created_at", "updated_at")
     autocomplete_fields = ("page", "user")
+    raw_id_fields = ("agent", "referrer")
+
+
+@admin.register(UserAgent)
+class UserAgentAdmin(admin.ModelAdmin):
+    list_display = ("browser", "os", "device", "value")
+    list_filter = ("device", "browser", "os")
+    search_fields = ("value",)
+
+
+@admin.register(ReferrerHost)
+class ReferrerHostAdmin(admin.ModelAdmin):
+    list_display = ("host",)
+    search_fields = ("host",)
 
 
 @admin.register(PageDailySummary)
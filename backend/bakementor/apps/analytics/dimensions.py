@@ -0,0 +1,170 @@
+"""Interned user agents and referrer hosts for ``PageVisit``.
+
+Visits store small integer keys into ``UserAgent`` and ``ReferrerHost``
+instead of repeating the same strings millions of times. Ingestion resolves
+each batch's distinct strings through an in-process LRU, then Redis (shared
+by every worker), and only inserts the few values neither has seen. Rows
+are never deleted, so a cached id never goes stale.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Callable, Iterable
+from urllib.parse import urlsplit
+
+import redis
+from django.db import models
+
+from .models import DeviceClass, ReferrerHost, UserAgent
+from .store import get_redis
+
+logger = logging.getLogger(__name__)
+
+LRU_SIZE = 10_000
+REDIS_TTL = timedelta(days=7)
+
+_BOT_RE = re.compile(r"bot|crawl|spider|slurp|facebookexternalhit|headless|lighthouse|preview", re.I)
+# First match wins; order matters (Edge and Opera also claim to be Chrome, Chrome claims Safari).
+_BROWSERS = (
+    ("Edge", re.compile(r"Edg(e|A|iOS)?/")),
+    ("Opera", re.compile(r"OPR/|Opera")),
+    ("Samsung Internet", re.compile(r"SamsungBrowser/")),
+    ("Chrome", re.compile(r"Chrome/|CriOS/")),
+    ("Firefox", re.compile(r"Firefox/|FxiOS/")),
+    ("Safari", re.compile(r"Version/[\d.]+.*Safari/")),
+    ("Internet Explorer", re.compile(r"MSIE |Trident/")),
+)
+_SYSTEMS = (
+    ("iOS", re.compile(r"iPhone|iPad|iPod")),
+    ("Android", re.compile(r"Android")),
+    ("Windows", re.compile(r"Windows")),
+    ("ChromeOS", re.compile(r"CrOS")),
+    ("macOS", re.compile(r"Mac OS X|Macintosh")),
+    ("Linux", re.compile(r"Linux")),
+)
+_TABLET_RE = re.compile(r"iPad|Tablet|Kindle|Silk/")
+_MOBILE_RE = re.compile(r"Mobi|iPhone|iPod|Android")
+
+
+def _first(rules, value: str) -> str:
+    return next((name for name, pattern in rules if pattern.search(value)), "Other")
+
+
+def parse_user_agent(value: str) -> dict[str, str]:
+    """Browser family, OS family and device class of a ``User-Agent`` string."""
+    browser, system = _first(_BROWSERS, value), _first(_SYSTEMS, value)
+    if _BOT_RE.search(value):
+        device = DeviceClass.BOT
+    elif _TABLET_RE.search(value) or (system == "Android" and "Mobile" not in value):
+        device = DeviceClass.TABLET
+    elif _MOBILE_RE.search(value):
+        device = DeviceClass.MOBILE
+    elif system in {"Windows", "macOS", "Linux", "ChromeOS"}:
+        device = DeviceClass.DESKTOP
+    else:
+        device = DeviceClass.OTHER
+    return {"browser": browser, "os": system, "device": device}
+
+
+def referrer_host(url: str) -> str:
+    """Lower-cased host of a referrer URL; empty when there is none."""
+    try:
+        return (urlsplit(url.strip()).hostname or "")[:255]
+    except ValueError:
+        return ""
+
+
+class _LRU:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> int | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: int) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class Dimension:
+    """Maps strings to the ids of a model's rows, creating rows on first sight."""
+
+    def __init__(self, name: str, model: type[models.Model], field: str, build: Callable[[str], dict]):
+        self.name = name
+        self.model = model
+        self.field = field
+        self.build = build
+        self.lru = _LRU(LRU_SIZE)
+
+    def _redis_key(self, value: str) -> str:
+        return f"analytics:dim:{self.name}:{hashlib.sha1(value.encode()).hexdigest()}"
+
+    def resolve(self, values: Iterable[str]) -> dict[str, int]:
+        """Ids for the non-empty ``values``; empty strings are left out."""
+        ids: dict[str, int] = {}
+        missing = []
+        for value in {value for value in values if value}:
+            cached = self.lru.get(value)
+            if cached is None:
+                missing.append(value)
+            else:
+                ids[value] = cached
+        if not missing:
+            return ids
+
+        found = self._from_redis(missing)
+        missing = [value for value in missing if value not in found]
+        if missing:
+            self.model.objects.bulk_create(
+                [self.model(**{self.field: value}, **self.build(value)) for value in missing],
+                batch_size=500,
+                ignore_conflicts=True,
+            )
+            created = dict(
+                self.model.objects.filter(**{f"{self.field}__in": missing}).values_list(self.field, "pk")
+            )
+            self._to_redis(created)
+            found.update(created)
+        for value, pk in found.items():
+            self.lru.put(value, pk)
+        ids.update(found)
+        return ids
+
+    def _from_redis(self, values: list[str]) -> dict[str, int]:
+        try:
+            cached = get_redis().mget([self._redis_key(value) for value in values])
+        except redis.RedisError:
+            logger.warning("Dimension cache unavailable; resolving %s in the database", self.name, exc_info=True)
+            return {}
+        return {value: int(pk) for value, pk in zip(values, cached) if pk is not None}
+
+    def _to_redis(self, ids: dict[str, int]) -> None:
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for value, pk in ids.items():
+                pipe.set(self._redis_key(value), pk, ex=REDIS_TTL)
+            pipe.execute()
+        except redis.RedisError:
+            logger.warning("Could not cache %s ids", self.name, exc_info=True)
+
+
+user_agents = Dimension("ua", UserAgent, "value", parse_user_agent)
+referrer_hosts = Dimension("ref", ReferrerHost, "host", lambda host: {})
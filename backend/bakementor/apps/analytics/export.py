@@ -0,0 +1,203 @@
+"""Bulk export of visits and daily summaries as CSV or Parquet.
+
+Rows are read with ``QuerySet.iterator()``, which on PostgreSQL fetches
+through a server-side cursor ``EXPORT_CHUNK`` rows at a time, and are
+written out as they arrive: CSV as a stream of text chunks, Parquet one
+row group of ``ROW_GROUP_SIZE`` rows at a time. Memory stays flat however
+long the range is, and no ``COUNT(*)`` or ``OFFSET`` is ever issued.
+
+Parquet needs ``pyarrow``; CSV has no extra dependency.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import storages
+from django.db.models import F
+from django.utils import timezone
+
+from apps.common import streaming
+
+from .models import PageDailySummary, PageVisit
+
+EXPORT_CHUNK = 5000
+ROW_GROUP_SIZE = 100_000
+CSV_ROWS_PER_CHUNK = 1000
+
+# Column name -> Arrow type name, per dataset, in output order.
+DATASETS = {
+    "visits": {
+        "id": "string",
+        "page_id": "string",
+        "user_id": "int64",
+        "session_id": "string",
+        "ip_address": "string",
+        "user_agent": "string",
+        "browser": "string",
+        "os": "string",
+        "device": "string",
+        "referrer_host": "string",
+        "visited_at": "timestamp",
+    },
+    "summaries": {
+        "page_id": "string",
+        "date": "date",
+        "views": "int64",
+        "unique_visitors": "int64",
+    },
+}
+FORMATS = ("csv", "parquet")
+
+# Parquet exports run as background jobs; their state lives in the cache
+# and their files under ``EXPORT_DIRECTORY`` of the private ``exports``
+# storage for ``EXPORT_TTL`` seconds; only ``ExportJobView`` hands them out.
+EXPORT_CACHE_PREFIX = "analytics-export:"
+EXPORT_DIRECTORY = "analytics"
+EXPORT_TTL = 24 * 60 * 60
+# A job still pending after ``EXPORT_QUEUE_TIMEOUT`` seconds was never
+# queued or picked up (broker outage, lost message); one still running after
+# ``EXPORT_RUN_TIMEOUT`` lost its worker. Either is reported as failed.
+EXPORT_QUEUE_TIMEOUT = 15 * 60
+EXPORT_RUN_TIMEOUT = 2 * 60 * 60
+
+
+# Dimension columns of visit exports, joined from the interned tables.
+_VISIT_DIMENSIONS = {
+    "user_agent": F("agent__value"),
+    "browser": F("agent__browser"),
+    "os": F("agent__os"),
+    "device": F("agent__device"),
+    "referrer_host": F("referrer__host"),
+}
+
+
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_queryset(dataset: str, start: date, end: date, owner=None):
+    """Rows of ``dataset`` between ``start`` and ``end`` (inclusive), in a stable order."""
+    if dataset == "visits":
+        queryset = (
+            PageVisit.objects.filter(
+                visited_at__gte=_day_start(start), visited_at__lt=_day_start(end + timedelta(days=1))
+            )
+            .annotate(**_VISIT_DIMENSIONS)
+            .order_by("visited_at", "id")
+        )
+    else:
+        queryset = PageDailySummary.objects.filter(date__range=(start, end)).order_by("date", "page_id")
+    if owner is not None:
+        queryset = queryset.filter(page__owner=owner)
+    return queryset.values_list(*DATASETS[dataset])
+
+
+def export_rows(dataset: str, start: date, end: date, owner=None) -> Iterator[tuple]:
+    return export_queryset(dataset, start, end, owner).iterator(chunk_size=EXPORT_CHUNK)
+
+
+def iter_csv(dataset: str, rows: Iterable[tuple]) -> Iterator[str]:
+    """CSV text for ``rows`` with a header line, yielded in chunks of lines."""
+    return streaming.iter_csv(DATASETS[dataset], rows, CSV_ROWS_PER_CHUNK)
+
+
+def _arrow_schema(pa, dataset: str):
+    types = {
+        "string": pa.string(),
+        "int64": pa.int64(),
+        "date": pa.date32(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in DATASETS[dataset].items()])
+
+
+def write_parquet(dataset: str, rows: Iterable[tuple], sink) -> int:
+    """Write ``rows`` to ``sink`` (a path or binary file) as Parquet; return the row count."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImproperlyConfigured("Parquet exports require the pyarrow package.") from exc
+
+    schema = _arrow_schema(pa, dataset)
+    kinds = list(DATASETS[dataset].values())
+    written = 0
+    rows = iter(rows)
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        while chunk := list(islice(rows, ROW_GROUP_SIZE)):
+            columns = [
+                pa.array(
+                    [None if value is None else str(value) for value in values] if kind == "string" else values,
+                    type=field.type,
+                )
+                for kind, field, values in zip(kinds, schema, zip(*chunk))
+            ]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            written += len(chunk)
+    return written
+
+
+def export_storage():
+    return storages["exports"]
+
+
+def export_job_key(job_id) -> str:
+    return f"{EXPORT_CACHE_PREFIX}{job_id}"
+
+
+def update_export_job(job_id, **changes) -> dict:
+    """Merge ``changes`` into the job's cached state and stamp the time."""
+    state = cache.get(export_job_key(job_id)) or {}
+    state.update(changes, updated_at=timezone.now().timestamp())
+    cache.set(export_job_key(job_id), state, timeout=EXPORT_TTL)
+    return state
+
+
+def export_job_state(job_id, now: datetime | None = None) -> dict | None:
+    """The job's cached state, marked failed once it is stuck pending or running."""
+    state = cache.get(export_job_key(job_id))
+    if not state:
+        return state
+    timeout = {"pending": EXPORT_QUEUE_TIMEOUT, "running": EXPORT_RUN_TIMEOUT}.get(state["status"])
+    updated_at = state.get("updated_at")
+    if timeout is not None and updated_at is not None and (now or timezone.now()).timestamp() - updated_at > timeout:
+        state = update_export_job(job_id, status="failed")
+    return state
+
+
+def run_parquet_export(job_id: str, dataset: str, start: date, end: date, owner=None) -> str:
+    """Write a Parquet export to the ``exports`` storage; return the stored name.
+
+    The file is built in a local temporary file, then handed to the storage
+    backend, which streams it (or uploads it in parts on S3).
+    """
+    with tempfile.NamedTemporaryFile(suffix=".parquet") as handle:
+        rows = write_parquet(dataset, export_rows(dataset, start, end, owner), handle)
+        handle.flush()
+        handle.seek(0)
+        name = export_storage().save(f"{EXPORT_DIRECTORY}/{job_id}.parquet", File(handle))
+    update_export_job(job_id, status="done", file=name, rows=rows)
+    return name
+
+
+def purge_exports(now: datetime | None = None) -> int:
+    """Delete stored export files older than ``EXPORT_TTL``; return how many."""
+    cutoff = (now or timezone.now()) - timedelta(seconds=EXPORT_TTL)
+    try:
+        _, files = export_storage().listdir(EXPORT_DIRECTORY)
+    except FileNotFoundError:
+        return 0
+    deleted = 0
+    for filename in files:
+        name = os.path.join(EXPORT_DIRECTORY, filename)
+        if export_storage().get_modified_time(name) < cutoff:
+            export_storage().delete(name)
+            deleted += 1
+    return deleted
@@ -0,0 +1,121 @@
+"""Buffered ingestion of page visits through a Redis stream.
+
+The beacon endpoint only appends an entry to ``STREAM_KEY`` (one ``XADD``)
+and returns. ``analytics.drain_visits`` workers read the stream through a
+consumer group (see ``apps.common.streams``), write each batch with one
+``bulk_create`` and only then acknowledge and trim the entries they stored. User agents and referrer
+hosts are stored as keys into interned dimension tables (see
+``apps.analytics.dimensions``). The same round-trip adds each visitor to
+the page's daily HyperLogLog (see ``apps.analytics.sketches``) and updates
+the live counters and leaderboards (see ``apps.analytics.live``).
+
+Delivery is at-least-once: entries a crashed worker read but never
+acknowledged stay pending and are claimed by the next drain after
+a minute. Visit ids are derived from the stream entry id, so a
+redelivered batch inserts nothing twice. What can be lost is bounded by
+Redis persistence (use ``appendonly yes``) and by ``STREAM_MAXLEN`` when
+consumers fall that far behind.
+"""
+from __future__ import annotations
+
+import ipaddress
+import uuid
+
+from apps.common.streams import StreamConsumer, entry_time
+from apps.pages.models import Page
+
+from .dimensions import referrer_host, referrer_hosts, user_agents
+from .live import track
+from .models import PageVisit
+from .sketches import add_visitors
+from .store import get_redis
+
+STREAM_KEY = "analytics:visits"
+GROUP = "analytics-ingest"
+STREAM_MAXLEN = 5_000_000
+BATCH_SIZE = 5000
+DRAIN_TIME_BUDGET = 9.0
+
+# Namespace for visit ids derived from stream entry ids.
+VISIT_NAMESPACE = uuid.UUID("9b8f0a52-3c4e-4d2a-a1f7-6e0c2b5d8e41")
+
+_FIELD_LIMITS = {"session": 64, "ua": 255, "ref": 200}
+
+
+def clean_ip(value: str | None) -> str | None:
+    """``value`` if it is a valid IPv4/IPv6 address, else ``None``."""
+    if not value:
+        return None
+    try:
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        return None
+
+
+def record_visit(
+    page_id, *, session_id: str = "", ip_address: str | None = None, user_agent: str = "", referer: str = ""
+) -> None:
+    """Append a visit to the stream; never touches the database."""
+    fields = {
+        "page": str(page_id),
+        "session": session_id[: _FIELD_LIMITS["session"]],
+        "ip": clean_ip(ip_address) or "",
+        "ua": user_agent[: _FIELD_LIMITS["ua"]],
+        "ref": referer[: _FIELD_LIMITS["ref"]],
+    }
+    get_redis().xadd(STREAM_KEY, fields, maxlen=STREAM_MAXLEN, approximate=True)
+
+
+def _visit(entry_id: str, fields: dict | None) -> tuple[PageVisit, str, str] | None:
+    """The visit of a stream entry, with its raw user agent and referrer host."""
+    if not fields:
+        return None
+    try:
+        page_id = uuid.UUID(fields["page"])
+    except (KeyError, ValueError):
+        return None
+    visit = PageVisit(
+        id=uuid.uuid5(VISIT_NAMESPACE, entry_id),
+        page_id=page_id,
+        session_id=fields.get("session", "")[: _FIELD_LIMITS["session"]],
+        ip_address=clean_ip(fields.get("ip")),
+        visited_at=entry_time(entry_id),
+    )
+    return visit, fields.get("ua", "")[: _FIELD_LIMITS["ua"]], referrer_host(fields.get("ref", ""))
+
+
+def persist_events(entries: list[tuple[str, dict | None]]) -> list[PageVisit]:
+    """Insert the visits in ``entries`` with one ``bulk_create``; return the visits kept.
+
+    Malformed entries and visits to unknown pages are dropped. Entries that
+    were stored before (redelivery) are skipped by the primary key.
+    """
+    parsed = [item for item in (_visit(entry_id, fields) for entry_id, fields in entries) if item]
+    if not parsed:
+        return []
+    pages = Page.objects.only("id", "owner_id").in_bulk({visit.page_id for visit, _, _ in parsed})
+    parsed = [item for item in parsed if item[0].page_id in pages]
+    agent_ids = user_agents.resolve(agent for _, agent, _ in parsed)
+    host_ids = referrer_hosts.resolve(host for _, _, host in parsed)
+    visits = []
+    for visit, agent, host in parsed:
+        visit.page = pages[visit.page_id]
+        visit.agent_id = agent_ids.get(agent)
+        visit.referrer_id = host_ids.get(host)
+        visits.append(visit)
+    PageVisit.objects.bulk_create(visits, batch_size=1000, ignore_conflicts=True)
+    return visits
+
+
+def _track(pipe, visits: list[PageVisit]) -> None:
+    # PFADD is idempotent, so a redelivered batch does not inflate uniques.
+    add_visitors(pipe, visits)
+    track(pipe, visits)
+
+
+visits_stream = StreamConsumer(STREAM_KEY, GROUP, persist_events, before_ack=_track)
+
+
+def drain(consumer: str, batch_size: int = BATCH_SIZE, time_budget: float = DRAIN_TIME_BUDGET) -> int:
+    """Move buffered visits into ``PageVisit`` until the stream is empty or time runs out."""
+    return visits_stream.drain(get_redis(), consumer, batch_size, time_budget)
@@ -0,0 +1,170 @@
+"""Live visitor counts and a rolling top-pages leaderboard kept in Redis.
+
+Ingestion updates, in the same pipeline that acknowledges a batch:
+
+* ``analytics:live:page:<page>`` and ``analytics:live:owner:<owner>``: sorted
+  sets of visitors scored by when they were last seen. "On the page right
+  now" is a ``ZCOUNT`` over the last ``ACTIVE_WINDOW``.
+* ``analytics:top:<owner>``: page views over the last ``TOP_WINDOW``, as a
+  sorted set read with ``ZREVRANGE``. Views are also kept per minute in
+  ``analytics:top:<owner>:<minute>``; ``expire_leaderboards`` subtracts each
+  minute once it leaves the window, so the leaderboard slides without
+  ever being recomputed.
+
+Every read is a handful of O(log n) commands, whatever the traffic or the
+number of dashboards open.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from typing import Iterable
+
+from .models import PageVisit
+from .sketches import visitor_id
+from .store import get_async_redis, get_redis
+
+ACTIVE_WINDOW = timedelta(minutes=5)
+TOP_WINDOW = timedelta(hours=1)
+TOP_LIMIT = 10
+STREAM_INTERVAL = 5
+# Streams end after this long; ``EventSource`` reconnects on its own.
+STREAM_DURATION = timedelta(minutes=5)
+# Minute buckets waiting to leave the window, scored by their minute.
+BUCKETS_KEY = "analytics:top:buckets"
+
+
+def page_key(page_id) -> str:
+    return f"analytics:live:page:{page_id}"
+
+
+def owner_key(owner_id) -> str:
+    return f"analytics:live:owner:{owner_id}"
+
+
+def leaderboard_key(owner_id) -> str:
+    return f"analytics:top:{owner_id}"
+
+
+def _bucket_key(owner_id, minute: int) -> str:
+    return f"analytics:top:{owner_id}:{minute}"
+
+
+def track(pipe, visits: Iterable[PageVisit]) -> None:
+    """Queue the live-counter and leaderboard updates for ``visits`` on ``pipe``.
+
+    ``visits`` must have ``page`` loaded (only ``owner_id`` is read). Old
+    visits redelivered after the window are ignored.
+    """
+    now = time.time()
+    horizon = now - TOP_WINDOW.total_seconds()
+    seen: dict[str, dict[str, float]] = defaultdict(dict)
+    views: dict[tuple, Counter] = defaultdict(Counter)
+    for visit in visits:
+        stamp = visit.visited_at.timestamp()
+        if stamp < horizon:
+            continue
+        visitor = visitor_id(visit.session_id, visit.ip_address, visit.agent_id)
+        for key in (page_key(visit.page_id), owner_key(visit.page.owner_id)):
+            seen[key][visitor] = max(stamp, seen[key].get(visitor, 0))
+        views[(visit.page.owner_id, int(stamp // 60))][str(visit.page_id)] += 1
+
+    active_ttl = int(ACTIVE_WINDOW.total_seconds())
+    for key, visitors in seen.items():
+        # GT keeps the latest sighting when batches arrive out of order.
+        pipe.zadd(key, visitors, gt=True)
+        pipe.zremrangebyscore(key, "-inf", now - active_ttl)
+        pipe.expire(key, active_ttl * 2)
+    top_ttl = int(TOP_WINDOW.total_seconds())
+    for (owner_id, minute), counts in views.items():
+        bucket = _bucket_key(owner_id, minute)
+        for page_id, count in counts.items():
+            pipe.hincrby(bucket, page_id, count)
+            pipe.zincrby(leaderboard_key(owner_id), count, page_id)
+        pipe.expire(bucket, top_ttl * 2)
+        pipe.expire(leaderboard_key(owner_id), top_ttl * 2)
+        pipe.zadd(BUCKETS_KEY, {f"{owner_id}:{minute}": minute})
+
+
+def expire_leaderboards(now: float | None = None) -> int:
+    """Subtract minute buckets that left ``TOP_WINDOW``; return how many."""
+    client = get_redis()
+    cutoff = int(((now or time.time()) - TOP_WINDOW.total_seconds()) // 60)
+    expired = client.zrangebyscore(BUCKETS_KEY, "-inf", f"({cutoff}")
+    for member in expired:
+        owner_id, minute = member.rsplit(":", 1)
+        bucket = _bucket_key(owner_id, int(minute))
+        counts = client.hgetall(bucket)
+        pipe = client.pipeline()
+        for page_id, count in counts.items():
+            pipe.zincrby(leaderboard_key(owner_id), -int(count), page_id)
+        pipe.zremrangebyscore(leaderboard_key(owner_id), "-inf", 0)
+        pipe.delete(bucket)
+        pipe.zrem(BUCKETS_KEY, member)
+        pipe.execute()
+    return len(expired)
+
+
+def queue_snapshot(pipe, owner_id, page_ids: Iterable = (), now: float | None = None) -> list[str]:
+    """Queue the reads behind ``snapshot`` on a sync or asyncio pipeline."""
+    since = (now or time.time()) - ACTIVE_WINDOW.total_seconds()
+    page_ids = [str(page_id) for page_id in page_ids]
+    pipe.zcount(owner_key(owner_id), since, "+inf")
+    pipe.zrevrange(leaderboard_key(owner_id), 0, TOP_LIMIT - 1, withscores=True)
+    for page_id in page_ids:
+        pipe.zcount(page_key(page_id), since, "+inf")
+    return page_ids
+
+
+def build_snapshot(page_ids: list[str], results: list) -> dict:
+    active, top, *page_counts = results
+    return {
+        "active_visitors": active,
+        "pages": dict(zip(page_ids, page_counts)),
+        "top_pages": [{"page": page_id, "views": int(views)} for page_id, views in top],
+    }
+
+
+def snapshot(owner_id, page_ids: Iterable = ()) -> dict:
+    """Visitors active now across the owner's site and on ``page_ids``, plus the top pages."""
+    pipe = get_redis().pipeline(transaction=False)
+    page_ids = queue_snapshot(pipe, owner_id, page_ids)
+    return build_snapshot(page_ids, pipe.execute())
+
+
+def snapshot_events(owner_id, page_ids: Iterable = ()):
+    """A one-snapshot event stream for WSGI servers.
+
+    A synchronous worker cannot wait between pushes without being pinned
+    for the whole stream, so each connection gets a single event and
+    ``EventSource`` reconnects after ``STREAM_INTERVAL``.
+    """
+    yield f"retry: {STREAM_INTERVAL * 1000}\n\n"
+    yield f"event: snapshot\ndata: {json.dumps(snapshot(owner_id, page_ids))}\n\n"
+
+
+async def stream_snapshots(owner_id, page_ids: Iterable = ()):
+    """Server-sent events carrying a fresh ``snapshot`` every ``STREAM_INTERVAL`` seconds.
+
+    Runs on the event loop under ASGI, so an open dashboard holds no worker
+    thread between snapshots. Only hand it to responses served by the ASGI
+    application: WSGI handlers drain async iterators before sending.
+    """
+    page_ids = [str(page_id) for page_id in page_ids]
+    client = get_async_redis()
+    deadline = time.monotonic() + STREAM_DURATION.total_seconds()
+    try:
+        yield f"retry: {STREAM_INTERVAL * 1000}\n\n"
+        while True:
+            pipe = client.pipeline(transaction=False)
+            ids = queue_snapshot(pipe, owner_id, page_ids)
+            data = build_snapshot(ids, await pipe.execute())
+            yield f"event: snapshot\ndata: {json.dumps(data)}\n\n"
+            if time.monotonic() >= deadline:
+                return
+            await asyncio.sleep(STREAM_INTERVAL)
+    finally:
+        await client.aclose()
@@ -0,0 +1,52 @@
+"""Export visits or daily summaries for a date range to a CSV or Parquet file."""
+from __future__ import annotations
+
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.export import DATASETS, FORMATS, export_rows, iter_csv, write_parquet
+
+
+class Command(BaseCommand):
+    help = "Stream analytics rows for a date range to a file, with flat memory use."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=tuple(DATASETS))
+        parser.add_argument("output", help="Path of the file to write, or - for stdout (CSV only).")
+        parser.add_argument("--start", type=date.fromisoformat, required=True, help="First day (YYYY-MM-DD).")
+        parser.add_argument("--end", type=date.fromisoformat, required=True, help="Last day, inclusive (YYYY-MM-DD).")
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--owner", help="Only export pages owned by the user with this email.")
+
+    def handle(self, *args, **options):
+        if options["start"] > options["end"]:
+            raise CommandError("--start must not be after --end.")
+        owner = None
+        if options["owner"]:
+            try:
+                owner = get_user_model().objects.get(email=options["owner"])
+            except get_user_model().DoesNotExist as exc:
+                raise CommandError(f"No user with email {options['owner']}.") from exc
+
+        rows = export_rows(options["dataset"], options["start"], options["end"], owner)
+        output = options["output"]
+        if options["format"] == "parquet":
+            if output == "-":
+                raise CommandError("Parquet exports need an output path.")
+            try:
+                written = write_parquet(options["dataset"], rows, output)
+            except ImproperlyConfigured as exc:
+                raise CommandError(str(exc)) from exc
+            self.stderr.write(self.style.SUCCESS(f"Wrote {written} rows to {output}"))
+            return
+
+        if output == "-":
+            for chunk in iter_csv(options["dataset"], rows):
+                self.stdout.write(chunk, ending="")
+            return
+        with open(output, "w", encoding="utf-8", newline="") as handle:
+            handle.writelines(iter_csv(options["dataset"], rows))
+        self.stderr.write(self.style.SUCCESS(f"Wrote {options['dataset']} to {output}"))
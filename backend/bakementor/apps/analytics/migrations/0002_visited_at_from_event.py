@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pagevisit',
+            name='visited_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_rollup_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pagedailysummary',
+            name='visitor_sketch',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
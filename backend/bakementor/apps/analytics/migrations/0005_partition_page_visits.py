@@ -0,0 +1,80 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:00
+
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations, models
+
+TABLE = "analytics_pagevisit"
+OLD = "analytics_pagevisit_unpartitioned"
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_visits(apps, schema_editor):
+    """Rebuild the visits table as a partitioned table, one partition per month.
+
+    PostgreSQL only. The primary key becomes (id, visited_at) because
+    partitioned tables need the partition key in every unique constraint;
+    ids remain unique. Existing rows are copied inside the migration.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute("SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s", [TABLE, f"{TABLE}_pkey"])
+        index_definitions = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f"SELECT min(visited_at) FROM {TABLE}")
+        first_visit = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD}")
+        cursor.execute(f"ALTER TABLE {OLD} RENAME CONSTRAINT {TABLE}_pkey TO {OLD}_pkey")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {OLD} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (visited_at)"
+        )
+        cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, visited_at)")
+
+        month = date.today().replace(day=1)
+        start = first_visit.date().replace(day=1) if first_visit else month
+        while start <= _add_months(month, MONTHS_AHEAD):
+            end = _add_months(start, 1)
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_y{start.year:04d}m{start.month:02d} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+            )
+            start = end
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {OLD}")
+        cursor.execute(f"DROP TABLE {OLD}")
+        for definition in index_definitions:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_daily_visitor_sketch'),
+        ('pages', '0003_pageversion_preview_images'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pagevisit',
+            index=models.Index(fields=['-visited_at'], name='analytics_visit_recent'),
+        ),
+        # The partitioned table serves the same model; rolling back keeps it.
+        migrations.RunPython(partition_visits, migrations.RunPython.noop),
+    ]
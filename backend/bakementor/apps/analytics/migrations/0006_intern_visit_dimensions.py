@@ -0,0 +1,158 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:08
+
+import re
+from itertools import islice
+from urllib.parse import urlsplit
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+# Frozen copy of ``apps.analytics.dimensions`` as of this migration.
+_BOT_RE = re.compile(r"bot|crawl|spider|slurp|facebookexternalhit|headless|lighthouse|preview", re.I)
+_BROWSERS = (
+    ("Edge", re.compile(r"Edg(e|A|iOS)?/")),
+    ("Opera", re.compile(r"OPR/|Opera")),
+    ("Samsung Internet", re.compile(r"SamsungBrowser/")),
+    ("Chrome", re.compile(r"Chrome/|CriOS/")),
+    ("Firefox", re.compile(r"Firefox/|FxiOS/")),
+    ("Safari", re.compile(r"Version/[\d.]+.*Safari/")),
+    ("Internet Explorer", re.compile(r"MSIE |Trident/")),
+)
+_SYSTEMS = (
+    ("iOS", re.compile(r"iPhone|iPad|iPod")),
+    ("Android", re.compile(r"Android")),
+    ("Windows", re.compile(r"Windows")),
+    ("ChromeOS", re.compile(r"CrOS")),
+    ("macOS", re.compile(r"Mac OS X|Macintosh")),
+    ("Linux", re.compile(r"Linux")),
+)
+_TABLET_RE = re.compile(r"iPad|Tablet|Kindle|Silk/")
+_MOBILE_RE = re.compile(r"Mobi|iPhone|iPod|Android")
+
+
+def _first(rules, value):
+    return next((name for name, pattern in rules if pattern.search(value)), "Other")
+
+
+def parse_user_agent(value):
+    browser, system = _first(_BROWSERS, value), _first(_SYSTEMS, value)
+    if _BOT_RE.search(value):
+        device = "bot"
+    elif _TABLET_RE.search(value) or (system == "Android" and "Mobile" not in value):
+        device = "tablet"
+    elif _MOBILE_RE.search(value):
+        device = "mobile"
+    elif system in {"Windows", "macOS", "Linux", "ChromeOS"}:
+        device = "desktop"
+    else:
+        device = "other"
+    return {"browser": browser, "os": system, "device": device}
+
+
+def referrer_host(url):
+    try:
+        return (urlsplit(url.strip()).hostname or "")[:255]
+    except ValueError:
+        return ""
+
+
+def _batches(values):
+    values = iter(values)
+    while batch := list(islice(values, BATCH_SIZE)):
+        yield batch
+
+
+def intern_visit_strings(apps, schema_editor):
+    """Point existing visits at dimension rows for their user agent and referrer host.
+
+    Distinct strings are parsed in batches; visits are then updated with one
+    ``UPDATE ... FROM`` join per dimension, a single pass over the table.
+    """
+    PageVisit = apps.get_model("analytics", "PageVisit")
+    UserAgent = apps.get_model("analytics", "UserAgent")
+    ReferrerHost = apps.get_model("analytics", "ReferrerHost")
+    visits = PageVisit._meta.db_table
+    qn = schema_editor.connection.ops.quote_name
+
+    agents = PageVisit.objects.exclude(user_agent="").order_by().values_list("user_agent", flat=True).distinct()
+    for batch in _batches(agents.iterator()):
+        UserAgent.objects.bulk_create(
+            [UserAgent(value=value, **parse_user_agent(value)) for value in batch], ignore_conflicts=True
+        )
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {qn(visits)} SET agent_id = agent.id FROM {qn(UserAgent._meta.db_table)} agent "
+            f"WHERE agent.value = {qn(visits)}.user_agent"
+        )
+
+        # Referrers map to hosts in Python, so the URL-to-host pairs go
+        # through a temporary table to join against.
+        cursor.execute("CREATE TEMPORARY TABLE analytics_referer_host (referer varchar(200) PRIMARY KEY, host_id integer)")
+        referers = PageVisit.objects.exclude(referer="").order_by().values_list("referer", flat=True).distinct()
+        for batch in _batches(referers.iterator()):
+            hosts = {referer: referrer_host(referer) for referer in batch}
+            ReferrerHost.objects.bulk_create(
+                [ReferrerHost(host=host) for host in set(hosts.values()) if host], ignore_conflicts=True
+            )
+            ids = dict(ReferrerHost.objects.filter(host__in=set(hosts.values())).values_list("host", "pk"))
+            cursor.executemany(
+                "INSERT INTO analytics_referer_host (referer, host_id) VALUES (%s, %s)",
+                [(referer, ids[host]) for referer, host in hosts.items() if host],
+            )
+        cursor.execute(
+            f"UPDATE {qn(visits)} SET referrer_id = mapping.host_id FROM analytics_referer_host mapping "
+            f"WHERE mapping.referer = {qn(visits)}.referer"
+        )
+        cursor.execute("DROP TABLE analytics_referer_host")
+        if schema_editor.connection.vendor == "postgresql":
+            # Run the deferred foreign key checks now; the columns are dropped in this transaction.
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_partition_page_visits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferrerHost',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('host', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserAgent',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('value', models.CharField(max_length=255, unique=True)),
+                ('browser', models.CharField(max_length=50)),
+                ('os', models.CharField(max_length=50)),
+                ('device', models.CharField(choices=[('desktop', 'Desktop'), ('mobile', 'Mobile'), ('tablet', 'Tablet'), ('bot', 'Bot'), ('other', 'Other')], default='other', max_length=10)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='pagevisit',
+            name='referrer',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='analytics.referrerhost'),
+        ),
+        migrations.AddField(
+            model_name='pagevisit',
+            name='agent',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='analytics.useragent'),
+        ),
+        migrations.RunPython(intern_visit_strings, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='pagevisit',
+            name='referer',
+        ),
+        migrations.RemoveField(
+            model_name='pagevisit',
+            name='user_agent',
+        ),
+    ]
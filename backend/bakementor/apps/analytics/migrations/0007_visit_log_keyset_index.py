@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0006_intern_visit_dimensions'),
+        ('pages', '0003_pageversion_preview_images'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pagevisit',
+            index=models.Index(fields=['page', 'visited_at', 'id'], name='analytics_visit_page_time'),
+        ),
+        # Covered by the composite index above.
+        migrations.AlterField(
+            model_name='pagevisit',
+            name='page',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='visits', to='pages.page'),
+        ),
+    ]
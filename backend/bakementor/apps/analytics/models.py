@@ -3,12 +3,44 @@ from __future__ import annotations
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 from apps.common.models import TimeStampedModel, UUIDModel
 
 
+class DeviceClass(models.TextChoices):
+    DESKTOP = "desktop", "Desktop"
+    MOBILE = "mobile", "Mobile"
+    TABLET = "tablet", "Tablet"
+    BOT = "bot", "Bot"
+    OTHER = "other", "Other"
+
+
+class UserAgent(models.Model):
+    """One distinct ``User-Agent`` string, parsed once (see ``apps.analytics.dimensions``)."""
+
+    # A 4-byte key keeps visit rows small; there are far fewer distinct agents.
+    id = models.AutoField(primary_key=True)
+    value = models.CharField(max_length=255, unique=True)
+    browser = models.CharField(max_length=50)
+    os = models.CharField(max_length=50)
+    device = models.CharField(max_length=10, choices=DeviceClass.choices, default=DeviceClass.OTHER)
+
+    def __str__(self) -> str:
+        return f"{self.browser} on {self.os} ({self.device})"
+
+
+class ReferrerHost(models.Model):
+    id = models.AutoField(primary_key=True)
+    host = models.CharField(max_length=255, unique=True)
+
+    def __str__(self) -> str:
+        return self.host
+
+
 class PageVisit(UUIDModel, TimeStampedModel):
-    page = models.ForeignKey("pages.Page", related_name="visits", on_delete=models.CASCADE)
+    # Indexed by ``analytics_visit_page_time``, whose leading column it is.
+    page = models.ForeignKey("pages.Page", related_name="visits", on_delete=models.CASCADE, db_index=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -18,12 +50,26 @@ class PageVisit(UUIDModel, TimeStampedModel):
     )
     session_id = models.CharField(max_length=64, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    user_agent = models.CharField(max_length=255, blank=True)
-    referer = models.URLField(blank=True)
-    visited_at = models.DateTimeField(auto_now_add=True)
+    # Not indexed: visits are only ever grouped by these, within a page and time range.
+    agent = models.ForeignKey(
+        UserAgent, null=True, blank=True, on_delete=models.PROTECT, db_index=False, related_name="+"
+    )
+    referrer = models.ForeignKey(
+        ReferrerHost, null=True, blank=True, on_delete=models.PROTECT, db_index=False, related_name="+"
+    )
+    # Set from the buffered event, not the insert time (see ``apps.analytics.ingest``).
+    visited_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ("-visited_at",)
+        indexes = [
+            # Insertion order; the rollup scans visits added since its watermark.
+            models.Index(fields=("created_at",), name="analytics_visit_created"),
+            # Newest-first reads walk the monthly partitions in order.
+            models.Index(fields=("-visited_at",), name="analytics_visit_recent"),
+            # A page's visit log in keyset order (see ``VisitLogPagination``).
+            models.Index(fields=("page", "visited_at", "id"), name="analytics_visit_page_time"),
+        ]
 
 
 class PageDailySummary(TimeStampedModel):
@@ -31,8 +77,21 @@ class PageDailySummary(TimeStampedModel):
     date = models.DateField()
     views = models.PositiveIntegerField(default=0)
     unique_visitors = models.PositiveIntegerField(default=0)
+    # Serialized Redis HyperLogLog of the day's visitors (see ``apps.analytics.sketches``).
+    visitor_sketch = models.BinaryField(null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = ("page", "date")
         ordering = ("-date",)
 
+
+
+class RollupWatermark(models.Model):
+    """How far an incremental aggregation has consumed its source table."""
+
+    name = models.CharField(max_length=100, unique=True)
+    position = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} @ {self.position}"
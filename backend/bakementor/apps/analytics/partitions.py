@@ -0,0 +1,144 @@
+"""Monthly range partitions of ``analytics_pagevisit`` on PostgreSQL.
+
+The table is partitioned by ``visited_at`` (migration
+``0005_partition_page_visits``), one partition per calendar month named
+``analytics_pagevisit_yYYYYmMM`` plus a default partition that only catches
+rows outside every month range. ``analytics.maintain_visit_partitions``
+creates partitions ahead of time and drops those past the retention period:
+removing a month is a ``DETACH``/``DROP``, not a ``DELETE``. Rows that
+reached the default partition (maintenance lagging behind, clock skew) move
+into their month's partition when it is created and are otherwise deleted
+in batches once they are past retention.
+
+If the table is not partitioned (another database backend, or migration
+``0005`` not applied), retention deletes old rows in batches.
+"""
+from __future__ import annotations
+
+import re
+from datetime import date, datetime, time, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import PageVisit
+
+TABLE = PageVisit._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_RE = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+DELETE_BATCH_SIZE = 10_000
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def _bound(month: date) -> datetime:
+    return datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+
+
+def is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def existing_partitions() -> dict[date, str]:
+    """Monthly partitions attached to the table, keyed by month."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = {}
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            months[date(int(match[1]), int(match[2]), 1)] = name
+    return months
+
+
+def ensure_partitions(months_ahead: int | None = None, today: date | None = None) -> list[str]:
+    """Create the partitions for the current month and ``months_ahead`` after it."""
+    if not is_partitioned():
+        return []
+    months_ahead = settings.ANALYTICS_VISIT_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(today or timezone.now().date())
+    existing = existing_partitions()
+    qn = connection.ops.quote_name
+    created = []
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            name = partition_name(month)
+            low, high = _bound(month), _bound(add_months(month, 1))
+            # Attaching fails while the default partition holds rows of the
+            # month, so the partition is filled from it first. Partition
+            # bounds must be literals; both are generated here.
+            with transaction.atomic():
+                cursor.execute(
+                    f"CREATE TABLE {qn(name)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                )
+                cursor.execute(
+                    f"WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} "
+                    f"WHERE visited_at >= %s AND visited_at < %s RETURNING *) "
+                    f"INSERT INTO {qn(name)} SELECT * FROM moved",
+                    [low, high],
+                )
+                cursor.execute(
+                    f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)} "
+                    f"FOR VALUES FROM ('{low.isoformat()}') TO ('{high.isoformat()}')"
+                )
+            created.append(name)
+    return created
+
+
+def drop_expired(retention_months: int | None = None, today: date | None = None) -> list[str]:
+    """Remove visits older than the retention period; return the partitions dropped.
+
+    Whole months are detached and dropped, which takes a brief lock and no
+    table scan. Old rows left in the default partition, or in an unpartitioned
+    table, are deleted in batches.
+    """
+    retention_months = settings.ANALYTICS_VISIT_RETENTION_MONTHS if retention_months is None else retention_months
+    cutoff = add_months(month_start(today or timezone.now().date()), -retention_months)
+    qn = connection.ops.quote_name
+    monthly = existing_partitions() if is_partitioned() else {}
+    dropped = []
+    for month, name in sorted(monthly.items()):
+        if add_months(month, 1) > cutoff:
+            break
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}")
+            cursor.execute(f"DROP TABLE {qn(name)}")
+        dropped.append(name)
+    # No monthly partition before the cutoff is left, so on a partitioned
+    # table this only reaches the default partition.
+    _delete_before(_bound(cutoff))
+    return dropped
+
+
+def _delete_before(cutoff: datetime) -> int:
+    deleted = 0
+    while True:
+        ids = list(PageVisit.objects.filter(visited_at__lt=cutoff).values_list("id", flat=True)[:DELETE_BATCH_SIZE])
+        if not ids:
+            return deleted
+        deleted += PageVisit.objects.filter(id__in=ids, visited_at__lt=cutoff).delete()[0]
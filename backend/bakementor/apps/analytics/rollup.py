@@ -0,0 +1,99 @@
+"""Incremental rollup of ``PageVisit`` into ``PageDailySummary``.
+
+Each run aggregates only the visits inserted since the stored watermark
+(``PageVisit.created_at``), so the cost follows the ingest rate rather than
+the size of the visits table. Views are added to the existing summaries in
+one ``INSERT ... SELECT ... ON CONFLICT DO UPDATE``. Visits arriving late
+(an old ``visited_at`` buffered for a while) simply land in the day they
+belong to. Unique visitors are not additive; the window's (page, day)
+pairs have their HyperLogLog sketches merged and recounted instead (see
+``apps.analytics.sketches``).
+
+Windows stop ``ROLLUP_LAG`` before now so rows from inserts still in flight
+are not skipped, and at most ``MAX_WINDOW`` wide so a backlog is consumed in
+bounded transactions. They also bound ``visited_at`` to ``MAX_LATENESS``
+before the window so PostgreSQL only probes recent monthly partitions;
+visits buffered for longer than that are not summarized.
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, DateTimeField, Min, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import PageDailySummary, PageVisit, RollupWatermark
+from .sketches import fold_daily_sketches
+
+WATERMARK = "page-daily-summary"
+ROLLUP_LAG = timedelta(seconds=30)
+MAX_WINDOW = timedelta(hours=1)
+MAX_LATENESS = timedelta(days=7)
+
+
+def _window(low, high):
+    visits = PageVisit.objects.filter(created_at__lte=high)
+    if low is None:
+        return visits
+    return visits.filter(created_at__gt=low, visited_at__gte=low - MAX_LATENESS)
+
+
+def _upsert_views(window, now) -> int:
+    select = (
+        window.order_by()
+        .values("page_id", day=TruncDate("visited_at"))
+        .annotate(
+            views=Count("id"),
+            unique_visitors=Value(0),
+            created=Value(now, output_field=DateTimeField()),
+            updated=Value(now, output_field=DateTimeField()),
+        )
+        .values_list("page_id", "day", "views", "unique_visitors", "created", "updated")
+    )
+    select_sql, params = select.query.sql_with_params()
+    qn = connection.ops.quote_name
+    table = qn(PageDailySummary._meta.db_table)
+    sql = (
+        f"INSERT INTO {table} ({qn('page_id')}, {qn('date')}, {qn('views')}, {qn('unique_visitors')}, "
+        f"{qn('created_at')}, {qn('updated_at')}) {select_sql} "
+        f"ON CONFLICT ({qn('page_id')}, {qn('date')}) DO UPDATE SET "
+        f"{qn('views')} = {table}.{qn('views')} + EXCLUDED.{qn('views')}, "
+        f"{qn('updated_at')} = EXCLUDED.{qn('updated_at')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def _touched_days(window) -> list[tuple]:
+    return list(window.order_by().annotate(day=TruncDate("visited_at")).values_list("page_id", "day").distinct())
+
+
+def rollup_visits(now=None) -> int:
+    """Fold new visits into the daily summaries; return the number of windows processed."""
+    horizon = (now or timezone.now()) - ROLLUP_LAG
+    windows = 0
+    while True:
+        with transaction.atomic():
+            # The row lock serializes concurrent runs; the summaries and the
+            # watermark move together or not at all.
+            watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=WATERMARK)
+            low = watermark.position
+            if low is not None and low >= horizon:
+                return windows
+            # Skip idle stretches: the window starts at the next new visit.
+            first = _window(low, horizon).aggregate(first=Min("created_at"))["first"]
+            if first is None:
+                high = horizon
+            else:
+                high = min(horizon, first + MAX_WINDOW)
+                window = _window(low, high)
+                _upsert_views(window, timezone.now())
+                fold_daily_sketches(_touched_days(window))
+                windows += 1
+            watermark.position = high
+            watermark.save(update_fields=["position", "updated_at"])
+        if first is None:
+            return windows
@@ -4,9 +4,18 @@ from __future__ import annotations
 from rest_framework import serializers
 
 from .models import PageDailySummary, PageVisit
+from .export import DATASETS, FORMATS
+from .sketches import MAX_UNIQUES_DAYS
+from .timeseries import GRANULARITIES, MAX_DAYS, MAX_HOURLY_DAYS, METRICS
 
 
 class PageVisitSerializer(serializers.ModelSerializer):
+    user_agent = serializers.CharField(source="agent.value", read_only=True, allow_null=True)
+    browser = serializers.CharField(source="agent.browser", read_only=True, allow_null=True)
+    os = serializers.CharField(source="agent.os", read_only=True, allow_null=True)
+    device = serializers.CharField(source="agent.device", read_only=True, allow_null=True)
+    referrer_host = serializers.CharField(source="referrer.host", read_only=True, allow_null=True)
+
     class Meta:
         model = PageVisit
         fields = (
@@ -16,7 +25,10 @@ class PageVisitSerializer(serializers.ModelSerializer):
             "session_id",
             "ip_address",
             "user_agent",
-            "referer",
+            "browser",
+            "os",
+            "device",
+            "referrer_host",
             "visited_at",
         )
         read_only_fields = fields
@@ -36,3 +48,63 @@ class PageDailySummarySerializer(serializers.ModelSerializer):
         )
         read_only_fields = fields
 
+
+
+class UniqueVisitorsQuerySerializer(serializers.Serializer):
+    page = serializers.UUIDField(required=False)
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end.")
+        if (attrs["end"] - attrs["start"]).days >= MAX_UNIQUES_DAYS:
+            raise serializers.ValidationError(f"The range spans at most {MAX_UNIQUES_DAYS} days.")
+        return attrs
+
+
+class VisitRangeQuerySerializer(serializers.Serializer):
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+
+class TimeSeriesQuerySerializer(serializers.Serializer):
+    """``?page=`` (repeatable, default all pages), ``start``, ``end``, ``granularity``, ``metric`` (repeatable)."""
+
+    page = serializers.ListField(child=serializers.UUIDField(), required=False)
+    start = serializers.DateField()
+    end = serializers.DateField()
+    granularity = serializers.ChoiceField(choices=GRANULARITIES, default="day")
+    metric = serializers.MultipleChoiceField(choices=METRICS, required=False)
+
+    def validate(self, attrs):
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end.")
+        limit = MAX_HOURLY_DAYS if attrs["granularity"] == "hour" else MAX_DAYS
+        if (attrs["end"] - attrs["start"]).days >= limit:
+            raise serializers.ValidationError(f"{attrs['granularity']} series span at most {limit} days.")
+        attrs["metric"] = attrs.get("metric") or set(METRICS)
+        return attrs
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    dataset = serializers.ChoiceField(choices=tuple(DATASETS))
+    format = serializers.ChoiceField(choices=FORMATS, default="csv")
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end.")
+        return attrs
+
+
+class VisitBreakdownQuerySerializer(VisitRangeQuerySerializer):
+    by = serializers.ChoiceField(choices=("device", "browser", "os", "referrer"))
+    page = serializers.UUIDField(required=False)
+
+
+class LiveQuerySerializer(serializers.Serializer):
+    """``?page=`` (repeatable): pages to report live visitor counts for."""
+
+    page = serializers.ListField(child=serializers.UUIDField(), required=False, max_length=50)
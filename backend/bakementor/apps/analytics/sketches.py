@@ -0,0 +1,143 @@
+"""Per-page, per-day HyperLogLog sketches of unique visitors.
+
+Ingestion adds every visitor to a Redis HyperLogLog for its (page, day)
+with ``PFADD``. The rollup merges each touched live sketch into the copy
+kept in ``PageDailySummary.visitor_sketch`` (Redis serializes a HyperLogLog
+as a string of at most 12 KB) and stores its ``PFCOUNT``. Uniques over any
+range of days and pages are then a ``PFMERGE`` of those sketches, with a
+standard error of 0.81%, and never read raw visits.
+"""
+from __future__ import annotations
+
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Iterable
+
+from django.utils import timezone
+
+from .models import PageDailySummary, PageVisit
+from .store import get_binary_redis
+
+# Live sketches outlive the rollup interval comfortably; a visit arriving
+# later starts a fresh live sketch that the rollup merges into the stored one.
+LIVE_KEY_TTL = timedelta(days=3)
+MERGE_CHUNK = 200
+MAX_UNIQUES_DAYS = 3 * 366
+
+
+def live_key(page_id, day: date) -> str:
+    return f"analytics:hll:{page_id}:{day.isoformat()}"
+
+
+def visitor_id(session_id: str, ip_address: str | None, agent_id: int | None) -> str:
+    """One visitor: the client session when known, else address and browser."""
+    return session_id or f"{ip_address or ''}|{agent_id or ''}"
+
+
+def add_visitors(pipe, visits: Iterable[PageVisit]) -> None:
+    """Queue ``PFADD``s for ``visits`` on a Redis pipeline, one per (page, day)."""
+    members: dict[str, set[str]] = defaultdict(set)
+    for visit in visits:
+        key = live_key(visit.page_id, timezone.localdate(visit.visited_at))
+        members[key].add(visitor_id(visit.session_id, visit.ip_address, visit.agent_id))
+    for key, visitors in members.items():
+        pipe.pfadd(key, *visitors)
+        pipe.expire(key, LIVE_KEY_TTL)
+
+
+def _scratch_key() -> str:
+    return f"analytics:hll:scratch:{uuid.uuid4().hex}"
+
+
+def fold_daily_sketches(pairs: Iterable[tuple]) -> int:
+    """Merge the live sketches of ``(page_id, day)`` pairs into their summaries.
+
+    Updates ``visitor_sketch`` and ``unique_visitors`` of the matching
+    ``PageDailySummary`` rows; returns how many were updated.
+    """
+    wanted = set(pairs)
+    if not wanted:
+        return 0
+    rows = [
+        row
+        for row in PageDailySummary.objects.filter(
+            page_id__in={page_id for page_id, _ in wanted}, date__in={day for _, day in wanted}
+        ).only("id", "page_id", "date", "visitor_sketch")
+        if (row.page_id, row.date) in wanted
+    ]
+    client = get_binary_redis()
+    now = timezone.now()
+    for start in range(0, len(rows), MERGE_CHUNK):
+        chunk = rows[start : start + MERGE_CHUNK]
+        pipe = client.pipeline(transaction=False)
+        scratch = [_scratch_key() for _ in chunk]
+        for row, key in zip(chunk, scratch):
+            if row.visitor_sketch:
+                pipe.set(key, bytes(row.visitor_sketch), ex=60)
+            # An existing destination is merged as one of the sources.
+            pipe.pfmerge(key, live_key(row.page_id, row.date))
+            pipe.get(key)
+            pipe.pfcount(key)
+        pipe.delete(*scratch)
+        results = iter(pipe.execute())
+        for row in chunk:
+            if row.visitor_sketch:
+                next(results)
+            next(results)
+            row.visitor_sketch = next(results)
+            row.unique_visitors = next(results)
+            row.updated_at = now
+    PageDailySummary.objects.bulk_update(rows, ["visitor_sketch", "unique_visitors", "updated_at"], batch_size=500)
+    return len(rows)
+
+
+def unique_visitors(page_ids: Iterable, start: date, end: date) -> int:
+    """Estimated distinct visitors to ``page_ids`` between ``start`` and ``end`` inclusive.
+
+    Merges the stored daily sketches (and the live ones of recent days not
+    folded yet) in Redis; memory stays at a few sketches of 12 KB each.
+    """
+    page_ids = list(page_ids)
+    client = get_binary_redis()
+    destination = _scratch_key()
+    # Live sketches only exist for the last ``LIVE_KEY_TTL`` days up to today.
+    today = timezone.localdate()
+    sources = [
+        live_key(page_id, day)
+        for page_id in page_ids
+        for day in _days(max(start, today - LIVE_KEY_TTL), min(end, today))
+    ]
+    sketches = (
+        PageDailySummary.objects.filter(page_id__in=page_ids, date__range=(start, end))
+        .exclude(visitor_sketch=None)
+        .values_list("visitor_sketch", flat=True)
+        .iterator(chunk_size=MERGE_CHUNK)
+    )
+    try:
+        batch: list[bytes] = []
+        for sketch in sketches:
+            batch.append(bytes(sketch))
+            if len(batch) == MERGE_CHUNK:
+                _merge_into(client, destination, batch)
+                batch = []
+        _merge_into(client, destination, batch, sources)
+        return client.pfcount(destination)
+    finally:
+        client.delete(destination)
+
+
+def _merge_into(client, destination: str, sketches: list[bytes], keys: Iterable[str] = ()) -> None:
+    pipe = client.pipeline(transaction=False)
+    scratch = [_scratch_key() for _ in sketches]
+    for key, sketch in zip(scratch, sketches):
+        pipe.set(key, sketch, ex=60)
+    pipe.pfmerge(destination, *scratch, *keys)
+    if scratch:
+        pipe.delete(*scratch)
+    pipe.expire(destination, 60)
+    pipe.execute()
+
+
+def _days(start: date, end: date) -> list[date]:
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
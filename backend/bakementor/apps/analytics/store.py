@@ -0,0 +1,25 @@
+"""Redis connection for analytics buffers and sketches."""
+from __future__ import annotations
+
+from functools import lru_cache
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+from apps.common.streams import redis_client
+
+
+def get_redis() -> redis.Redis:
+    return redis_client(settings.ANALYTICS_REDIS_URL)
+
+
+@lru_cache(maxsize=1)
+def get_binary_redis() -> redis.Redis:
+    """Client returning raw bytes, for serialized HyperLogLog sketches."""
+    return redis.Redis.from_url(settings.ANALYTICS_REDIS_URL)
+
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """A new asyncio client; it is bound to the running event loop, so close it when done."""
+    return redis.asyncio.Redis.from_url(settings.ANALYTICS_REDIS_URL, decode_responses=True)
@@ -1 +1,57 @@
-﻿"""Placeholder."""
+"""Celery tasks for analytics."""
+from __future__ import annotations
+
+import os
+import socket
+from datetime import date
+
+from celery import shared_task
+from django.contrib.auth import get_user_model
+
+from .export import purge_exports, run_parquet_export, update_export_job
+from .ingest import drain
+from .live import expire_leaderboards
+from .partitions import drop_expired, ensure_partitions
+from .rollup import rollup_visits
+
+
+@shared_task(name="analytics.drain_visits")
+def drain_visits() -> int:
+    """Bulk-insert visits buffered by the beacon endpoint."""
+    return drain(consumer=f"{socket.gethostname()}-{os.getpid()}")
+
+
+@shared_task(name="analytics.rollup_daily_summaries")
+def rollup_daily_summaries() -> int:
+    """Fold visits recorded since the last run into ``PageDailySummary``."""
+    return rollup_visits()
+
+
+@shared_task(name="analytics.maintain_visit_partitions")
+def maintain_visit_partitions() -> dict[str, list[str]]:
+    """Create upcoming monthly visit partitions and drop those past retention."""
+    return {"created": ensure_partitions(), "dropped": drop_expired()}
+
+
+@shared_task(name="analytics.export_parquet")
+def export_parquet(job_id: str, dataset: str, start: str, end: str, user_id: int) -> str:
+    """Write a Parquet export of the user's pages for the API's export jobs."""
+    update_export_job(job_id, status="running")
+    try:
+        owner = get_user_model().objects.get(pk=user_id)
+        return run_parquet_export(job_id, dataset, date.fromisoformat(start), date.fromisoformat(end), owner)
+    except Exception:
+        update_export_job(job_id, status="failed")
+        raise
+
+
+@shared_task(name="analytics.purge_exports")
+def purge_expired_exports() -> int:
+    """Delete export files that outlived their job."""
+    return purge_exports()
+
+
+@shared_task(name="analytics.expire_leaderboards")
+def expire_leaderboard_buckets() -> int:
+    """Drop views older than the top-pages window from the leaderboards."""
+    return expire_leaderboards()
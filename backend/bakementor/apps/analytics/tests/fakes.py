@@ -0,0 +1,149 @@
+import json
+
+
+class FakeHyperLogLogRedis:
+    """In-memory stand-in for the Redis HyperLogLog commands, counting exactly.
+
+    Sketches are plain sets serialized as JSON, which is enough to check how
+    sketches are added, stored and merged.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def pfadd(self, key, *members):
+        values = self.data.setdefault(key, set())
+        before = len(values)
+        values.update(members)
+        return int(len(values) > before)
+
+    def pfcount(self, *keys):
+        return len(set().union(*(self.data.get(key, set()) for key in keys)))
+
+    def pfmerge(self, destination, *sources):
+        self.data[destination] = set().union(self.data.get(destination, set()), *(self.data.get(k, set()) for k in sources))
+        return True
+
+    def get(self, key):
+        values = self.data.get(key)
+        return None if values is None else json.dumps(sorted(values)).encode()
+
+    def set(self, key, value, ex=None):
+        self.data[key] = set(json.loads(value))
+        return True
+
+    def expire(self, key, ttl):
+        return key in self.data
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class FakeKeyValueRedis:
+    """In-memory stand-in for plain string keys (``GET``/``SET``/``MGET``)."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = str(value)
+        return True
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class FakeSortedSetRedis:
+    """In-memory stand-in for the sorted set and hash commands used by live counters."""
+
+    def __init__(self):
+        self.zsets = {}
+        self.hashes = {}
+
+    def zadd(self, key, mapping, gt=False):
+        zset = self.zsets.setdefault(key, {})
+        for member, score in mapping.items():
+            if not gt or score > zset.get(member, float("-inf")):
+                zset[member] = score
+        return len(mapping)
+
+    def zincrby(self, key, amount, member):
+        zset = self.zsets.setdefault(key, {})
+        zset[member] = zset.get(member, 0) + amount
+        return zset[member]
+
+    @staticmethod
+    def _in_range(score, low, high):
+        def bound(value, default):
+            value = str(value)
+            if value in {"-inf", "+inf"}:
+                return float(value), False
+            return (float(value[1:]), True) if value.startswith("(") else (float(value), False)
+
+        (low, low_open), (high, high_open) = bound(low, None), bound(high, None)
+        return (score > low if low_open else score >= low) and (score < high if high_open else score <= high)
+
+    def zcount(self, key, low, high):
+        return sum(self._in_range(score, low, high) for score in self.zsets.get(key, {}).values())
+
+    def zrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        return [member for member, score in sorted(zset.items(), key=lambda item: item[1]) if self._in_range(score, low, high)]
+
+    def zremrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        for member in self.zrangebyscore(key, low, high):
+            del zset[member]
+
+    def zrevrange(self, key, start, end, withscores=False):
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda item: -item[1])[start : end + 1]
+        return items if withscores else [member for member, _ in items]
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(member, None)
+
+    def hincrby(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field] = values.get(field, 0) + amount
+        return values[field]
+
+    def hgetall(self, key):
+        return {field: str(value) for field, value in self.hashes.get(key, {}).items()}
+
+    def expire(self, key, ttl):
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.zsets.pop(key, None)
+            self.hashes.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in calls]
@@ -0,0 +1,105 @@
+from unittest import mock
+
+import redis
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.analytics import dimensions
+from apps.analytics.models import PageVisit, ReferrerHost, UserAgent
+from apps.pages.models import Page
+
+from .fakes import FakeKeyValueRedis
+
+CHROME_WINDOWS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36"
+)
+EDGE_WINDOWS = CHROME_WINDOWS + " Edg/126.0"
+ANDROID_TABLET = "Mozilla/5.0 (Linux; Android 14; SM-X710) AppleWebKit/537.36 Chrome/126.0 Safari/537.36"
+User = get_user_model()
+
+GOOGLEBOT = "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"
+
+
+class ParsingTests(TestCase):
+    def test_user_agents_are_classified(self):
+        cases = {
+            CHROME_WINDOWS: ("Chrome", "Windows", "desktop"),
+            EDGE_WINDOWS: ("Edge", "Windows", "desktop"),
+            ANDROID_TABLET: ("Chrome", "Android", "tablet"),
+            GOOGLEBOT: ("Other", "Other", "bot"),
+            "": ("Other", "Other", "other"),
+        }
+        for value, expected in cases.items():
+            parsed = dimensions.parse_user_agent(value)
+            self.assertEqual((parsed["browser"], parsed["os"], parsed["device"]), expected, value)
+
+    def test_referrer_hosts(self):
+        self.assertEqual(dimensions.referrer_host("https://User@WWW.Example.com:8443/path?q=1"), "www.example.com")
+        self.assertEqual(dimensions.referrer_host("not a url"), "")
+        self.assertEqual(dimensions.referrer_host("http://[::1"), "")
+
+
+class ResolveTests(TestCase):
+    def setUp(self):
+        self.redis = FakeKeyValueRedis()
+        patcher = mock.patch.object(dimensions, "get_redis", return_value=self.redis)
+        self.get_redis = patcher.start()
+        self.addCleanup(patcher.stop)
+        dimensions.user_agents.lru.clear()
+        self.addCleanup(dimensions.user_agents.lru.clear)
+
+    def test_values_are_interned_once_and_then_served_from_caches(self):
+        ids = dimensions.user_agents.resolve([CHROME_WINDOWS, CHROME_WINDOWS, ""])
+        self.assertEqual(list(ids), [CHROME_WINDOWS])
+        self.assertEqual(UserAgent.objects.get(pk=ids[CHROME_WINDOWS]).browser, "Chrome")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(dimensions.user_agents.resolve([CHROME_WINDOWS]), ids)
+        # Another worker: empty LRU, shared Redis.
+        dimensions.user_agents.lru.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(dimensions.user_agents.resolve([CHROME_WINDOWS]), ids)
+
+    def test_redis_outage_falls_back_to_the_database(self):
+        existing = dimensions.user_agents.resolve([CHROME_WINDOWS])
+        dimensions.user_agents.lru.clear()
+        self.get_redis.side_effect = redis.ConnectionError("down")
+        ids = dimensions.user_agents.resolve([CHROME_WINDOWS, GOOGLEBOT])
+        self.assertEqual(ids[CHROME_WINDOWS], existing[CHROME_WINDOWS])
+        self.assertEqual(UserAgent.objects.count(), 2)
+
+    def test_lru_evicts_the_least_recently_used(self):
+        lru = dimensions._LRU(2)
+        lru.put("a", 1)
+        lru.put("b", 2)
+        lru.get("a")
+        lru.put("c", 3)
+        self.assertEqual((lru.get("a"), lru.get("b"), lru.get("c")), (1, None, 3))
+
+
+class BreakdownTests(TestCase):
+    def test_visits_are_grouped_by_dimension(self):
+        owner = User.objects.create_user(email="owner@example.com", password="pass")
+        page = Page.objects.create(owner=owner, title="Home", slug="home")
+        desktop = UserAgent.objects.create(value=CHROME_WINDOWS, **dimensions.parse_user_agent(CHROME_WINDOWS))
+        tablet = UserAgent.objects.create(value=ANDROID_TABLET, **dimensions.parse_user_agent(ANDROID_TABLET))
+        search = ReferrerHost.objects.create(host="search.example.com")
+        for agent, referrer in ((desktop, search), (desktop, None), (tablet, search)):
+            PageVisit.objects.create(page=page, agent=agent, referrer=referrer)
+
+        client = APIClient()
+        client.force_authenticate(owner)
+        url = reverse("analytics-visits-breakdown")
+        self.assertEqual(
+            client.get(url, {"by": "device"}).data,
+            [{"value": "desktop", "visits": 2}, {"value": "tablet", "visits": 1}],
+        )
+        self.assertEqual(
+            client.get(url, {"by": "referrer"}).data,
+            [{"value": "search.example.com", "visits": 2}, {"value": None, "visits": 1}],
+        )
+        visit = client.get(reverse("analytics-visits-list")).data["results"][0]
+        self.assertIn(visit["device"], {"desktop", "tablet"})
+        self.assertEqual(client.get(url, {"by": "colour"}).status_code, 400)
@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.analytics import export
+from apps.analytics.models import PageDailySummary, PageVisit
+from apps.pages.models import Page
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pq = None
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.exports_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.exports_root, ignore_errors=True)
+        exports = {"BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": self.exports_root}}
+        settings_override = override_settings(STORAGES={**settings.STORAGES, "exports": exports})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.owner = User.objects.create_user(email="owner@example.com", password="pass")
+        self.page = Page.objects.create(owner=self.owner, title="Home", slug="home")
+        other = User.objects.create_user(email="other@example.com", password="pass")
+        foreign = Page.objects.create(owner=other, title="Theirs", slug="theirs")
+        for page, day, session in ((self.page, 10, "b"), (self.page, 9, "a"), (self.page, 20, "late"), (foreign, 10, "x")):
+            PageVisit.objects.create(
+                page=page, session_id=session, visited_at=datetime(2025, 3, day, 12, tzinfo=dt_timezone.utc)
+            )
+        PageDailySummary.objects.create(page=self.page, date=date(2025, 3, 9), views=1, unique_visitors=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_csv_export_streams_the_users_rows_in_order(self):
+        res = self.client.get(
+            reverse("analytics-export"), {"dataset": "visits", "start": "2025-03-01", "end": "2025-03-15"}
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.streaming)
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ",".join(export.DATASETS["visits"]))
+        self.assertEqual([line.split(",")[3] for line in lines[1:]], ["a", "b"])
+
+    def test_csv_rows_are_chunked(self):
+        rows = [(str(n), "p", n, n) for n in range(5)]
+        with mock.patch.object(export, "CSV_ROWS_PER_CHUNK", 2):
+            chunks = list(export.iter_csv("summaries", rows))
+        self.assertEqual(len(chunks), 4)  # header + 2 + 2 + 1
+
+    def test_management_command_writes_csv(self):
+        out = StringIO()
+        call_command(
+            "export_analytics", "summaries", "-", "--start", "2025-03-01", "--end", "2025-03-31", stdout=out
+        )
+        self.assertEqual(out.getvalue().splitlines()[1], f"{self.page.pk},2025-03-09,1,1")
+
+    def test_parquet_export_runs_as_a_job(self):
+        with mock.patch("apps.analytics.views.export_parquet") as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    reverse("analytics-export"),
+                    {"dataset": "visits", "format": "parquet", "start": "2025-03-01", "end": "2025-03-31"},
+                    format="json",
+                )
+        self.assertEqual(res.status_code, 202)
+        job_id = res.data["job_id"]
+        task.apply_async.assert_called_once_with((job_id, "visits", "2025-03-01", "2025-03-31", self.owner.pk), {})
+        job_url = reverse("analytics-export-job", args=[job_id])
+        self.assertEqual(self.client.get(job_url).data["status"], "pending")
+
+        stranger = APIClient()
+        stranger.force_authenticate(User.objects.get(email="other@example.com"))
+        self.assertEqual(stranger.get(job_url).status_code, 404)
+
+    def test_jobs_that_never_start_or_finish_are_reported_failed(self):
+        with mock.patch("apps.analytics.views.export_parquet") as task:
+            task.apply_async.side_effect = ConnectionError("broker down")
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    reverse("analytics-export"),
+                    {"dataset": "visits", "format": "parquet", "start": "2025-03-01", "end": "2025-03-31"},
+                    format="json",
+                )
+        self.assertEqual(res.status_code, 202)
+        job_id = res.data["job_id"]
+        self.assertEqual(export.export_job_state(job_id)["status"], "pending")
+        later = datetime.now(dt_timezone.utc) + timedelta(seconds=export.EXPORT_QUEUE_TIMEOUT + 60)
+        self.assertEqual(export.export_job_state(job_id, now=later)["status"], "failed")
+        job_url = reverse("analytics-export-job", args=[job_id])
+        self.assertEqual(self.client.get(job_url).data["status"], "failed")
+
+        export.update_export_job("lost", status="running", user_id=self.owner.pk)
+        self.assertEqual(export.export_job_state("lost", now=later)["status"], "running")
+        much_later = datetime.now(dt_timezone.utc) + timedelta(seconds=export.EXPORT_RUN_TIMEOUT + 60)
+        self.assertEqual(export.export_job_state("lost", now=much_later)["status"], "failed")
+
+    @skipUnless(pq, "pyarrow is not installed")
+    def test_parquet_export_writes_row_groups(self):
+        cache.set(export.export_job_key("job"), {"status": "running", "user_id": self.owner.pk})
+        with mock.patch.object(export, "ROW_GROUP_SIZE", 2):
+            name = export.run_parquet_export("job", "visits", date(2025, 3, 1), date(2025, 3, 31), self.owner)
+        with export.export_storage().open(name, "rb") as handle:
+            parquet = pq.ParquetFile(handle)
+            self.assertEqual(parquet.metadata.num_row_groups, 2)
+            self.assertEqual(parquet.read().column("session_id").to_pylist(), ["a", "b", "late"])
+
+    def test_old_export_files_are_purged(self):
+        name = export.export_storage().save(f"{export.EXPORT_DIRECTORY}/old.parquet", ContentFile(b"x"))
+        self.assertEqual(export.purge_exports(), 0)
+        later = datetime.now(dt_timezone.utc) + timedelta(seconds=export.EXPORT_TTL + 60)
+        self.assertEqual(export.purge_exports(now=later), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.exports_root, name)))
@@ -0,0 +1,108 @@
+import uuid
+from unittest import mock
+
+import redis
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.analytics import dimensions, ingest
+from apps.analytics.models import PageVisit
+from apps.pages.models import Page
+
+from .fakes import FakeKeyValueRedis
+
+User = get_user_model()
+
+
+class VisitBeaconTests(TestCase):
+    def setUp(self):
+        self.client_redis = mock.Mock()
+        patcher = mock.patch.object(ingest, "get_redis", return_value=self.client_redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _beacon(self, body, **extra):
+        return self.client.post(reverse("analytics-beacon"), body, content_type="text/plain", **extra)
+
+    def test_beacon_buffers_the_event_without_touching_the_database(self):
+        page_id = uuid.uuid4()
+        with self.assertNumQueries(0):
+            res = self._beacon(
+                f'{{"page": "{page_id}", "session_id": "s1"}}',
+                HTTP_USER_AGENT="Browser/1.0",
+                HTTP_REFERER="https://example.com/",
+            )
+        self.assertEqual(res.status_code, 204)
+        (key, fields), kwargs = self.client_redis.xadd.call_args
+        self.assertEqual(key, ingest.STREAM_KEY)
+        self.assertEqual(
+            fields,
+            {"page": str(page_id), "session": "s1", "ip": "127.0.0.1", "ua": "Browser/1.0", "ref": "https://example.com/"},
+        )
+        self.assertTrue(kwargs["approximate"])
+
+    def test_invalid_payloads_are_rejected(self):
+        self.assertEqual(self._beacon("{}").status_code, 400)
+        self.assertEqual(self._beacon('{"page": "nope"}').status_code, 400)
+        self.assertEqual(self._beacon("not json").status_code, 400)
+        self.client_redis.xadd.assert_not_called()
+
+    def test_buffer_outage_does_not_fail_the_beacon(self):
+        self.client_redis.xadd.side_effect = redis.ConnectionError("down")
+        self.assertEqual(self._beacon(f'{{"page": "{uuid.uuid4()}"}}').status_code, 204)
+
+
+class PersistEventsTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(dimensions, "get_redis", return_value=FakeKeyValueRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for dimension in (dimensions.user_agents, dimensions.referrer_hosts):
+            dimension.lru.clear()
+        owner = User.objects.create_user(email="owner@example.com", password="pass")
+        self.page = Page.objects.create(owner=owner, title="Home", slug="home")
+
+    def _entry(self, entry_id, **fields):
+        return entry_id, {"page": str(self.page.pk), "session": "s", "ip": "10.0.0.1", "ua": "", "ref": "", **fields}
+
+    def test_events_are_inserted_once_even_when_redelivered(self):
+        entries = [self._entry("1700000000000-0"), self._entry("1700000000500-1", ip="bogus")]
+        self.assertEqual(len(ingest.persist_events(entries)), 2)
+        self.assertEqual(len(ingest.persist_events(entries)), 2)
+
+        visits = list(PageVisit.objects.order_by("visited_at"))
+        self.assertEqual(len(visits), 2)
+        self.assertEqual(visits[0].visited_at.timestamp(), 1_700_000_000)
+        self.assertEqual((visits[0].ip_address, visits[1].ip_address), ("10.0.0.1", None))
+
+    def test_user_agents_and_referrers_are_stored_as_dimension_keys(self):
+        agent = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) Version/17.0 Mobile/15E148 Safari/604.1"
+        entries = [
+            self._entry("1-0", ua=agent, ref="https://News.example.com/a?b=1"),
+            self._entry("2-0", ua=agent, ref="https://news.example.com/other"),
+        ]
+        ingest.persist_events(entries)
+
+        first, second = PageVisit.objects.select_related("agent", "referrer").order_by("visited_at")
+        self.assertEqual(first.agent_id, second.agent_id)
+        self.assertEqual((first.agent.browser, first.agent.os, first.agent.device), ("Safari", "iOS", "mobile"))
+        self.assertEqual((first.referrer.host, second.referrer_id), ("news.example.com", first.referrer_id))
+
+    def test_unknown_pages_and_malformed_entries_are_dropped(self):
+        entries = [self._entry("1-0", page=str(uuid.uuid4())), ("2-0", {"page": "x"}), ("3-0", None), self._entry("4-0")]
+        self.assertEqual(len(ingest.persist_events(entries)), 1)
+        self.assertEqual(PageVisit.objects.count(), 1)
+
+    def test_drain_acknowledges_stored_batches(self):
+        client = mock.Mock()
+        client.xautoclaim.return_value = ["0-0", [self._entry("1-0")], []]
+        client.xreadgroup.side_effect = [[(ingest.STREAM_KEY, [self._entry("2-0"), self._entry("3-0")])], []]
+        with mock.patch.object(ingest, "get_redis", return_value=client):
+            self.assertEqual(ingest.drain("worker-1", batch_size=2), 3)
+        self.assertEqual(PageVisit.objects.count(), 3)
+        pipe = client.pipeline.return_value
+        acked = [call.args[2:] for call in pipe.xack.call_args_list]
+        self.assertEqual(acked, [("1-0",), ("2-0", "3-0")])
+        # Every stored visit also reached the page's daily HyperLogLog.
+        self.assertEqual(pipe.pfadd.call_count, 2)
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.analytics import live
+from apps.analytics.models import PageVisit
+from apps.pages.models import Page
+
+from .fakes import FakeSortedSetRedis
+
+User = get_user_model()
+
+
+class LiveCounterTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@example.com", password="pass")
+        self.home = Page.objects.create(owner=self.owner, title="Home", slug="home")
+        self.about = Page.objects.create(owner=self.owner, title="About", slug="about")
+        self.redis = FakeSortedSetRedis()
+        patcher = mock.patch.object(live, "get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _track(self, page, session, ago):
+        visit = PageVisit(page=page, session_id=session, visited_at=datetime.now(dt_timezone.utc) - ago)
+        pipe = self.redis.pipeline()
+        live.track(pipe, [visit])
+        pipe.execute()
+
+    def test_active_visitors_and_top_pages(self):
+        self._track(self.home, "a", timedelta(seconds=10))
+        self._track(self.home, "a", timedelta(seconds=5))
+        self._track(self.home, "b", timedelta(minutes=30))
+        self._track(self.about, "c", timedelta(minutes=1))
+        self._track(self.about, "old", timedelta(hours=2))
+
+        data = live.snapshot(self.owner.pk, [self.home.pk, self.about.pk])
+        self.assertEqual(data["active_visitors"], 2)
+        self.assertEqual(data["pages"], {str(self.home.pk): 1, str(self.about.pk): 1})
+        self.assertEqual(
+            data["top_pages"], [{"page": str(self.home.pk), "views": 3}, {"page": str(self.about.pk), "views": 1}]
+        )
+
+    def test_leaderboard_slides_as_minutes_leave_the_window(self):
+        self._track(self.home, "a", timedelta(minutes=50))
+        self._track(self.about, "b", timedelta(minutes=1))
+        self.assertEqual(live.expire_leaderboards(), 0)
+
+        self.assertEqual(live.expire_leaderboards(now=time.time() + 15 * 60), 1)
+        self.assertEqual(live.snapshot(self.owner.pk)["top_pages"], [{"page": str(self.about.pk), "views": 1}])
+
+    def test_endpoint_reports_only_the_users_pages(self):
+        self._track(self.home, "a", timedelta(seconds=10))
+        other = User.objects.create_user(email="other@example.com", password="pass")
+        client = APIClient()
+        client.force_authenticate(other)
+        res = client.get(reverse("analytics-live"), {"page": [str(self.home.pk)]})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data, {"active_visitors": 0, "pages": {}, "top_pages": []})
+
+    def test_stream_pushes_snapshots_as_server_sent_events(self):
+        self._track(self.home, "a", timedelta(seconds=10))
+
+        class AsyncPipeline:
+            def __init__(pipe):
+                pipe._pipe = self.redis.pipeline()
+
+            def __getattr__(pipe, name):
+                return getattr(pipe._pipe, name)
+
+            async def execute(pipe):
+                return pipe._pipe.execute()
+
+        client = mock.Mock(pipeline=lambda transaction: AsyncPipeline(), aclose=mock.AsyncMock())
+
+        async def first_events():
+            events = live.stream_snapshots(self.owner.pk, [self.home.pk])
+            try:
+                return [await anext(events), await anext(events)]
+            finally:
+                await events.aclose()
+
+        with mock.patch.object(live, "get_async_redis", return_value=client):
+            retry, event = asyncio.run(first_events())
+        self.assertEqual(retry, "retry: 5000\n\n")
+        self.assertTrue(event.startswith("event: snapshot\ndata: "))
+        self.assertIn('"active_visitors": 1', event)
+        client.aclose.assert_awaited_once()
+
+    def test_stream_is_pushed_from_the_asgi_application(self):
+        async def events(owner_id, page_ids):
+            yield "retry: 5000\n\n"
+
+        token = AccessToken.for_user(self.owner)
+        with mock.patch("apps.analytics.views.stream_snapshots", side_effect=events) as stream:
+            res = async_to_sync(AsyncClient().get)(
+                reverse("analytics-live-stream"), headers={"Authorization": f"Bearer {token}"}
+            )
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        stream.assert_called_once_with(self.owner.pk, [])
+
+    def test_wsgi_stream_sends_one_snapshot_and_ends(self):
+        self._track(self.home, "a", timedelta(seconds=10))
+        api = APIClient()
+        api.force_authenticate(self.owner)
+        with mock.patch("apps.analytics.views.stream_snapshots") as stream:
+            res = api.get(reverse("analytics-live-stream"))
+            retry, event = list(res.streaming_content)
+        stream.assert_not_called()
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        self.assertEqual(retry, b"retry: 5000\n\n")
+        self.assertIn(b'"active_visitors": 1', event)
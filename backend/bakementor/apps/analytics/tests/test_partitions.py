@@ -0,0 +1,89 @@
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.analytics import partitions
+from apps.analytics.models import PageVisit
+from apps.pages.models import Page
+
+User = get_user_model()
+
+on_postgresql = skipUnless(connection.vendor == "postgresql", "visits are only partitioned on PostgreSQL")
+
+
+def _count(table: str) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {connection.ops.quote_name(table)}")
+        return cursor.fetchone()[0]
+
+
+class PartitionHelperTests(TestCase):
+    def test_month_arithmetic_and_names(self):
+        self.assertEqual(partitions.add_months(date(2025, 11, 1), 3), date(2026, 2, 1))
+        self.assertEqual(partitions.add_months(date(2025, 1, 1), -13), date(2023, 12, 1))
+        self.assertEqual(partitions.partition_name(date(2025, 3, 1)), "analytics_pagevisit_y2025m03")
+
+
+@on_postgresql
+class PartitionMaintenanceTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(email="owner@example.com", password="pass")
+        self.page = Page.objects.create(owner=owner, title="Home", slug="home")
+
+    def test_upcoming_months_are_created_once(self):
+        self.assertTrue(partitions.is_partitioned())
+        created = partitions.ensure_partitions(months_ahead=2, today=date(2040, 11, 5))
+        months = (date(2040, 11, 1), date(2040, 12, 1), date(2041, 1, 1))
+        self.assertEqual(created, [partitions.partition_name(month) for month in months])
+        self.assertEqual(partitions.ensure_partitions(months_ahead=2, today=date(2040, 11, 5)), [])
+
+    def test_rows_in_the_default_partition_move_into_a_new_month(self):
+        PageVisit.objects.create(page=self.page, visited_at=datetime(2041, 6, 15, tzinfo=dt_timezone.utc))
+        PageVisit.objects.create(page=self.page, visited_at=datetime(2041, 7, 15, tzinfo=dt_timezone.utc))
+        self.assertEqual(_count(partitions.DEFAULT_PARTITION), 2)
+
+        partitions.ensure_partitions(months_ahead=0, today=date(2041, 6, 1))
+        self.assertEqual(_count(partitions.partition_name(date(2041, 6, 1))), 1)
+        self.assertEqual(_count(partitions.DEFAULT_PARTITION), 1)
+        self.assertEqual(PageVisit.objects.count(), 2)
+
+    def test_expired_months_are_dropped(self):
+        partitions.ensure_partitions(months_ahead=1, today=date(2040, 1, 1))
+        PageVisit.objects.create(page=self.page, visited_at=datetime(2040, 1, 15, tzinfo=dt_timezone.utc))
+        with connection.cursor() as cursor:
+            # Fire the deferred foreign key checks a committed insert would have run.
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        dropped = partitions.drop_expired(retention_months=1, today=date(2040, 3, 10))
+        # The migration's partitions around today are older still and go too.
+        self.assertEqual(dropped[-1], partitions.partition_name(date(2040, 1, 1)))
+        self.assertIn(date(2040, 2, 1), partitions.existing_partitions())
+        self.assertFalse(PageVisit.objects.exists())
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@example.com", password="pass")
+        self.page = Page.objects.create(owner=self.owner, title="Home", slug="home")
+        for month in (1, 2, 3):
+            PageVisit.objects.create(page=self.page, visited_at=datetime(2025, month, 15, tzinfo=dt_timezone.utc))
+
+    def test_retention_keeps_whole_recent_months(self):
+        # On PostgreSQL these rows predate every monthly partition and sit in the default one.
+        partitions.drop_expired(retention_months=1, today=date(2025, 3, 20))
+        self.assertEqual(
+            sorted(visit.visited_at.month for visit in PageVisit.objects.all()),
+            [2, 3],
+        )
+
+    def test_visit_listing_can_be_bounded_to_a_range(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        res = client.get(reverse("analytics-visits-list"), {"since": "2025-02-01T00:00:00Z", "until": "2025-03-01T00:00:00Z"})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(client.get(reverse("analytics-visits-list"), {"since": "yesterday"}).status_code, 400)
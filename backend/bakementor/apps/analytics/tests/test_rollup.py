@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from apps.analytics import sketches
+from apps.analytics.models import PageDailySummary, PageVisit, RollupWatermark
+from apps.analytics.rollup import ROLLUP_LAG, WATERMARK, rollup_visits
+from apps.pages.models import Page
+
+from .fakes import FakeHyperLogLogRedis
+
+User = get_user_model()
+
+DAY = datetime(2025, 3, 10, 12, tzinfo=dt_timezone.utc)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(email="owner@example.com", password="pass")
+        self.home = Page.objects.create(owner=owner, title="Home", slug="home")
+        self.about = Page.objects.create(owner=owner, title="About", slug="about")
+        self.redis = FakeHyperLogLogRedis()
+        patcher = mock.patch.object(sketches, "get_binary_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _visit(self, page, visited_at, inserted_at, session_id="", ip="10.0.0.1"):
+        # What the drain does: store the visit and add it to the live sketch.
+        visit = PageVisit.objects.create(page=page, visited_at=visited_at, session_id=session_id, ip_address=ip)
+        PageVisit.objects.filter(pk=visit.pk).update(created_at=inserted_at)
+        pipe = self.redis.pipeline()
+        sketches.add_visitors(pipe, [visit])
+        pipe.execute()
+
+    def _summary(self, page, date):
+        row = PageDailySummary.objects.get(page=page, date=date)
+        return row.views, row.unique_visitors
+
+    def test_views_and_unique_visitors_are_rolled_up_per_page_and_day(self):
+        self._visit(self.home, DAY, DAY, session_id="a")
+        self._visit(self.home, DAY, DAY, session_id="a")
+        self._visit(self.home, DAY, DAY, session_id="b")
+        self._visit(self.home, DAY, DAY)
+        self._visit(self.about, DAY + timedelta(days=1), DAY + timedelta(days=1), session_id="a")
+
+        rollup_visits(now=DAY + timedelta(days=2))
+
+        self.assertEqual(self._summary(self.home, DAY.date()), (4, 3))
+        self.assertEqual(self._summary(self.about, (DAY + timedelta(days=1)).date()), (1, 1))
+        self.assertEqual(RollupWatermark.objects.get(name=WATERMARK).position, DAY + timedelta(days=2) - ROLLUP_LAG)
+
+    def test_runs_only_fold_in_new_visits(self):
+        self._visit(self.home, DAY, DAY, session_id="a")
+        rollup_visits(now=DAY + timedelta(hours=1))
+        rollup_visits(now=DAY + timedelta(hours=2))
+        self.assertEqual(self._summary(self.home, DAY.date()), (1, 1))
+
+        self._visit(self.home, DAY, DAY + timedelta(hours=2), session_id="b")
+        rollup_visits(now=DAY + timedelta(hours=3))
+        self.assertEqual(self._summary(self.home, DAY.date()), (2, 2))
+
+    def test_late_visits_update_the_day_they_belong_to(self):
+        self._visit(self.home, DAY, DAY, session_id="a")
+        rollup_visits(now=DAY + timedelta(days=1))
+
+        # Buffered for two days before reaching the database.
+        self._visit(self.home, DAY, DAY + timedelta(days=2), session_id="late")
+        rollup_visits(now=DAY + timedelta(days=3))
+        self.assertEqual(self._summary(self.home, DAY.date()), (2, 2))
+
+    def test_visits_inside_the_lag_wait_for_the_next_run(self):
+        self._visit(self.home, DAY, DAY)
+        rollup_visits(now=DAY + ROLLUP_LAG / 2)
+        self.assertFalse(PageDailySummary.objects.exists())
+        rollup_visits(now=DAY + ROLLUP_LAG * 2)
+        self.assertEqual(self._summary(self.home, DAY.date()), (1, 1))
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.analytics import sketches
+from apps.analytics.models import PageDailySummary
+from apps.pages.models import Page
+
+from .fakes import FakeHyperLogLogRedis
+
+User = get_user_model()
+
+MONDAY = date(2025, 3, 10)
+TUESDAY = date(2025, 3, 11)
+
+
+class SketchTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@example.com", password="pass")
+        self.page = Page.objects.create(owner=self.owner, title="Home", slug="home")
+        self.redis = FakeHyperLogLogRedis()
+        patcher = mock.patch.object(sketches, "get_binary_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _seen(self, day, *visitors):
+        self.redis.pfadd(sketches.live_key(self.page.pk, day), *visitors)
+        PageDailySummary.objects.get_or_create(page=self.page, date=day)
+        sketches.fold_daily_sketches([(self.page.pk, day)])
+
+    def test_folding_keeps_visitors_whose_live_sketch_expired(self):
+        self._seen(MONDAY, "a", "b")
+        self.redis.delete(sketches.live_key(self.page.pk, MONDAY))
+        # A late visit starts a fresh live sketch.
+        self._seen(MONDAY, "c", "a")
+
+        summary = PageDailySummary.objects.get(page=self.page, date=MONDAY)
+        self.assertEqual(summary.unique_visitors, 3)
+        self.assertIsNotNone(summary.visitor_sketch)
+        self.assertFalse([key for key in self.redis.data if "scratch" in key])
+
+    def test_range_uniques_merge_daily_sketches(self):
+        self._seen(MONDAY, "a", "b")
+        self._seen(TUESDAY, "a", "c")
+        self.redis.data.clear()
+
+        self.assertEqual(sketches.unique_visitors([self.page.pk], MONDAY, TUESDAY), 3)
+        self.assertEqual(sketches.unique_visitors([self.page.pk], TUESDAY, TUESDAY), 2)
+        self.assertEqual(self.redis.data, {})
+
+    def test_live_sketches_are_read_for_recent_days_only(self):
+        today = timezone.localdate()
+        with mock.patch.object(self.redis, "pfmerge", wraps=self.redis.pfmerge) as pfmerge:
+            sketches.unique_visitors([self.page.pk], today - timedelta(days=30), today + timedelta(days=365))
+        sources = pfmerge.call_args.args[1:]
+        self.assertEqual(len(sources), sketches.LIVE_KEY_TTL.days + 1)
+        self.assertEqual(sources[-1], sketches.live_key(self.page.pk, today))
+
+    def test_uniques_endpoint(self):
+        self._seen(MONDAY, "a", "b")
+        self._seen(TUESDAY, "a")
+        client = APIClient()
+        client.force_authenticate(self.owner)
+
+        url = reverse("analytics-summaries-uniques")
+        res = client.get(url, {"start": MONDAY, "end": TUESDAY, "page": self.page.pk})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["unique_visitors"], 2)
+        self.assertEqual(client.get(url, {"start": TUESDAY, "end": MONDAY}).status_code, 400)
+        self.assertEqual(client.get(url, {"start": MONDAY, "end": "9999-12-31"}).status_code, 400)
+
+        stranger = User.objects.create_user(email="other@example.com", password="pass")
+        client.force_authenticate(stranger)
+        self.assertEqual(client.get(url, {"start": MONDAY, "end": TUESDAY}).data["unique_visitors"], 0)
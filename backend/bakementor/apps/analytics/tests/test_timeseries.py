@@ -0,0 +1,75 @@
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.analytics.models import PageDailySummary, PageVisit
+from apps.pages.models import Page
+
+User = get_user_model()
+
+
+class TimeSeriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(email="owner@example.com", password="pass")
+        self.home = Page.objects.create(owner=self.owner, title="Home", slug="home")
+        self.about = Page.objects.create(owner=self.owner, title="About", slug="about")
+        other = User.objects.create_user(email="other@example.com", password="pass")
+        self.foreign = Page.objects.create(owner=other, title="Theirs", slug="theirs")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def _series(self, **params):
+        res = self.client.get(reverse("analytics-timeseries"), params)
+        self.assertEqual(res.status_code, 200, res.data)
+        return res.data["buckets"]
+
+    def test_daily_and_weekly_buckets_sum_summaries(self):
+        # 2025-03-09 is a Sunday, 03-10 the next Monday.
+        for page, day, views, uniques in (
+            (self.home, date(2025, 3, 9), 4, 2),
+            (self.about, date(2025, 3, 9), 1, 1),
+            (self.home, date(2025, 3, 11), 3, 3),
+            (self.foreign, date(2025, 3, 11), 50, 50),
+        ):
+            PageDailySummary.objects.create(page=page, date=day, views=views, unique_visitors=uniques)
+
+        daily = self._series(start="2025-03-09", end="2025-03-11")
+        self.assertEqual(
+            [(bucket["start"], bucket["views"], bucket["unique_visitors"]) for bucket in daily],
+            [(date(2025, 3, 9), 5, 3), (date(2025, 3, 10), 0, 0), (date(2025, 3, 11), 3, 3)],
+        )
+        weekly = self._series(start="2025-03-09", end="2025-03-11", granularity="week", metric="views", page=str(self.home.pk))
+        self.assertEqual(weekly, [{"start": date(2025, 3, 3), "views": 4}, {"start": date(2025, 3, 10), "views": 3}])
+
+    def test_hourly_buckets_count_raw_visits(self):
+        for hour, session in ((9, "a"), (9, "a"), (9, "b"), (11, "c")):
+            PageVisit.objects.create(
+                page=self.home, session_id=session, visited_at=datetime(2025, 3, 10, hour, 30, tzinfo=dt_timezone.utc)
+            )
+        buckets = self._series(start="2025-03-10", end="2025-03-10", granularity="hour")
+        self.assertEqual(len(buckets), 24)
+        self.assertEqual((buckets[9]["views"], buckets[9]["unique_visitors"]), (3, 2))
+        self.assertEqual((buckets[10]["views"], buckets[11]["views"]), (0, 1))
+
+    def test_results_are_cached_per_query(self):
+        PageDailySummary.objects.create(page=self.home, date=date(2025, 3, 9), views=4)
+        self._series(start="2025-03-09", end="2025-03-09")
+        PageDailySummary.objects.filter(page=self.home).update(views=10)
+        with self.assertNumQueries(1):  # resolving the user's pages only
+            self.assertEqual(self._series(start="2025-03-09", end="2025-03-09")[0]["views"], 4)
+        self.assertEqual(self._series(start="2025-03-08", end="2025-03-09")[1]["views"], 10)
+
+    def test_ranges_are_validated(self):
+        url = reverse("analytics-timeseries")
+        self.assertEqual(self.client.get(url, {"start": "2025-03-09", "end": "2025-03-01"}).status_code, 400)
+        self.assertEqual(
+            self.client.get(url, {"start": "2025-01-01", "end": "2025-03-01", "granularity": "hour"}).status_code, 400
+        )
+        self.assertEqual(
+            self.client.get(url, {"start": "2025-01-01", "end": "2025-01-02", "metric": "revenue"}).status_code, 400
+        )
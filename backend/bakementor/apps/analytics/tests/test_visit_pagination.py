@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from apps.analytics.models import PageVisit
+from apps.analytics.views import VisitLogPagination
+from apps.pages.models import Page
+
+User = get_user_model()
+
+START = datetime(2025, 3, 10, tzinfo=dt_timezone.utc)
+
+
+class VisitLogPaginationTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@example.com", password="pass")
+        self.home = Page.objects.create(owner=self.owner, title="Home", slug="home")
+        self.about = Page.objects.create(owner=self.owner, title="About", slug="about")
+        # Pairs of visits share a timestamp, so pages must break ties on id.
+        PageVisit.objects.bulk_create(
+            PageVisit(page=self.home if i % 3 else self.about, visited_at=START + timedelta(seconds=i // 2))
+            for i in range(20)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def _walk(self, params):
+        url, ids, pages = reverse("analytics-visits-list"), [], 0
+        while url:
+            res = self.client.get(url, params if pages == 0 else None)
+            self.assertEqual(res.status_code, 200)
+            ids += [visit["id"] for visit in res.data["results"]]
+            url = res.data["next"]
+            pages += 1
+        return ids, pages
+
+    def test_pages_cover_every_visit_once_newest_first(self):
+        ids, pages = self._walk({"page_size": 3})
+        expected = [str(pk) for pk in PageVisit.objects.order_by("-visited_at", "-id").values_list("id", flat=True)]
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 7)
+
+    def test_page_filter_and_default_page_size(self):
+        ids, pages = self._walk({"page": str(self.about.pk)})
+        self.assertEqual(len(ids), PageVisit.objects.filter(page=self.about).count())
+        self.assertEqual(pages, 1)
+
+    def test_deep_pages_issue_no_count_or_offset(self):
+        first = self.client.get(reverse("analytics-visits-list"), {"page_size": 2})
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(first.data["next"])
+        self.assertEqual(res.status_code, 200)
+        sql = " ".join(query["sql"] for query in queries).upper()
+        self.assertNotIn("COUNT(", sql)
+        self.assertNotIn("OFFSET", sql)
+
+    def test_page_size_is_clamped_and_bad_cursors_rejected(self):
+        res = self.client.get(reverse("analytics-visits-list"), {"page_size": 10_000})
+        self.assertEqual(len(res.data["results"]), 20)
+        self.assertEqual(VisitLogPagination.max_page_size, 1000)
+        self.assertEqual(self.client.get(reverse("analytics-visits-list"), {"cursor": "garbage"}).status_code, 404)
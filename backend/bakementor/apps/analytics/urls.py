@@ -1,10 +1,27 @@
 """Analytics API routes."""
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import PageDailySummaryViewSet, PageVisitViewSet
+from .views import (
+    ExportJobView,
+    ExportView,
+    LiveView,
+    PageDailySummaryViewSet,
+    PageVisitViewSet,
+    TimeSeriesView,
+    visit_beacon,
+)
 
 router = DefaultRouter()
 router.register(r"visits", PageVisitViewSet, basename="analytics-visits")
 router.register(r"summaries", PageDailySummaryViewSet, basename="analytics-summaries")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("beacon/", visit_beacon, name="analytics-beacon"),
+    path("timeseries/", TimeSeriesView.as_view(), name="analytics-timeseries"),
+    path("export/", ExportView.as_view(), name="analytics-export"),
+    path("export/<uuid:job_id>/", ExportJobView.as_view(), name="analytics-export-job"),
+    path("live/", LiveView.as_view(), name="analytics-live"),
+    path("live/stream/", LiveView.as_view(stream=True), name="analytics-live-stream"),
+    *router.urls,
+]
@@ -1,22 +1,106 @@
 """Analytics endpoints."""
 from __future__ import annotations
 
-from rest_framework import permissions, viewsets
+import json
+import logging
+import uuid
 
+import redis
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.common.pagination import KeysetPagination
+from apps.common.tasks import dispatch_on_commit
+from apps.pages.models import Page
+
+from .export import export_job_state, export_rows, export_storage, iter_csv, update_export_job
+from .ingest import record_visit
+from .live import snapshot, snapshot_events, stream_snapshots
 from .models import PageDailySummary, PageVisit
-from .serializers import PageDailySummarySerializer, PageVisitSerializer
+from .serializers import (
+    ExportQuerySerializer,
+    LiveQuerySerializer,
+    PageDailySummarySerializer,
+    PageVisitSerializer,
+    TimeSeriesQuerySerializer,
+    UniqueVisitorsQuerySerializer,
+    VisitBreakdownQuerySerializer,
+    VisitRangeQuerySerializer,
+)
+from .sketches import unique_visitors
+from .tasks import export_parquet
+from .timeseries import time_series
+
+logger = logging.getLogger(__name__)
+
+MAX_BEACON_BYTES = 4096
+BREAKDOWN_LIMIT = 50
+BREAKDOWN_LABELS = {
+    "device": "agent__device",
+    "browser": "agent__browser",
+    "os": "agent__os",
+    "referrer": "referrer__host",
+}
+
+
+class VisitLogPagination(KeysetPagination):
+    """Newest-first visit log; ``?page_size=`` up to 1000, constant cost at any depth."""
+
+    ordering = ("-visited_at", "-id")
+    page_size = 100
+    max_page_size = 1000
 
 
 class PageVisitViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = PageVisitSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = VisitLogPagination
+    # The keyset order is fixed; a client-chosen ``?ordering=`` would break the cursor.
+    filter_backends = ()
 
     def get_queryset(self):
-        queryset = PageVisit.objects.filter(page__owner=self.request.user)
+        """Visits to the user's pages, newest first.
+
+        ``?since=``/``?until=`` (ISO datetimes) bound ``visited_at`` so only
+        the matching monthly partitions are read.
+        """
+        queryset = PageVisit.objects.filter(page__owner=self.request.user).select_related("agent", "referrer")
         page_id = self.request.query_params.get("page")
         if page_id:
             queryset = queryset.filter(page_id=page_id)
-        return queryset.order_by("-visited_at")
+        query = VisitRangeQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        if "since" in query.validated_data:
+            queryset = queryset.filter(visited_at__gte=query.validated_data["since"])
+        if "until" in query.validated_data:
+            queryset = queryset.filter(visited_at__lt=query.validated_data["until"])
+        return queryset.order_by(*VisitLogPagination.ordering)
+
+    @action(detail=False, methods=["get"])
+    def breakdown(self, request):
+        """Visit counts grouped by ``?by=`` device, browser, os or referrer, largest first.
+
+        The labels come from the small interned dimension tables, so this is a
+        join and one ``GROUP BY``; accepts the ``page``/``since``/``until`` filters.
+        """
+        query = VisitBreakdownQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        label = BREAKDOWN_LABELS[query.validated_data["by"]]
+        rows = (
+            self.get_queryset()
+            .order_by()
+            .values(label)
+            .annotate(visits=Count("id"))
+            .order_by("-visits")[:BREAKDOWN_LIMIT]
+        )
+        return Response([{"value": row[label], "visits": row["visits"]} for row in rows])
 
 
 class PageDailySummaryViewSet(viewsets.ReadOnlyModelViewSet):
@@ -24,9 +108,184 @@ class PageDailySummaryViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        queryset = PageDailySummary.objects.filter(page__owner=self.request.user)
+        queryset = PageDailySummary.objects.filter(page__owner=self.request.user).defer("visitor_sketch")
         page_id = self.request.query_params.get("page")
         if page_id:
             queryset = queryset.filter(page_id=page_id)
         return queryset.order_by("-date")
 
+    @action(detail=False, methods=["get"])
+    def uniques(self, request):
+        """Distinct visitors over ``start``..``end`` (inclusive) for one page or all of yours.
+
+        Merged from the daily HyperLogLog sketches, so any range costs the
+        same and the result is an estimate (about 1% error).
+        """
+        query = UniqueVisitorsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        pages = Page.objects.filter(owner=request.user)
+        if params.get("page"):
+            pages = pages.filter(pk=params["page"])
+        page_ids = list(pages.values_list("pk", flat=True))
+        count = unique_visitors(page_ids, params["start"], params["end"]) if page_ids else 0
+        return Response({"start": params["start"], "end": params["end"], "unique_visitors": count})
+
+
+class TimeSeriesView(APIView):
+    """Chart-ready buckets of views and uniques for a set of the user's pages.
+
+    Hourly series read raw visits; daily and weekly ones read the daily
+    summaries. Responses are cached per query (see ``apps.analytics.timeseries``).
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = TimeSeriesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        pages = Page.objects.filter(owner=request.user)
+        if params.get("page"):
+            pages = pages.filter(pk__in=params["page"])
+        series = time_series(
+            pages.values_list("pk", flat=True),
+            params["start"],
+            params["end"],
+            params["granularity"],
+            params["metric"],
+        )
+        return Response(
+            {
+                "start": params["start"],
+                "end": params["end"],
+                "granularity": params["granularity"],
+                "buckets": series,
+            }
+        )
+
+
+class ExportView(APIView):
+    """Bulk export of the user's visits or daily summaries over a date range.
+
+    ``GET`` streams CSV straight from a server-side cursor. ``POST`` with
+    ``"format": "parquet"`` starts a background job and returns its id;
+    fetch the file from ``ExportJobView`` once it is done.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        if params["format"] != "csv":
+            return Response({"detail": "Parquet exports are created with POST."}, status=status.HTTP_400_BAD_REQUEST)
+        rows = export_rows(params["dataset"], params["start"], params["end"], owner=request.user)
+        response = StreamingHttpResponse(iter_csv(params["dataset"], rows), content_type="text/csv")
+        filename = f"{params['dataset']}-{params['start']}-{params['end']}.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def post(self, request):
+        query = ExportQuerySerializer(data=request.data)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        if params["format"] != "parquet":
+            return Response({"detail": "CSV exports are streamed with GET."}, status=status.HTTP_400_BAD_REQUEST)
+        job_id = str(uuid.uuid4())
+        update_export_job(job_id, status="pending", user_id=request.user.pk)
+        dispatch_on_commit(
+            export_parquet,
+            job_id,
+            params["dataset"],
+            params["start"].isoformat(),
+            params["end"].isoformat(),
+            request.user.pk,
+        )
+        return Response({"job_id": job_id}, status=status.HTTP_202_ACCEPTED)
+
+
+class ExportJobView(APIView):
+    """State of a Parquet export; the file itself once it is done."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id: uuid.UUID):
+        state = export_job_state(job_id)
+        if not state or state.get("user_id") != request.user.pk:
+            return Response({"detail": "Export not found."}, status=status.HTTP_404_NOT_FOUND)
+        if state["status"] != "done":
+            return Response({"job_id": str(job_id), "status": state["status"]}, status=status.HTTP_202_ACCEPTED)
+        return FileResponse(
+            export_storage().open(state["file"], "rb"),
+            as_attachment=True,
+            filename=f"{job_id}.parquet",
+            content_type="application/vnd.apache.parquet",
+        )
+
+
+class LiveView(APIView):
+    """Visitors on the user's pages right now and the top pages of the last hour.
+
+    ``GET live/`` returns one snapshot; ``GET live/stream/`` pushes a new one
+    every few seconds as server-sent events. Both read Redis counters kept
+    up to date by ingestion (see ``apps.analytics.live``), never the visits
+    table. The stream is pushed only when the request came through the ASGI
+    application (``bakementor.asgi``, as the Docker image runs it); under
+    WSGI each connection receives one snapshot and the browser reconnects.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    stream = False
+
+    def get(self, request):
+        query = LiveQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        page_ids = query.validated_data.get("page", [])
+        if page_ids:
+            page_ids = Page.objects.filter(owner=request.user, pk__in=page_ids).values_list("pk", flat=True)
+        if not self.stream:
+            return Response(snapshot(request.user.pk, page_ids))
+        if isinstance(request._request, ASGIRequest):
+            events = stream_snapshots(request.user.pk, list(page_ids))
+        else:
+            events = snapshot_events(request.user.pk, list(page_ids))
+        response = StreamingHttpResponse(events, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Keep nginx from buffering the events.
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+@csrf_exempt
+@require_POST
+def visit_beacon(request):
+    """Record a page view from ``navigator.sendBeacon`` or ``fetch``.
+
+    Body: ``{"page": "<uuid>", "session_id": "...", "referrer": "..."}`` as
+    JSON (any content type, since beacons send ``text/plain``). The event is
+    buffered in Redis and the response is an empty 204; nothing is written to
+    the database on this path.
+    """
+    if len(request.body) > MAX_BEACON_BYTES:
+        return JsonResponse({"detail": "Payload too large."}, status=413)
+    try:
+        payload = json.loads(request.body or b"{}")
+        page_id = uuid.UUID(str(payload["page"]))
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"detail": "A page id is required."}, status=400)
+    try:
+        record_visit(
+            page_id,
+            session_id=str(payload.get("session_id") or ""),
+            ip_address=request.META.get("REMOTE_ADDR"),
+            user_agent=request.headers.get("User-Agent", ""),
+            referer=str(payload.get("referrer") or request.headers.get("Referer", "")),
+        )
+    except redis.RedisError:
+        # Analytics must never break page views.
+        logger.warning("Dropped visit to page %s: buffer unavailable", page_id, exc_info=True)
+    response = HttpResponse(status=204)
+    response["Cache-Control"] = "no-store"
+    return response
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BuilderTemplatesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.builder_templates"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
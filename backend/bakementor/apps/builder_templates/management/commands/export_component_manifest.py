@@ -0,0 +1,44 @@
+"""Write the component manifest to disk as a frontend build artifact."""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from apps.builder_templates.manifest import build_manifest
+
+
+class Command(BaseCommand):
+    help = "Export active component definitions as a versioned JSON manifest."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Path of the JSON file to write.")
+        parser.add_argument("--indent", type=int, default=2, help="JSON indentation (default: 2).")
+
+    def handle(self, *args, **options):
+        output = Path(options["output"])
+        manifest = build_manifest()
+        payload = json.dumps(manifest, indent=options["indent"], ensure_ascii=False) + "\n"
+
+        if output.exists() and output.read_text(encoding="utf-8") == payload:
+            self.stdout.write(f"Manifest {manifest['version']} already up to date at {output}")
+            return
+
+        output.parent.mkdir(parents=True, exist_ok=True)
+        # Write atomically so a concurrent frontend build never reads a partial file.
+        fd, tmp_path = tempfile.mkstemp(dir=output.parent, prefix=f".{output.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(payload)
+            os.replace(tmp_path, output)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote manifest {manifest['version']} ({len(manifest['components'])} components) to {output}"
+            )
+        )
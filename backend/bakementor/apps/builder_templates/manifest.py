@@ -0,0 +1,79 @@
+"""Component manifest document shared by the API and the frontend build."""
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Any
+
+from django.core.cache import cache
+
+from apps.common.hashing import canonical_json, content_hash
+from apps.common.schema_compiler import SchemaError, Validator, compile_schema
+
+from .models import ComponentDefinition
+
+MANIFEST_CACHE_KEY = "builder_templates:component_manifest"
+MANIFEST_CACHE_TTL_SECONDS = 60 * 60 * 24
+
+# (manifest version, {component key: compiled props validator}) for this process.
+_props_validators: tuple[str, dict[str, Validator]] | None = None
+
+
+def _entry(definition: ComponentDefinition) -> dict[str, Any]:
+    return {
+        "key": definition.key,
+        "name": definition.name,
+        "category": definition.category,
+        "description": definition.description,
+        "schema": definition.schema,
+        "props_schema": definition.props_schema,
+        "preview_image": definition.preview_image.url if definition.preview_image else None,
+    }
+
+
+def build_manifest() -> dict[str, Any]:
+    """Build the manifest from the database, bypassing the cache."""
+    components = [_entry(definition) for definition in ComponentDefinition.objects.filter(is_active=True).order_by("key")]
+    return {"version": content_hash(components)[:16], "components": components}
+
+
+def get_manifest() -> dict[str, Any]:
+    """Return the cached manifest, rebuilding it after registry changes."""
+    manifest = cache.get(MANIFEST_CACHE_KEY)
+    if manifest is None:
+        manifest = build_manifest()
+        cache.set(MANIFEST_CACHE_KEY, manifest, timeout=MANIFEST_CACHE_TTL_SECONDS)
+    return manifest
+
+
+def invalidate_manifest() -> None:
+    global _props_validators
+    cache.delete(MANIFEST_CACHE_KEY)
+    _props_validators = None
+
+
+@lru_cache(maxsize=512)
+def _compile_props_schema(schema_json: str) -> Validator:
+    try:
+        return compile_schema(json.loads(schema_json))
+    except SchemaError as exc:
+        # Rows saved before ``props_schema`` was validated; report, don't crash.
+        message = f"component props_schema is invalid ({exc})"
+        return lambda value, path, errors: errors.append(f"{path}: {message}")
+
+
+def get_props_validators() -> dict[str, Validator]:
+    """Return compiled ``props_schema`` validators keyed by component key.
+
+    Validators are rebuilt only when the manifest version changes, and each
+    distinct schema is compiled once per process.
+    """
+    global _props_validators
+    manifest = get_manifest()
+    if _props_validators is None or _props_validators[0] != manifest["version"]:
+        validators = {
+            component["key"]: _compile_props_schema(canonical_json(component["props_schema"]))
+            for component in manifest["components"]
+        }
+        _props_validators = (manifest["version"], validators)
+    return _props_validators[1]
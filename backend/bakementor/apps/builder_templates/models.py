@@ -40,6 +40,7 @@ class PageTemplate(UUIDModel, TimeStampedModel):
     description = models.TextField(blank=True)
     component_tree = models.JSONField(default=dict)
     thumbnail = models.ImageField(upload_to="template_thumbnails/", blank=True, null=True)
+    preview_images = models.JSONField(default=dict, blank=True, editable=False)
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -64,6 +65,14 @@ class PageTemplate(UUIDModel, TimeStampedModel):
             self.slug = slug
         super().save(*args, **kwargs)
 
+    def release_instances(self, tree: dict) -> int:
+        """Materialize ``tree`` into every page version still sharing this template.
+
+        Called before the template's tree changes or the template is removed so
+        that instantiated pages keep the tree they were created from.
+        """
+        return self.instantiated_versions.update(component_tree=tree, source_template=None)
+
     def __str__(self) -> str:
         return self.name
 
@@ -1,8 +1,13 @@
 """Serializers for component registry and templates."""
 from __future__ import annotations
 
+from django.db import transaction
 from rest_framework import serializers
 
+from apps.common.schema_compiler import SchemaError, compile_schema
+from apps.pages.models import Page, PageVersion
+from apps.pages.serializers import PreviewUrlsMixin
+
 from .models import ComponentDefinition, PageTemplate
 
 
@@ -24,8 +29,15 @@ class ComponentDefinitionSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ("id", "created_at", "updated_at")
 
+    def validate_props_schema(self, value):
+        try:
+            compile_schema(value)
+        except SchemaError as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+
 
-class PageTemplateSerializer(serializers.ModelSerializer):
+class PageTemplateSerializer(PreviewUrlsMixin, serializers.ModelSerializer):
     created_by_email = serializers.EmailField(source="created_by.email", read_only=True)
 
     class Meta:
@@ -37,6 +49,7 @@ class PageTemplateSerializer(serializers.ModelSerializer):
             "description",
             "component_tree",
             "thumbnail",
+            "preview_urls",
             "created_by",
             "created_by_email",
             "is_public",
@@ -53,3 +66,33 @@ class PageTemplateSerializer(serializers.ModelSerializer):
             "updated_at",
         )
 
+
+
+class PageTemplateInstantiateSerializer(serializers.Serializer):
+    """Create a page whose first version shares the template's tree until edited."""
+
+    title = serializers.CharField(max_length=200, required=False, allow_blank=True)
+    description = serializers.CharField(required=False, allow_blank=True)
+    tags = serializers.JSONField(required=False)
+
+    def create(self, validated_data):
+        template: PageTemplate = self.context["template"]
+        request = self.context["request"]
+        title = validated_data.get("title") or template.name
+        with transaction.atomic():
+            page = Page.objects.create(
+                owner=request.user,
+                title=title,
+                description=validated_data.get("description", template.description),
+                tags=validated_data.get("tags", template.tags),
+            )
+            version = PageVersion.objects.create(
+                page=page,
+                version=1,
+                created_by=request.user,
+                title=title,
+                source_template=template,
+            )
+            page.current_version = version
+            page.save(update_fields=["current_version"])
+        return page
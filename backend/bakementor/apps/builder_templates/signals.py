@@ -0,0 +1,46 @@
+"""Signal handlers for templates and the component registry."""
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.common.hashing import content_hash
+from apps.common.tasks import dispatch_on_commit
+
+from .manifest import invalidate_manifest
+from .models import ComponentDefinition, PageTemplate
+from .tasks import render_template_preview
+
+
+@receiver(pre_save, sender=PageTemplate)
+def materialize_before_tree_change(
+    sender, instance: PageTemplate, raw: bool = False, update_fields=None, **kwargs
+) -> None:
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and "component_tree" not in update_fields:
+        return
+    previous_tree = (
+        PageTemplate.objects.filter(pk=instance.pk).values_list("component_tree", flat=True).first()
+    )
+    if previous_tree is not None and previous_tree != instance.component_tree:
+        instance.release_instances(previous_tree)
+
+
+@receiver(pre_delete, sender=PageTemplate)
+def materialize_before_delete(sender, instance: PageTemplate, **kwargs) -> None:
+    instance.release_instances(instance.component_tree)
+
+
+@receiver(post_save, sender=PageTemplate)
+def schedule_preview_render(sender, instance: PageTemplate, raw: bool = False, **kwargs) -> None:
+    if raw or (instance.preview_images or {}).get("hash") == content_hash(instance.component_tree):
+        return
+    dispatch_on_commit(render_template_preview, str(instance.pk))
+
+
+@receiver(post_save, sender=ComponentDefinition)
+@receiver(post_delete, sender=ComponentDefinition)
+def invalidate_component_manifest(sender, **kwargs) -> None:
+    transaction.on_commit(invalidate_manifest)
@@ -8,7 +8,14 @@ from typing import Any
 from celery import shared_task
 from django.core.cache import cache
 
+from apps.common.hashing import content_hash
+from apps.pages.previews import generate_previews
+
+from .models import PageTemplate
+
 AI_IMPORT_CACHE_PREFIX = "ai_import:"
+# Templates rendered per run of ``render_stale_template_previews``.
+PREVIEW_SWEEP_BATCH = 20
 
 
 def _cache_key(job_id: str) -> str:
@@ -94,3 +101,36 @@ def run_figma_import(job_id: str, figma_url: str, user_id: int) -> None:
         final_state.update({"progress": 100, "step": "failed", "error": str(exc)})
         cache.set(_cache_key(job_id), final_state, timeout=60 * 60)
 
+
+
+@shared_task(name="builder_templates.render_template_preview")
+def render_template_preview(template_id: str) -> None:
+    """Render raster previews for a template's tree."""
+    template = PageTemplate.objects.filter(id=template_id).first()
+    if template is None:
+        return
+    _store_previews(template)
+
+
+@shared_task(name="builder_templates.render_stale_template_previews")
+def render_stale_template_previews() -> int:
+    """Render previews for templates whose previews are missing or older than their tree.
+
+    Catches renders that were never queued (for example during a broker outage).
+    """
+    templates = PageTemplate.objects.only("id", "component_tree", "preview_images").order_by("pk")
+    rendered = 0
+    for template in templates.iterator(chunk_size=200):
+        if (template.preview_images or {}).get("hash") == content_hash(template.component_tree):
+            continue
+        _store_previews(template)
+        rendered += 1
+        if rendered == PREVIEW_SWEEP_BATCH:
+            break
+    return rendered
+
+
+def _store_previews(template: PageTemplate) -> None:
+    previews = generate_previews(template.component_tree)
+    if previews != template.preview_images:
+        PageTemplate.objects.filter(id=template.id).update(preview_images=previews)
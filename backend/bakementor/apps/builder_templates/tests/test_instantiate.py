@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from apps.builder_templates.models import PageTemplate
+from apps.pages.models import Page, PageVersion
+
+User = get_user_model()
+
+TREE = {
+    "version": "2025-10-01",
+    "root": "root",
+    "nodes": {"root": {"id": "root", "type": "layout", "component": "layout.section", "props": {}, "children": []}},
+}
+
+
+class TemplateInstantiateTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="user@example.com", password="pass")
+        self.other = User.objects.create_user(email="other@example.com", password="pass")
+        self.template = PageTemplate.objects.create(
+            name="Landing", component_tree=TREE, created_by=self.other, is_public=True, tags=["saas"]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _instantiate(self, template, **data):
+        url = reverse("page-template-instantiate", args=[template.pk])
+        return self.client.post(url, data, format="json")
+
+    def test_instantiate_references_template_tree(self):
+        res = self._instantiate(self.template, title="Spring launch")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.data["title"], "Spring launch")
+        self.assertEqual(res.data["tags"], ["saas"])
+        self.assertEqual(res.data["current_version"]["component_tree"], TREE)
+
+        version = PageVersion.objects.get(page_id=res.data["id"])
+        self.assertEqual(version.source_template_id, self.template.pk)
+        self.assertEqual(version.component_tree, {})
+
+    def test_private_template_of_other_user_is_hidden(self):
+        private = PageTemplate.objects.create(name="Private", component_tree=TREE, created_by=self.other)
+        res = self._instantiate(private)
+        self.assertEqual(res.status_code, 404)
+        self.assertFalse(Page.objects.exists())
+
+    def test_template_edit_materializes_instances(self):
+        res = self._instantiate(self.template)
+        self.template.component_tree = {"version": "2", "root": "x", "nodes": {}}
+        self.template.save()
+
+        version = PageVersion.objects.get(page_id=res.data["id"])
+        self.assertIsNone(version.source_template_id)
+        self.assertEqual(version.tree, TREE)
+
+    def test_template_delete_materializes_instances(self):
+        res = self._instantiate(self.template)
+        self.template.delete()
+
+        version = PageVersion.objects.get(page_id=res.data["id"])
+        self.assertIsNone(version.source_template_id)
+        self.assertEqual(version.tree, TREE)
@@ -0,0 +1,79 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from apps.builder_templates.models import ComponentCategory, ComponentDefinition
+
+
+class ComponentManifestTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse("component-definition-manifest")
+        ComponentDefinition.objects.create(key="content.richText", name="Rich text", category=ComponentCategory.CONTENT)
+        ComponentDefinition.objects.create(
+            key="legacy.banner", name="Banner", category=ComponentCategory.HERO, is_active=False
+        )
+
+    def test_manifest_is_public_and_lists_active_components(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([c["key"] for c in res.data["components"]], ["content.richText"])
+        self.assertEqual(res["ETag"], f'"{res.data["version"]}"')
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+    def test_registry_change_bumps_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            before = self.client.get(self.url).data["version"]
+            ComponentDefinition.objects.create(key="content.button", name="Button", category=ComponentCategory.CTA)
+        after = self.client.get(self.url).data
+        self.assertNotEqual(before, after["version"])
+        self.assertEqual(len(after["components"]), 2)
+
+    def test_export_command_writes_same_document(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "manifest.json"
+            call_command("export_component_manifest", str(output), stdout=io.StringIO())
+            self.assertEqual(json.loads(output.read_text()), self.client.get(self.url).data)
+
+
+class ComponentPropsSchemaTests(APITestCase):
+    def setUp(self):
+        admin = get_user_model().objects.create_user(email="admin@example.com", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def _create(self, props_schema):
+        data = {"key": "content.text", "name": "Text", "category": ComponentCategory.CONTENT, "schema": {}}
+        return self.client.post(
+            reverse("component-definition-list"), {**data, "props_schema": props_schema}, format="json"
+        )
+
+    def test_malformed_props_schema_is_rejected(self):
+        for props_schema in (
+            {"type": "string", "pattern": "("},
+            {"type": "string", "minLength": "3"},
+            {"type": "number", "maximum": "10"},
+            {"type": "object", "properties": [{"type": "string"}]},
+            {"type": "object", "required": "title"},
+            {"type": "object", "properties": {"title": {"pattern": "["}}},
+        ):
+            with self.subTest(props_schema=props_schema):
+                res = self._create(props_schema)
+                self.assertEqual(res.status_code, 400)
+                self.assertIn("props_schema", res.data)
+
+    def test_valid_props_schema_is_accepted(self):
+        res = self._create({"type": "object", "properties": {"title": {"type": "string", "pattern": "^\\w+$"}}})
+        self.assertEqual(res.status_code, 201)
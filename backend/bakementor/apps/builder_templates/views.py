@@ -6,11 +6,19 @@ import uuid
 from django.core.cache import cache
 from django.db import models
 from rest_framework import permissions, status, views, viewsets
-from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 
+from apps.pages.serializers import PageSerializer
+
+from .manifest import get_manifest
 from .models import ComponentDefinition, PageTemplate
-from .serializers import ComponentDefinitionSerializer, PageTemplateSerializer
+from .serializers import (
+    ComponentDefinitionSerializer,
+    PageTemplateInstantiateSerializer,
+    PageTemplateSerializer,
+)
 
 
 class ComponentDefinitionViewSet(viewsets.ModelViewSet):
@@ -18,6 +26,30 @@ class ComponentDefinitionViewSet(viewsets.ModelViewSet):
     serializer_class = ComponentDefinitionSerializer
     permission_classes = [permissions.IsAdminUser]
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="manifest",
+        permission_classes=[permissions.AllowAny],
+        authentication_classes=[],
+        pagination_class=None,
+    )
+    def manifest(self, request):
+        """Return every active component as one versioned document.
+
+        Clients revalidate with ``If-None-Match`` and receive ``304`` until the
+        registry changes.
+        """
+        manifest = get_manifest()
+        version = manifest["version"]
+        etag = f'"{version}"'
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=0, must-revalidate"}
+        if_none_match = request.headers.get("If-None-Match", "")
+        client_tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in client_tags or "*" in client_tags:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(manifest, headers=headers)
+
 
 class PageTemplateViewSet(viewsets.ModelViewSet):
     serializer_class = PageTemplateSerializer
@@ -28,13 +60,32 @@ class PageTemplateViewSet(viewsets.ModelViewSet):
         user = self.request.user
         queryset = PageTemplate.objects.filter(created_by=user)
         include_public = self.request.query_params.get("include_public")
-        if include_public in {"1", "true", "True"}:
+        if include_public in {"1", "true", "True"} or self.action == "instantiate":
             queryset = PageTemplate.objects.filter(models.Q(created_by=user) | models.Q(is_public=True))
         return queryset.order_by("name")
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="instantiate",
+        parser_classes=[JSONParser, FormParser, MultiPartParser],
+        serializer_class=PageTemplateInstantiateSerializer,
+    )
+    def instantiate(self, request, pk=None):
+        """Create a page from this template without copying its tree."""
+        template = self.get_object()
+        serializer = PageTemplateInstantiateSerializer(
+            data=request.data,
+            context={"request": request, "template": template},
+        )
+        serializer.is_valid(raise_exception=True)
+        page = serializer.save()
+        output = PageSerializer(page, context=self.get_serializer_context())
+        return Response(output.data, status=status.HTTP_201_CREATED)
+
 
 AI_IMPORT_CACHE_PREFIX = "ai_import:"
 AI_IMPORT_TTL_SECONDS = 60 * 60
@@ -0,0 +1,198 @@
+"""Pagination that stays constant-time on very large tables."""
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Below this many estimated rows an exact COUNT(*) is cheap and preferred.
+EXACT_COUNT_THRESHOLD = 10_000
+COUNT_CACHE_TIMEOUT = 60
+
+
+def _planner_estimate(queryset) -> int | None:
+    """Row estimate from PostgreSQL's planner for ``queryset``, or ``None`` elsewhere."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def approximate_count(queryset, threshold: int = EXACT_COUNT_THRESHOLD) -> tuple[int, bool]:
+    """Return ``(count, is_exact)`` for ``queryset``.
+
+    Large results use the planner's estimate instead of scanning every
+    matching row; small ones are counted exactly. Results are cached briefly
+    per query.
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = "approx-count:" + hashlib.sha256(f"{queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+    cached = cache.get(key)
+    if cached is not None:
+        return tuple(cached)
+    estimate = _planner_estimate(queryset)
+    if estimate is not None and estimate >= threshold:
+        result = (estimate, False)
+    else:
+        result = (queryset.count(), True)
+    cache.set(key, result, COUNT_CACHE_TIMEOUT)
+    return result
+
+
+class ApproximateCountCursorPagination(CursorPagination):
+    """Cursor pagination (no OFFSET) that also reports an approximate total.
+
+    Responses carry ``count`` and ``count_is_exact`` alongside the usual
+    ``next``/``previous``/``results``; pages cost the same however deep the
+    client scrolls.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count, self.count_is_exact = approximate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "count": self.count,
+                "count_is_exact": self.count_is_exact,
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response = super().get_paginated_response_schema(schema)
+        response["properties"]["count"] = {"type": "integer", "example": 123}
+        response["properties"]["count_is_exact"] = {"type": "boolean"}
+        return response
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only pagination on a unique, composite sort key.
+
+    ``ordering`` lists the key's fields, all in the same direction, the last
+    one unique (e.g. ``("-visited_at", "-id")``). The cursor holds the last
+    row's key and the next page is ``WHERE key < cursor ORDER BY key LIMIT n``:
+    one index range scan from the cursor, with no ``COUNT(*)`` and no
+    ``OFFSET``, so page 10,000 costs what page 1 does. Responses carry
+    ``next`` and ``results``.
+    """
+
+    ordering: tuple[str, ...] = ()
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def _fields(self):
+        descending = {name.startswith("-") for name in self.ordering}
+        assert len(descending) == 1, "KeysetPagination ordering fields must share one direction."
+        return [name.lstrip("-") for name in self.ordering], descending.pop()
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def _decode(self, request, queryset, names):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if not isinstance(raw, list) or len(raw) != len(names):
+                raise ValueError
+            return [queryset.model._meta.get_field(name).to_python(value) for name, value in zip(names, raw)]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _encode(self, values) -> str:
+        raw = json.dumps([value.isoformat() if hasattr(value, "isoformat") else str(value) for value in values])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _beyond(names, values, descending) -> Q:
+        # (a, b, ...) past (x, y, ...) as "a <= x AND (a < x OR (b, ...) past (y, ...))";
+        # the leading non-strict bound lets the index range scan start at the cursor.
+        strict, loose = ("lt", "lte") if descending else ("gt", "gte")
+        name, value = names[0], values[0]
+        if len(names) == 1:
+            return Q(**{f"{name}__{strict}": value})
+        return Q(**{f"{name}__{loose}": value}) & (
+            Q(**{f"{name}__{strict}": value}) | KeysetPagination._beyond(names[1:], values[1:], descending)
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        names, descending = self._fields()
+        self.request = request
+        size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        cursor = self._decode(request, queryset, names)
+        if cursor is not None:
+            queryset = queryset.filter(self._beyond(names, cursor, descending))
+        rows = list(queryset[: size + 1])
+        self.has_next = len(rows) > size
+        rows = rows[:size]
+        self.last_key = [getattr(rows[-1], name) for name in names] if rows else None
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self._encode(self.last_key))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Number of results to return per page (at most {self.max_page_size}).",
+                "schema": {"type": "integer"},
+            },
+        ]
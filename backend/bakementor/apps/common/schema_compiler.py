@@ -0,0 +1,274 @@
+"""Compile JSON Schema documents into fast Python validator closures.
+
+Only the subset of keywords used by component ``props_schema`` documents is
+supported: ``type``, ``enum``, ``const``, string/number/array bounds,
+``pattern``, ``properties``, ``required``, ``additionalProperties``,
+``items`` and the ``allOf``/``anyOf``/``oneOf`` combinators. Unknown keywords
+are ignored, so richer schemas degrade to a looser check instead of failing;
+a supported keyword with a malformed value raises ``SchemaError``.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Callable
+
+Validator = Callable[[Any, str, list], None]
+
+
+class SchemaError(ValueError):
+    """A supported keyword has a value the compiler cannot use."""
+
+
+_TYPE_CHECKS: dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "null": lambda value: value is None,
+}
+
+
+def _noop(value: Any, path: str, errors: list) -> None:
+    return None
+
+
+def _type_predicate(types: tuple[str, ...]) -> Callable[[Any], bool] | None:
+    predicates = [_TYPE_CHECKS[name] for name in types if name in _TYPE_CHECKS]
+    if not predicates:
+        return None
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda value: any(predicate(value) for predicate in predicates)
+
+
+def _count(schema: dict, keyword: str) -> int | None:
+    value = schema.get(keyword)
+    if value is not None and (type(value) is not int or value < 0):
+        raise SchemaError(f"{keyword}: expected a non-negative integer")
+    return value
+
+
+def _bound(schema: dict, keyword: str) -> int | float | None:
+    value = schema.get(keyword)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise SchemaError(f"{keyword}: expected a number")
+    return value
+
+
+def _schema_list(schema: dict, keyword: str) -> list:
+    value = schema.get(keyword)
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise SchemaError(f"{keyword}: expected a list of schemas")
+    return value
+
+
+def compile_schema(schema: Any) -> Validator:
+    """Return a validator that appends ``"<path>: <message>"`` strings to ``errors``.
+
+    Raises ``SchemaError`` when ``schema`` is not a schema document.
+    """
+    if schema is False:
+        return lambda value, path, errors: errors.append(f"{path}: no value is allowed")
+    if schema is True:
+        return _noop
+    if not isinstance(schema, dict):
+        raise SchemaError("expected an object or a boolean")
+    if not schema:
+        return _noop
+
+    checks: list[Validator] = []
+
+    raw_type = schema.get("type")
+    types: tuple[str, ...] = ()
+    if isinstance(raw_type, str):
+        types = (raw_type,)
+    elif isinstance(raw_type, list) and all(isinstance(t, str) for t in raw_type):
+        types = tuple(raw_type)
+    elif raw_type is not None:
+        raise SchemaError("type: expected a type name or a list of them")
+    is_type = _type_predicate(types)
+    if is_type is not None:
+        expected = " or ".join(types)
+
+        def check_type(value: Any, path: str, errors: list) -> None:
+            if not is_type(value):
+                errors.append(f"{path}: expected {expected}")
+
+        checks.append(check_type)
+
+    if "const" in schema:
+        const = schema["const"]
+
+        def check_const(value: Any, path: str, errors: list) -> None:
+            if value != const:
+                errors.append(f"{path}: must equal {const!r}")
+
+        checks.append(check_const)
+
+    if "enum" in schema:
+        options = schema["enum"]
+        if not isinstance(options, list):
+            raise SchemaError("enum: expected a list")
+
+        def check_enum(value: Any, path: str, errors: list) -> None:
+            if value not in options:
+                errors.append(f"{path}: must be one of {options!r}")
+
+        checks.append(check_enum)
+
+    checks.extend(_compile_string(schema))
+    checks.extend(_compile_number(schema))
+    checks.extend(_compile_object(schema))
+    checks.extend(_compile_array(schema))
+    checks.extend(_compile_combinators(schema))
+
+    if not checks:
+        return _noop
+    if len(checks) == 1:
+        return checks[0]
+
+    def validate(value: Any, path: str, errors: list) -> None:
+        for check in checks:
+            check(value, path, errors)
+
+    return validate
+
+
+def _compile_string(schema: dict) -> list[Validator]:
+    min_length = _count(schema, "minLength")
+    max_length = _count(schema, "maxLength")
+    pattern = None
+    if "pattern" in schema:
+        if not isinstance(schema["pattern"], str):
+            raise SchemaError("pattern: expected a string")
+        try:
+            pattern = re.compile(schema["pattern"])
+        except re.error as exc:
+            raise SchemaError(f"pattern: {exc}") from None
+    if min_length is None and max_length is None and pattern is None:
+        return []
+
+    def check_string(value: Any, path: str, errors: list) -> None:
+        if not isinstance(value, str):
+            return
+        if min_length is not None and len(value) < min_length:
+            errors.append(f"{path}: shorter than {min_length} characters")
+        if max_length is not None and len(value) > max_length:
+            errors.append(f"{path}: longer than {max_length} characters")
+        if pattern is not None and not pattern.search(value):
+            errors.append(f"{path}: does not match {pattern.pattern!r}")
+
+    return [check_string]
+
+
+def _compile_number(schema: dict) -> list[Validator]:
+    bounds = [
+        (_bound(schema, "minimum"), lambda value, bound: value >= bound, "less than"),
+        (_bound(schema, "maximum"), lambda value, bound: value <= bound, "greater than"),
+        (_bound(schema, "exclusiveMinimum"), lambda value, bound: value > bound, "less than or equal to"),
+        (_bound(schema, "exclusiveMaximum"), lambda value, bound: value < bound, "greater than or equal to"),
+    ]
+    bounds = [entry for entry in bounds if entry[0] is not None]
+    if not bounds:
+        return []
+
+    def check_number(value: Any, path: str, errors: list) -> None:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return
+        for bound, passes, label in bounds:
+            if not passes(value, bound):
+                errors.append(f"{path}: {label} {bound}")
+
+    return [check_number]
+
+
+def _compile_object(schema: dict) -> list[Validator]:
+    raw_properties = schema.get("properties") or {}
+    if not isinstance(raw_properties, dict):
+        raise SchemaError("properties: expected an object")
+    properties = {}
+    for name, subschema in raw_properties.items():
+        try:
+            properties[name] = compile_schema(subschema)
+        except SchemaError as exc:
+            raise SchemaError(f"properties.{name}: {exc}") from None
+    raw_required = schema.get("required") or []
+    if not isinstance(raw_required, list) or not all(isinstance(name, str) for name in raw_required):
+        raise SchemaError("required: expected a list of property names")
+    required = tuple(raw_required)
+    additional = schema.get("additionalProperties", True)
+    additional_check = None if additional in (True, None) else compile_schema(additional)
+    if not properties and not required and additional_check is None:
+        return []
+
+    def check_object(value: Any, path: str, errors: list) -> None:
+        if not isinstance(value, dict):
+            return
+        for name in required:
+            if name not in value:
+                errors.append(f"{path}.{name}: is required")
+        for name, item in value.items():
+            check = properties.get(name)
+            if check is not None:
+                if check is not _noop:
+                    check(item, f"{path}.{name}", errors)
+            elif additional_check is not None:
+                if additional is False:
+                    errors.append(f"{path}.{name}: unexpected property")
+                else:
+                    additional_check(item, f"{path}.{name}", errors)
+
+    return [check_object]
+
+
+def _compile_array(schema: dict) -> list[Validator]:
+    items = compile_schema(schema["items"]) if schema.get("items") is not None else _noop
+    min_items = _count(schema, "minItems")
+    max_items = _count(schema, "maxItems")
+    if items is _noop and min_items is None and max_items is None:
+        return []
+
+    def check_array(value: Any, path: str, errors: list) -> None:
+        if not isinstance(value, list):
+            return
+        if min_items is not None and len(value) < min_items:
+            errors.append(f"{path}: fewer than {min_items} items")
+        if max_items is not None and len(value) > max_items:
+            errors.append(f"{path}: more than {max_items} items")
+        if items is not _noop:
+            for index, item in enumerate(value):
+                items(item, f"{path}[{index}]", errors)
+
+    return [check_array]
+
+
+def _compile_combinators(schema: dict) -> list[Validator]:
+    checks: list[Validator] = []
+    for subschema in _schema_list(schema, "allOf"):
+        checks.append(compile_schema(subschema))
+
+    for keyword, exactly_one in (("anyOf", False), ("oneOf", True)):
+        branches = [compile_schema(subschema) for subschema in _schema_list(schema, keyword)]
+        if not branches:
+            continue
+
+        def check_branches(
+            value: Any, path: str, errors: list, branches=branches, keyword=keyword, exactly_one=exactly_one
+        ) -> None:
+            matches = 0
+            for branch in branches:
+                branch_errors: list = []
+                branch(value, path, branch_errors)
+                if not branch_errors:
+                    matches += 1
+                    if not exactly_one:
+                        return
+            if matches == 0 or (exactly_one and matches != 1):
+                errors.append(f"{path}: does not match {keyword}")
+
+        checks.append(check_branches)
+    return checks
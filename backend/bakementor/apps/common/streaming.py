@@ -0,0 +1,38 @@
+"""Streaming response helpers."""
+from __future__ import annotations
+
+import csv
+from itertools import islice
+from typing import Iterable, Iterator, Sequence
+
+CSV_ROWS_PER_CHUNK = 1000
+# Spreadsheets evaluate text cells starting with these as formulas.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to ``csv.writer``."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _safe_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(header: Sequence[str], rows: Iterable[Sequence], rows_per_chunk: int = CSV_ROWS_PER_CHUNK) -> Iterator[str]:
+    """CSV text for ``rows`` after a ``header`` line, yielded in chunks of lines.
+
+    Pair with ``StreamingHttpResponse`` and a lazily evaluated ``rows`` (such
+    as ``QuerySet.iterator()``) to keep memory flat however many rows there are.
+    Text cells that a spreadsheet would read as a formula are prefixed with
+    ``'``; numbers and other values are written as they are.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    rows = iter(rows)
+    while chunk := list(islice(rows, rows_per_chunk)):
+        yield "".join(writer.writerow([_safe_cell(value) for value in row]) for row in chunk)
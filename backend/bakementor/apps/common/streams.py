@@ -0,0 +1,96 @@
+"""Redis streams used as write buffers in front of ``bulk_create``.
+
+Producers append one entry per event (a single ``XADD``) and return.
+A ``StreamConsumer`` drains the stream through a consumer group: it hands
+each batch to ``persist``, queues any follow-up commands on the pipeline
+that acknowledges the batch, and only then acknowledges and deletes the
+entries it read.
+
+Delivery is at-least-once: entries a crashed worker read but never
+acknowledged stay pending and are claimed by the next drain after
+``claim_idle_ms``. ``persist`` must therefore be idempotent, typically by
+deriving primary keys from the stream entry ids.
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+from typing import Callable, Sequence
+
+import redis
+
+Entries = list[tuple[str, dict | None]]
+
+
+@lru_cache(maxsize=None)
+def redis_client(url: str) -> redis.Redis:
+    """A shared client for ``url`` decoding responses to ``str``."""
+    return redis.Redis.from_url(url, decode_responses=True)
+
+
+def entry_time(entry_id: str) -> datetime:
+    """When Redis appended the entry; ids are ``<milliseconds>-<sequence>``."""
+    return datetime.fromtimestamp(int(entry_id.split("-", 1)[0]) / 1000, tz=dt_timezone.utc)
+
+
+class StreamConsumer:
+    """Moves the entries of stream ``key`` into the database in batches."""
+
+    def __init__(
+        self,
+        key: str,
+        group: str,
+        persist: Callable[[Entries], Sequence],
+        *,
+        before_ack: Callable[[redis.client.Pipeline, Sequence], None] | None = None,
+        claim_idle_ms: int = 60_000,
+    ):
+        self.key = key
+        self.group = group
+        self.persist = persist
+        self.before_ack = before_ack
+        self.claim_idle_ms = claim_idle_ms
+
+    def ensure_group(self, client: redis.Redis) -> None:
+        try:
+            client.xgroup_create(self.key, self.group, id="0", mkstream=True)
+        except redis.ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def store_and_ack(self, client: redis.Redis, entries: Entries) -> int:
+        stored = self.persist(entries)
+        ids = [entry_id for entry_id, _ in entries]
+        pipe = client.pipeline(transaction=False)
+        if self.before_ack is not None:
+            self.before_ack(pipe, stored)
+        pipe.xack(self.key, self.group, *ids)
+        pipe.xdel(self.key, *ids)
+        pipe.execute()
+        return len(stored)
+
+    def drain(self, client: redis.Redis, consumer: str, batch_size: int, time_budget: float) -> int:
+        """Store batches until the stream is empty or ``time_budget`` seconds pass.
+
+        Several workers may drain at once; the consumer group hands each entry
+        to one of them. Returns the number of rows ``persist`` kept.
+        """
+        self.ensure_group(client)
+        deadline = time.monotonic() + time_budget
+        stored = 0
+
+        # Entries read by a consumer that died before acknowledging them.
+        claimed = client.xautoclaim(self.key, self.group, consumer, min_idle_time=self.claim_idle_ms, count=batch_size)
+        if claimed[1]:
+            stored += self.store_and_ack(client, claimed[1])
+
+        while time.monotonic() < deadline:
+            response = client.xreadgroup(self.group, consumer, {self.key: ">"}, count=batch_size)
+            if not response:
+                break
+            entries = response[0][1]
+            stored += self.store_and_ack(client, entries)
+            if len(entries) < batch_size:
+                break
+        return stored
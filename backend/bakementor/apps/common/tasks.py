@@ -1 +1,26 @@
-﻿"""Placeholder."""
+"""Helpers for queueing Celery work from request and signal code."""
+from __future__ import annotations
+
+import logging
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def dispatch_on_commit(task, *args, **kwargs) -> None:
+    """Call ``task.apply_async(args, kwargs)`` once the current transaction commits.
+
+    ``task`` may be a task, signature or group. Broker failures are logged
+    rather than raised: the row that triggered the work is already saved, so
+    callers need a periodic sweep or lazy path that picks the work up later
+    (see ``CELERY_BEAT_SCHEDULE`` and ``analytics.export.export_job_state``).
+    """
+
+    def _dispatch() -> None:
+        try:
+            task.apply_async(args, kwargs)
+        except Exception:  # queueing must never fail the request
+            logger.exception("Failed to queue %s", getattr(task, "name", None) or task)
+
+    transaction.on_commit(_dispatch)
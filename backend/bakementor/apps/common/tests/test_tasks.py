@@ -0,0 +1,24 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.common.tasks import dispatch_on_commit
+
+
+class DispatchOnCommitTests(TestCase):
+    def test_task_is_queued_only_after_commit(self):
+        task = mock.Mock()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            dispatch_on_commit(task, "a", size=2)
+            task.apply_async.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+        task.apply_async.assert_called_once_with(("a",), {"size": 2})
+
+    def test_broker_errors_are_logged_not_raised(self):
+        task = mock.Mock()
+        task.name = "library.generate_derivatives"
+        task.apply_async.side_effect = ConnectionError("broker down")
+        with self.assertLogs("apps.common.tasks", "ERROR") as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                dispatch_on_commit(task)
+        self.assertIn("library.generate_derivatives", logs.output[0])
@@ -3,13 +3,27 @@ from __future__ import annotations
 
 from django.contrib import admin
 
-from .models import MediaFile
+from .models import MediaBlob, MediaFile, PendingFileDeletion
 
 
 @admin.register(MediaFile)
 class MediaFileAdmin(admin.ModelAdmin):
-    list_display = ("title", "media_type", "size", "uploaded_by", "created_at")
-    list_filter = ("media_type",)
+    list_display = ("title", "media_type", "size", "uploaded_by", "created_at", "is_deleted")
+    list_filter = ("media_type", "is_deleted")
     search_fields = ("title", "alt_text", "uploaded_by__email")
     readonly_fields = ("created_at", "updated_at", "size")
     autocomplete_fields = ("uploaded_by",)
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ("sha256", "mime_type", "size", "ref_count", "created_at")
+    search_fields = ("sha256",)
+    readonly_fields = ("sha256", "file", "size", "mime_type", "ref_count", "created_at", "updated_at")
+
+
+@admin.register(PendingFileDeletion)
+class PendingFileDeletionAdmin(admin.ModelAdmin):
+    list_display = ("name", "attempts", "last_error", "created_at", "updated_at")
+    search_fields = ("name",)
+    readonly_fields = ("name", "attempts", "last_error", "created_at", "updated_at")
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MediaConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.library"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
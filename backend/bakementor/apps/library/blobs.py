@@ -0,0 +1,213 @@
+"""Reference-counted, content-addressed storage of media bytes.
+
+Every distinct file content is stored once as a ``MediaBlob``; ``MediaFile``
+rows point at it and hold one reference each. Counts are changed with
+row-locked ``F()`` updates so concurrent uploads and deletes of the same
+content cannot lose a reference. Dropping the last reference queues the
+stored files in ``PendingFileDeletion`` within the same transaction.
+
+New bytes are written by ``write_blob_files`` before the transaction that
+references them: a rollback cannot undo a storage write, so the caller
+deletes those files itself when that transaction fails (see
+``apps.library.uploads.discard_on_error``).
+"""
+from __future__ import annotations
+
+from collections import Counter
+from typing import TYPE_CHECKING
+
+from django.core.files.storage import Storage
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from .derivatives import derivative_names
+from .models import MediaBlob, PendingFileDeletion, build_blob_path, media_storage
+
+if TYPE_CHECKING:
+    from .uploads import HashedUploadedFile
+
+
+def _reference_existing(sha256: str, count: int = 1) -> MediaBlob | None:
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(sha256=sha256).first()
+        if blob is None:
+            return None
+        MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + count)
+        blob.ref_count += count
+        return blob
+
+
+def _create_or_reference(blob: MediaBlob, storage: Storage) -> tuple[MediaBlob, bool]:
+    """Insert a blob whose file is already stored, or join a concurrently created one."""
+    try:
+        with transaction.atomic():
+            blob.save(force_insert=True)
+        return blob, True
+    except IntegrityError:
+        # A concurrent upload of the same bytes created the blob first.
+        storage.delete(blob.file.name)
+        existing = _reference_existing(blob.sha256, blob.ref_count)
+        if existing is None:
+            raise
+        return existing, False
+
+
+def write_blob_files(uploads: list[HashedUploadedFile], storage: Storage = media_storage) -> dict[str, str]:
+    """Store the bytes of uploads no blob holds yet; return ``{sha256: name}``.
+
+    Each new content is written once under its content path, with a single
+    query for the known hashes. Files already written are removed again if
+    a later write fails.
+    """
+    known = set(
+        MediaBlob.objects.filter(sha256__in={upload.sha256 for upload in uploads}).values_list("sha256", flat=True)
+    )
+    written: dict[str, str] = {}
+    try:
+        for upload in uploads:
+            if upload.sha256 not in known and upload.sha256 not in written:
+                path = build_blob_path(upload.sha256, upload.name or "")
+                written[upload.sha256] = storage.save(path, upload.storage_content())
+    except BaseException:
+        for name in written.values():
+            storage.delete(name)
+        raise
+    return written
+
+
+def acquire_blob(
+    upload: HashedUploadedFile, mime_type: str, storage: Storage = media_storage, written: str | None = None
+) -> MediaBlob:
+    """Return the blob holding ``upload``'s content with one more reference.
+
+    ``written`` is where ``write_blob_files`` stored the bytes; it is deleted
+    again when a concurrent upload created the blob first. Without it, new
+    content is saved here. Call it inside the transaction that inserts the
+    referencing row, so a failed insert also rolls back the reference.
+    """
+    blob = _reference_existing(upload.sha256)
+    if blob is not None:
+        if written:
+            storage.delete(written)
+        return blob
+
+    name = written or storage.save(build_blob_path(upload.sha256, upload.name or ""), upload.storage_content())
+    blob = MediaBlob(sha256=upload.sha256, file=name, size=upload.size, mime_type=mime_type, ref_count=1)
+    return _create_or_reference(blob, storage)[0]
+
+
+def adopt_stored_file(sha256: str, name: str, size: int, mime_type: str, storage: Storage = media_storage) -> MediaBlob:
+    """Return the blob for content already stored at ``name``, with one more reference.
+
+    New content becomes a blob in place. When the content is known the
+    existing blob is returned and ``name`` is left for the caller to remove.
+    """
+    blob = _reference_existing(sha256)
+    if blob is not None:
+        return blob
+    blob = MediaBlob(sha256=sha256, file=name, size=size, mime_type=mime_type, ref_count=1)
+    return _create_or_reference(blob, storage)[0]
+
+
+def acquire_blobs(
+    items: list[tuple[HashedUploadedFile, str]],
+    storage: Storage = media_storage,
+    written: dict[str, str] | None = None,
+) -> tuple[list[MediaBlob], list[MediaBlob]]:
+    """Batch form of ``acquire_blob`` for ``(upload, mime type)`` pairs.
+
+    Known blobs gain all their references in one locked ``UPDATE`` and new
+    blobs are inserted with one ``bulk_create``. Returns the blob for each
+    item, in order, and the blobs inserted in bulk; ``post_save`` does not run
+    for those, so the caller schedules their processing. As for
+    ``acquire_blob``, run it in the transaction that inserts the rows;
+    ``written`` is the result of ``write_blob_files``.
+    """
+    written = written or {}
+    counts = Counter(upload.sha256 for upload, _ in items)
+    first_seen: dict[str, tuple[HashedUploadedFile, str]] = {}
+    for upload, mime_type in items:
+        first_seen.setdefault(upload.sha256, (upload, mime_type))
+
+    with transaction.atomic():
+        by_hash = {
+            blob.sha256: blob for blob in MediaBlob.objects.select_for_update().filter(sha256__in=list(counts))
+        }
+        if by_hash:
+            MediaBlob.objects.filter(pk__in=[blob.pk for blob in by_hash.values()]).update(
+                ref_count=F("ref_count")
+                + Case(
+                    *(When(pk=blob.pk, then=Value(counts[sha256])) for sha256, blob in by_hash.items()),
+                    output_field=PositiveIntegerField(),
+                )
+            )
+            for sha256, blob in by_hash.items():
+                blob.ref_count += counts[sha256]
+
+    pending = []
+    for sha256, (upload, mime_type) in first_seen.items():
+        if sha256 in by_hash:
+            if sha256 in written:
+                storage.delete(written[sha256])
+            continue
+        name = written.get(sha256) or storage.save(build_blob_path(sha256, upload.name or ""), upload.storage_content())
+        pending.append(
+            MediaBlob(sha256=sha256, file=name, size=upload.size, mime_type=mime_type, ref_count=counts[sha256])
+        )
+
+    bulk_created: list[MediaBlob] = []
+    if pending:
+        try:
+            with transaction.atomic():
+                bulk_created = MediaBlob.objects.bulk_create(pending)
+        except IntegrityError:
+            # Raced with another upload of some of the same bytes; settle one
+            # by one (individual saves schedule their own processing).
+            for blob in pending:
+                blob, _ = _create_or_reference(blob, storage)
+                by_hash[blob.sha256] = blob
+        else:
+            by_hash.update((blob.sha256, blob) for blob in bulk_created)
+    return [by_hash[upload.sha256] for upload, _ in items], bulk_created
+
+
+def queue_file_deletions(names: list[str]) -> None:
+    """Record stored files to delete; ``library.delete_stored_files`` removes them."""
+    PendingFileDeletion.objects.bulk_create([PendingFileDeletion(name=name) for name in names if name])
+
+
+def _blob_file_names(blob: MediaBlob) -> list[str]:
+    return [blob.file.name, *derivative_names(blob)]
+
+
+def release_blob(blob_id) -> bool:
+    """Drop one reference to a blob; delete it and queue its files when none remain.
+
+    Returns ``True`` when the blob was deleted.
+    """
+    return release_blobs({blob_id: 1}) == 1
+
+
+def release_blobs(counts: dict) -> int:
+    """Drop ``counts[blob_id]`` references from each blob in one locked pass.
+
+    Blobs left without references are deleted and their files (original and
+    derivatives) queued for removal in the same transaction. Returns the
+    number of blobs deleted.
+    """
+    with transaction.atomic():
+        blobs = list(MediaBlob.objects.select_for_update().filter(pk__in=list(counts)))
+        exhausted = [blob for blob in blobs if blob.ref_count <= counts[blob.pk]]
+        remaining = [blob for blob in blobs if blob.ref_count > counts[blob.pk]]
+        if remaining:
+            MediaBlob.objects.filter(pk__in=[blob.pk for blob in remaining]).update(
+                ref_count=F("ref_count")
+                - Case(
+                    *(When(pk=blob.pk, then=Value(counts[blob.pk])) for blob in remaining),
+                    output_field=PositiveIntegerField(),
+                )
+            )
+        if exhausted:
+            queue_file_deletions([name for blob in exhausted for name in _blob_file_names(blob)])
+            MediaBlob.objects.filter(pk__in=[blob.pk for blob in exhausted]).delete()
+    return len(exhausted)
@@ -0,0 +1,142 @@
+"""Asynchronous, batched removal of media.
+
+Deleting media is split in three steps so requests stay cheap:
+
+1. ``soft_delete`` flags rows in one ``UPDATE``; they disappear from the API
+   immediately.
+2. ``purge_deleted`` (Celery) hard-deletes flagged rows in batches, drops
+   their blob references in one locked pass per batch and records files left
+   without owners in ``PendingFileDeletion``.
+3. ``delete_pending_files`` (Celery, retried) unlinks those files, keeping a
+   failure count and the last error on rows it could not remove.
+"""
+from __future__ import annotations
+
+import os
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .blobs import queue_file_deletions, release_blobs
+from .derivatives import DERIVATIVE_DIR
+from .models import MediaBlob, MediaFile, PendingFileDeletion, media_storage
+
+PURGE_BATCH_SIZE = 500
+DELETE_BATCH_SIZE = 500
+MAX_DELETE_ATTEMPTS = 10
+
+_deferred_release: ContextVar[bool] = ContextVar("library_deferred_blob_release", default=False)
+
+
+def release_is_deferred() -> bool:
+    """Whether blob references are being released in bulk by the caller."""
+    return _deferred_release.get()
+
+
+@contextmanager
+def _defer_release():
+    token = _deferred_release.set(True)
+    try:
+        yield
+    finally:
+        _deferred_release.reset(token)
+
+
+def soft_delete(queryset) -> list:
+    """Flag the alive rows of ``queryset`` as deleted; return their ids."""
+    ids = list(queryset.filter(is_deleted=False).values_list("id", flat=True))
+    if ids:
+        MediaFile.objects.filter(id__in=ids).update(is_deleted=True, deleted_at=timezone.now())
+    return ids
+
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _purge_batch(ids: list) -> tuple[int, int]:
+    with transaction.atomic():
+        rows = list(
+            MediaFile.objects.select_for_update()
+            .filter(id__in=ids, is_deleted=True)
+            .values_list("id", "blob_id", "file")
+        )
+        if not rows:
+            return 0, 0
+        counts = Counter(blob_id for _, blob_id, _ in rows if blob_id)
+        # Rows created before blobs existed own their file outright.
+        queue_file_deletions([name for _, blob_id, name in rows if not blob_id])
+        with _defer_release():
+            MediaFile.objects.filter(id__in=[row_id for row_id, _, _ in rows]).delete()
+        released = release_blobs(counts) if counts else 0
+    return len(rows), released
+
+
+def purge_deleted(ids: Iterable | None = None, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Hard-delete soft-deleted rows (all of them when ``ids`` is ``None``)."""
+    if ids is None:
+        ids = MediaFile.objects.filter(is_deleted=True).order_by("deleted_at").values_list("id", flat=True)
+    purged = 0
+    for batch in _chunks(list(ids), batch_size):
+        purged += _purge_batch(batch)[0]
+    return purged
+
+
+def _still_referenced(names: list[str]) -> set[str]:
+    """Names that live rows use again (a re-upload can reclaim a queued path)."""
+    referenced = set(MediaFile.objects.filter(file__in=names).values_list("file", flat=True))
+    referenced |= set(MediaBlob.objects.filter(file__in=names).values_list("file", flat=True))
+    derivative_hashes = {
+        os.path.basename(name).split("-", 1)[0]: name for name in names if name.startswith(f"{DERIVATIVE_DIR}/")
+    }
+    if derivative_hashes:
+        live = set(MediaBlob.objects.filter(sha256__in=list(derivative_hashes)).values_list("sha256", flat=True))
+        referenced |= {name for sha256, name in derivative_hashes.items() if sha256 in live}
+    return referenced
+
+
+def delete_pending_files(batch_size: int = DELETE_BATCH_SIZE, storage=media_storage) -> tuple[int, int]:
+    """Unlink queued files until the queue is drained; return ``(deleted, failed)``.
+
+    Each batch is claimed with ``SKIP LOCKED`` (where supported) so concurrent
+    workers split the queue. Failures stay queued with their error.
+    """
+    deleted = failed = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                PendingFileDeletion.objects.select_for_update(skip_locked=True)
+                .filter(attempts__lt=MAX_DELETE_ATTEMPTS)
+                .order_by("created_at")[:batch_size]
+            )
+            if not batch:
+                break
+            referenced = _still_referenced([row.name for row in batch])
+            done, errors = [], {}
+            for row in batch:
+                if row.name in referenced:
+                    done.append(row.pk)
+                    continue
+                try:
+                    storage.delete(row.name)
+                except Exception as exc:  # noqa: BLE001 - recorded for retry
+                    errors[row.pk] = f"{type(exc).__name__}: {exc}"
+                else:
+                    done.append(row.pk)
+            PendingFileDeletion.objects.filter(pk__in=done).delete()
+            for pk, error in errors.items():
+                PendingFileDeletion.objects.filter(pk=pk).update(
+                    attempts=F("attempts") + 1, last_error=error[:2000], updated_at=timezone.now()
+                )
+        deleted += len(done)
+        failed += len(errors)
+        if errors:
+            # Let the retry back off instead of spinning on a failing backend.
+            break
+    return deleted, failed
@@ -0,0 +1,184 @@
+"""Width-bucketed, format-converted variants of uploaded images.
+
+Variants belong to a ``MediaBlob``, so every ``MediaFile`` sharing the same
+bytes shares them too. ``EAGER_WIDTHS`` are rendered by a Celery task right
+after a new image blob is stored; the remaining buckets are rendered on the
+first request to ``media-derivative``. Files live in ``media_storage`` under
+deterministic names and are recorded on ``MediaBlob.derivatives``.
+"""
+from __future__ import annotations
+
+import io
+import logging
+import math
+from typing import Any, Iterable
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.urls import reverse
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+
+from .models import MediaBlob, media_storage
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (160, 320, 480, 640, 960, 1280, 1600, 1920)
+EAGER_WIDTHS = (320, 640, 1280)
+DERIVATIVE_DIR = "derivatives"
+# Vector and animated formats are served as uploaded.
+SKIPPED_MIME_TYPES = frozenset({"image/svg+xml", "image/gif"})
+
+_ENCODERS: dict[str, tuple[str, dict[str, Any]]] = {
+    "avif": ("AVIF", {"quality": 55, "speed": 6}),
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+}
+_ROTATED_ORIENTATIONS = frozenset({5, 6, 7, 8})
+_LOCK_PREFIX = "library:derivative-lock:"
+_LOCK_TIMEOUT_SECONDS = 60
+
+
+def derivative_formats() -> tuple[str, ...]:
+    """Formats this Pillow build can encode (AVIF needs libavif or its plugin)."""
+    Image.init()
+    return tuple(ext for ext, (pil_format, _) in _ENCODERS.items() if pil_format in Image.SAVE)
+
+
+def supports_derivatives(mime_type: str) -> bool:
+    return mime_type.startswith("image/") and mime_type not in SKIPPED_MIME_TYPES
+
+
+def derivative_name(sha256: str, width: int, fmt: str) -> str:
+    return f"{DERIVATIVE_DIR}/{sha256[:2]}/{sha256}-{width}.{fmt}"
+
+
+def target_widths(original_width: int | None, widths: Iterable[int] = DERIVATIVE_WIDTHS) -> list[int]:
+    """Buckets narrower than the original; images are never upscaled."""
+    if not original_width:
+        return []
+    return [width for width in widths if width < original_width]
+
+
+def render_derivatives(
+    blob: MediaBlob, widths: Iterable[int] = EAGER_WIDTHS, formats: Iterable[str] | None = None
+) -> dict[str, Any]:
+    """Render and store the given variants of ``blob``; existing files are reused.
+
+    Returns ``{"width", "height", "variants": {fmt: {"<width>": name}}}`` where
+    width and height describe the (orientation-corrected) original.
+    """
+    formats = tuple(formats) if formats is not None else derivative_formats()
+    variants: dict[str, dict[str, str]] = {fmt: {} for fmt in formats}
+    with blob.file.open("rb") as fh, Image.open(fh) as source:
+        raw_width, raw_height = source.size
+        rotated = source.getexif().get(ExifTags.Base.Orientation) in _ROTATED_ORIENTATIONS
+        original_width, original_height = (raw_height, raw_width) if rotated else (raw_width, raw_height)
+        widths = sorted(target_widths(original_width, widths), reverse=True)
+        if not widths:
+            return {"width": original_width, "height": original_height, "variants": variants}
+        # Let the JPEG decoder scale by 1/2..1/8 while decoding; a 6000px
+        # camera photo then decodes at a fraction of the cost.
+        scale = widths[0] / original_width
+        source.draft("RGB", (math.ceil(raw_width * scale), math.ceil(raw_height * scale)))
+        image = ImageOps.exif_transpose(source)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+    # Resize progressively from the previous (larger) variant.
+    for width in widths:
+        height = max(1, round(original_height * width / original_width))
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            name = derivative_name(blob.sha256, width, fmt)
+            if not media_storage.exists(name):
+                pil_format, options = _ENCODERS[fmt]
+                buffer = io.BytesIO()
+                image.save(buffer, format=pil_format, **options)
+                name = media_storage.save(name, ContentFile(buffer.getvalue()))
+            variants[fmt][str(width)] = name
+    return {"width": original_width, "height": original_height, "variants": variants}
+
+
+def record_derivatives(blob_id, rendered: dict[str, Any]) -> dict[str, Any]:
+    """Merge rendered variants into the blob's record under a row lock."""
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return {}
+        current = dict(blob.derivatives or {})
+        variants = {fmt: dict(sizes) for fmt, sizes in (current.get("variants") or {}).items()}
+        for fmt, sizes in rendered.get("variants", {}).items():
+            variants.setdefault(fmt, {}).update(sizes)
+        current.update(width=rendered["width"], height=rendered["height"], variants=variants)
+        MediaBlob.objects.filter(pk=blob.pk).update(derivatives=current)
+    return current
+
+
+def generate_eager_derivatives(blob: MediaBlob) -> dict[str, Any]:
+    try:
+        rendered = render_derivatives(blob, EAGER_WIDTHS)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        logger.warning("Could not render derivatives for blob %s", blob.sha256, exc_info=True)
+        return {}
+    return record_derivatives(blob.pk, rendered)
+
+
+def ensure_derivative(blob: MediaBlob, width: int, fmt: str) -> str | None:
+    """Return the storage name of one variant, rendering it on first use.
+
+    Returns ``None`` when the variant cannot be produced right now (the image
+    is narrower than ``width``, unreadable, or another request is rendering
+    it); callers fall back to the original file.
+    """
+    derivatives = blob.derivatives or {}
+    name = ((derivatives.get("variants") or {}).get(fmt) or {}).get(str(width))
+    if name:
+        return name
+    if derivatives.get("width") and width >= derivatives["width"]:
+        return None
+
+    lock_key = f"{_LOCK_PREFIX}{blob.sha256}:{width}:{fmt}"
+    if not cache.add(lock_key, 1, timeout=_LOCK_TIMEOUT_SECONDS):
+        return None
+    try:
+        rendered = render_derivatives(blob, [width], [fmt])
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        logger.warning("Could not render %spx %s for blob %s", width, fmt, blob.sha256, exc_info=True)
+        return None
+    finally:
+        cache.delete(lock_key)
+    record_derivatives(blob.pk, rendered)
+    return rendered["variants"][fmt].get(str(width))
+
+
+def derivative_names(blob: MediaBlob) -> list[str]:
+    return [
+        name
+        for sizes in ((blob.derivatives or {}).get("variants") or {}).values()
+        for name in sizes.values()
+    ]
+
+
+def srcset_map(blob: MediaBlob | None, request=None) -> dict[str, dict[str, str]]:
+    """``{fmt: {"<width>": url}}`` for every bucket narrower than the original.
+
+    Rendered variants link straight to storage; the rest link to the lazy
+    endpoint, which renders them on first request.
+    """
+    if blob is None or not (blob.derivatives or {}).get("width"):
+        return {}
+    variants = blob.derivatives.get("variants") or {}
+    widths = target_widths(blob.derivatives["width"])
+    result: dict[str, dict[str, str]] = {}
+    for fmt in derivative_formats():
+        urls = {}
+        for width in widths:
+            name = (variants.get(fmt) or {}).get(str(width))
+            if name:
+                url = media_storage.url(name)
+            else:
+                url = reverse("media-derivative", kwargs={"sha256": blob.sha256, "width": width, "fmt": fmt})
+            urls[str(width)] = request.build_absolute_uri(url) if request else url
+        if urls:
+            result[fmt] = urls
+    return result
@@ -0,0 +1,123 @@
+"""Direct-to-storage uploads.
+
+When ``media_storage`` can presign uploads (see ``apps.library.storage``),
+a client declares the file as an ``UploadSession`` with ``direct`` set and
+receives a presigned request for a key of its own. The bytes go straight to
+the bucket; web nodes never see them. ``finalize`` then checks the object
+and creates the ``MediaFile`` pointing at it, and ``library.ingest_direct_upload``
+hashes the object on a worker and attaches it to a ``MediaBlob``, deleting
+the object again when its content is already stored.
+"""
+from __future__ import annotations
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+
+from .blobs import adopt_stored_file, queue_file_deletions, release_blob
+from .metadata import merge_metadata
+from .models import MediaBlob, MediaFile, UploadSession, _safe_extension, media_storage, media_type_for_mime
+from .resumable import OffsetMismatch, UploadStateError
+from .uploads import SNIFF_BYTES, sniff_mime_type
+
+DIRECT_UPLOAD_DIR = "uploads"
+READ_SIZE = 1024 * 1024
+
+
+def supports_direct_uploads() -> bool:
+    return callable(getattr(media_storage, "presigned_upload", None))
+
+
+def direct_upload_key(filename: str) -> str:
+    """Return ``uploads/<random hex><ext>``; keys are never reused."""
+    return f"{DIRECT_UPLOAD_DIR}/{uuid.uuid4().hex}{_safe_extension(filename)}"
+
+
+def presigned_upload(session: UploadSession) -> dict | None:
+    """The request the client sends the file with, or ``None`` once it is no longer accepted."""
+    if not session.storage_key or session.status != UploadSession.Status.ACTIVE:
+        return None
+    return media_storage.presigned_upload(
+        session.storage_key,
+        session.content_type,
+        session.size,
+        settings.MEDIA_DIRECT_UPLOAD_EXPIRY,
+    )
+
+
+def finalize_direct_upload(session: UploadSession, user) -> MediaFile:
+    """Create the ``MediaFile`` for an uploaded object and queue its ingestion.
+
+    The caller holds the session row lock. Raises ``OffsetMismatch`` while the
+    object is missing or incomplete.
+    """
+    if session.status != UploadSession.Status.ACTIVE:
+        raise UploadStateError(f"Upload is {session.status}")
+    key = session.storage_key
+    size = media_storage.size(key) if media_storage.exists(key) else 0
+    if size != session.size:
+        raise OffsetMismatch(size)
+    mime_type = session.content_type or "application/octet-stream"
+    media = MediaFile.objects.create(
+        file=key,
+        title=session.title or session.filename,
+        description=session.description,
+        alt_text=session.alt_text,
+        size=size,
+        mime_type=mime_type,
+        media_type=media_type_for_mime(mime_type),
+        uploaded_by=user,
+    )
+    session.status = UploadSession.Status.COMPLETED
+    session.offset = size
+    session.media_file = media
+    session.save(update_fields=["status", "offset", "media_file", "updated_at"])
+    return media
+
+
+def _hash_object(name: str) -> tuple[str, bytes]:
+    hasher = hashlib.sha256()
+    head = b""
+    with media_storage.open(name, "rb") as fh:
+        for block in iter(lambda: fh.read(READ_SIZE), b""):
+            if len(head) < SNIFF_BYTES:
+                head += block[: SNIFF_BYTES - len(head)]
+            hasher.update(block)
+    return hasher.hexdigest(), head
+
+
+def ingest_direct_upload(media_id) -> MediaBlob | None:
+    """Attach a directly uploaded ``MediaFile`` to the blob holding its content.
+
+    New content becomes a blob in place (the key is already unique); known
+    content gains a reference and the uploaded copy is queued for deletion.
+    Returns ``None`` when the row is gone or was ingested already.
+    """
+    media = MediaFile.objects.filter(pk=media_id, blob__isnull=True).only("id", "file", "size", "mime_type").first()
+    if media is None:
+        return None
+    name = media.file.name
+    sha256, head = _hash_object(name)
+    mime_type = sniff_mime_type(head) or media.mime_type or "application/octet-stream"
+
+    # One transaction, so processing scheduled for a new blob starts after
+    # the file row points at it.
+    with transaction.atomic():
+        blob = adopt_stored_file(sha256, name, media.size, mime_type)
+        media = MediaFile.objects.select_for_update().filter(pk=media_id, blob__isnull=True, file=name).first()
+        if media is None:
+            # Deleted while hashing; its purge queued ``name`` already.
+            release_blob(blob.pk)
+            return None
+        media.blob = blob
+        media.file = blob.file.name
+        media.mime_type = blob.mime_type or mime_type
+        media.media_type = media_type_for_mime(media.mime_type)
+        if blob.metadata:
+            media.metadata = merge_metadata(media.metadata, blob.metadata)
+        media.save(update_fields=["blob", "file", "mime_type", "media_type", "metadata", "updated_at"])
+        if blob.file.name != name:
+            queue_file_deletions([name])
+    return blob
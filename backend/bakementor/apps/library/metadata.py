@@ -0,0 +1,147 @@
+"""Descriptive metadata extracted from stored media.
+
+Images yield pixel dimensions (orientation-corrected), the EXIF orientation,
+a dominant colour and a tiny base64 WebP placeholder; MP4/QuickTime and WAV
+files yield their duration. Extraction runs in a Celery task per blob and
+the result is merged into the ``metadata`` of every ``MediaFile`` using it.
+"""
+from __future__ import annotations
+
+import base64
+import io
+import logging
+import struct
+import wave
+from typing import IO, Any
+
+from django.db import transaction
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+
+from .models import MediaBlob, MediaFile
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_SIZE = 16
+_PALETTE_SAMPLE = 64
+_ROTATED_ORIENTATIONS = frozenset({5, 6, 7, 8})
+_MP4_MIME_TYPES = frozenset({"video/mp4", "video/quicktime", "audio/mp4"})
+_WAV_MIME_TYPES = frozenset({"audio/wav", "audio/x-wav"})
+
+
+def _dominant_color(image: Image.Image) -> str:
+    sample = image.convert("RGB")
+    sample.thumbnail((_PALETTE_SAMPLE, _PALETTE_SAMPLE))
+    quantized = sample.quantize(colors=5, method=Image.Quantize.MEDIANCUT)
+    _, index = max(quantized.getcolors())
+    palette = quantized.getpalette() or []
+    red, green, blue = palette[index * 3 : index * 3 + 3]
+    return f"#{red:02x}{green:02x}{blue:02x}"
+
+
+def _placeholder(image: Image.Image) -> str:
+    thumbnail = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    thumbnail.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format="WEBP", quality=40)
+    return "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _image_metadata(fh: IO[bytes]) -> dict[str, Any]:
+    with Image.open(fh) as source:
+        orientation = source.getexif().get(ExifTags.Base.Orientation, 1)
+        width, height = source.size
+        if orientation in _ROTATED_ORIENTATIONS:
+            width, height = height, width
+        # Only small samples are needed; let JPEGs decode at reduced scale.
+        source.draft("RGB", (_PALETTE_SAMPLE, _PALETTE_SAMPLE))
+        image = ImageOps.exif_transpose(source)
+    return {
+        "width": width,
+        "height": height,
+        "orientation": orientation,
+        "dominant_color": _dominant_color(image),
+        "placeholder": _placeholder(image),
+    }
+
+
+def _mp4_duration(fh: IO[bytes]) -> float | None:
+    """Read ``moov/mvhd`` without loading media data."""
+    fh.seek(0, io.SEEK_END)
+    end = fh.tell()
+    offset = 0
+    while offset + 8 <= end:
+        fh.seek(offset)
+        size, kind = struct.unpack(">I4s", fh.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", fh.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return None
+        if kind == b"moov":
+            # ``mvhd`` is a direct child of ``moov``; scan its children only.
+            end = offset + size
+            offset += header
+            continue
+        if kind == b"mvhd":
+            version = fh.read(1)[0]
+            fh.read(3)
+            if version == 1:
+                _, _, timescale, duration = struct.unpack(">QQIQ", fh.read(28))
+            else:
+                _, _, timescale, duration = struct.unpack(">IIII", fh.read(16))
+            return round(duration / timescale, 3) if timescale else None
+        offset += size
+    return None
+
+
+def _wav_duration(fh: IO[bytes]) -> float | None:
+    with wave.open(fh) as reader:
+        rate = reader.getframerate()
+        return round(reader.getnframes() / rate, 3) if rate else None
+
+
+def extract_metadata(blob: MediaBlob) -> dict[str, Any]:
+    """Return the extracted metadata for ``blob`` (empty for unsupported files)."""
+    mime_type = blob.mime_type or ""
+    try:
+        with blob.file.open("rb") as fh:
+            if mime_type.startswith("image/") and mime_type != "image/svg+xml":
+                return _image_metadata(fh)
+            if mime_type in _MP4_MIME_TYPES:
+                duration = _mp4_duration(fh)
+            elif mime_type in _WAV_MIME_TYPES:
+                duration = _wav_duration(fh)
+            else:
+                return {}
+    except (
+        UnidentifiedImageError,
+        OSError,
+        EOFError,
+        IndexError,
+        struct.error,
+        wave.Error,
+        Image.DecompressionBombError,
+    ):
+        logger.warning("Could not extract metadata from blob %s", blob.sha256, exc_info=True)
+        return {}
+    return {"duration": duration} if duration is not None else {}
+
+
+def merge_metadata(existing: dict | None, extracted: dict[str, Any]) -> dict[str, Any]:
+    """Overlay extracted keys on a file's metadata, keeping anything else it holds."""
+    return {**(existing if isinstance(existing, dict) else {}), **extracted}
+
+
+def record_metadata(blob_id, extracted: dict[str, Any]) -> int:
+    """Store ``extracted`` on the blob and every file referencing it; return rows updated."""
+    with transaction.atomic():
+        if not MediaBlob.objects.filter(pk=blob_id).update(metadata=extracted):
+            return 0
+        files = list(MediaFile.objects.filter(blob_id=blob_id).only("id", "metadata"))
+        for media in files:
+            media.metadata = merge_metadata(media.metadata, extracted)
+        MediaFile.objects.bulk_update(files, ["metadata"])
+    return len(files)
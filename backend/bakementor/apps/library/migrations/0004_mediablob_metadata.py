@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0003_mediablob_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
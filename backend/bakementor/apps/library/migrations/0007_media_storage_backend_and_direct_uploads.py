@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:50
+
+import apps.library.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0006_soft_delete_and_pending_deletions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='storage_key',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='mediablob',
+            name='file',
+            field=models.FileField(max_length=255, storage=apps.library.models.get_media_storage, upload_to=''),
+        ),
+        migrations.AlterField(
+            model_name='mediafile',
+            name='file',
+            field=models.FileField(storage=apps.library.models.get_media_storage, upload_to=apps.library.models.upload_to),
+        ),
+    ]
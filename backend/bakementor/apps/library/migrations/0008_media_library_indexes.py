@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0007_media_storage_backend_and_direct_uploads'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mediafile',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-created_at'], name='library_media_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='mediafile',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['media_type', '-created_at'], name='library_media_type_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='mediafile',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['uploaded_by', '-created_at'], name='library_media_owner_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='mediafile',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['uploaded_by', 'media_type', '-created_at'], name='library_media_owner_type'),
+        ),
+        migrations.AddIndex(
+            model_name='mediafile',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_at'], name='library_media_purge'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0008_media_library_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='chunk_claimed_until',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Set while a request writes the chunk at ``offset``; other writers wait until it passes.', null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0009_uploadsession_chunk_claim'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediablob',
+            name='size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='mediafile',
+            name='size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -3,17 +3,23 @@ from __future__ import annotations
 
 import hashlib
 import mimetypes
-from datetime import date
 from pathlib import Path
-from django.utils import timezone
 
 from django.conf import settings
-from django.core.files.storage import FileSystemStorage
+from django.core.files.storage import storages
 from django.db import models
+from django.utils import timezone
+
+from apps.common.models import SoftDeleteModel, TimeStampedModel, UUIDModel
+
 
-from apps.common.models import TimeStampedModel, UUIDModel
 
-media_storage = FileSystemStorage(location=settings.MEDIA_ROOT)
+def get_media_storage():
+    """The ``media`` entry of ``STORAGES`` (filesystem or S3-compatible)."""
+    return storages["media"]
+
+
+media_storage = get_media_storage()
 
 
 class MediaType(models.TextChoices):
@@ -23,27 +29,52 @@ class MediaType(models.TextChoices):
     OTHER = "other", "Other"
 
 
+DOCUMENT_MIME_TYPES = frozenset(
+    {
+        "application/pdf",
+        "application/msword",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    }
+)
+
+
 def _safe_extension(filename: str) -> str:
     suffix = Path(filename).suffix or ""
     return suffix.lower()
 
 
+def build_upload_path(hash_hex: str, filename: str, prefix: str = "media") -> str:
+    """Return ``YYYY/MM/DD/<prefix>_<hash16><ext>`` for a content hash."""
+    today = timezone.localdate()
+    name = f"{prefix}_{hash_hex[:16]}{_safe_extension(filename)}"
+    return str(Path(str(today.year)) / f"{today.month:02d}" / f"{today.day:02d}" / name)
+
+
+def build_blob_path(hash_hex: str, filename: str) -> str:
+    """Return ``blobs/<hh>/<sha256><ext>``; the name depends on the content only."""
+    return f"blobs/{hash_hex[:2]}/{hash_hex}{_safe_extension(filename)}"
+
+
+def media_type_for_mime(mime: str) -> str:
+    if mime.startswith("image/"):
+        return MediaType.IMAGE
+    if mime.startswith("video/"):
+        return MediaType.VIDEO
+    if mime in DOCUMENT_MIME_TYPES:
+        return MediaType.DOCUMENT
+    return MediaType.OTHER
+
+
 def upload_to(instance: "MediaFile", filename: str) -> str:
     """Generate path like YYYY/MM/DD/PREFIX_<hash><ext>
 
     The hash is derived from the file contents (sha256) shortened to 16 hex chars.
     Example: 2025/10/03/media_ab12cd34ef56a789.jpg
-    """
-    # Compute date-based archive path (use timezone-aware date)
-    today = timezone.localdate() if hasattr(timezone, "localdate") else date.today()
-    year = str(today.year)
-    month = f"{today.month:02d}"
-    day = f"{today.day:02d}"
 
-    # Determine extension
-    ext = _safe_extension(filename)
-
-    # Compute a content hash where possible
+    API uploads are hashed while streaming (see ``apps.library.uploads``) and
+    never reach this function; it remains for files assigned directly, e.g. in
+    the admin.
+    """
     hash_hex = "xxxx"
     try:
         # UploadedFile supports .chunks(); read content in chunks to avoid memory spikes
@@ -59,7 +90,7 @@ def upload_to(instance: "MediaFile", filename: str) -> str:
                 if isinstance(content, str):
                     content = content.encode("utf-8")
                 hasher.update(content)
-        hash_hex = hasher.hexdigest()[:16]
+        hash_hex = hasher.hexdigest()
         # Reset file pointer where possible so storage can read it from the start
         if hasattr(file_obj, "seek"):
             try:
@@ -70,15 +101,36 @@ def upload_to(instance: "MediaFile", filename: str) -> str:
         # If hashing fails for any reason, fall back to a short uuid-like token
         import uuid
 
-        hash_hex = uuid.uuid4().hex[:16]
+        hash_hex = uuid.uuid4().hex
+
+    return build_upload_path(hash_hex, filename)
+
+
+class MediaBlob(UUIDModel, TimeStampedModel):
+    """One stored copy of a file's bytes, shared by every ``MediaFile`` with that content."""
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(storage=get_media_storage, max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    mime_type = models.CharField(max_length=120, blank=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
+    metadata = models.JSONField(default=dict, blank=True, editable=False)
 
-    prefix = "media"
-    name = f"{prefix}_{hash_hex}{ext}"
-    return str(Path(year) / month / day / name)
+    def __str__(self) -> str:
+        return self.sha256
 
 
-class MediaFile(UUIDModel, TimeStampedModel):
-    file = models.FileField(upload_to=upload_to, storage=media_storage)
+class MediaFile(UUIDModel, TimeStampedModel, SoftDeleteModel):
+    file = models.FileField(upload_to=upload_to, storage=get_media_storage)
+    blob = models.ForeignKey(
+        MediaBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="media_files",
+    )
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -90,29 +142,103 @@ class MediaFile(UUIDModel, TimeStampedModel):
     description = models.TextField(blank=True)
     media_type = models.CharField(max_length=20, choices=MediaType.choices, default=MediaType.IMAGE)
     mime_type = models.CharField(max_length=120, blank=True)
-    size = models.PositiveIntegerField(default=0)
+    size = models.PositiveBigIntegerField(default=0)
     alt_text = models.CharField(max_length=255, blank=True)
     metadata = models.JSONField(default=dict, blank=True)
 
     class Meta:
         ordering = ("-created_at",)
+        # One partial index per library filter combination, each ending in the
+        # newest-first sort key so cursor pages are index range scans.
+        indexes = [
+            models.Index(fields=("-created_at",), name="library_media_recent", condition=models.Q(is_deleted=False)),
+            models.Index(fields=("media_type", "-created_at"), name="library_media_type_recent", condition=models.Q(is_deleted=False)),
+            models.Index(fields=("uploaded_by", "-created_at"), name="library_media_owner_recent", condition=models.Q(is_deleted=False)),
+            models.Index(
+                fields=("uploaded_by", "media_type", "-created_at"),
+                name="library_media_owner_type",
+                condition=models.Q(is_deleted=False),
+            ),
+            models.Index(fields=("deleted_at",), name="library_media_purge", condition=models.Q(is_deleted=True)),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
     def save(self, *args, **kwargs):  # type: ignore[override]
-        if self.file and hasattr(self.file, "size"):
+        # Files stored through ``apps.library.uploads`` arrive committed with
+        # size and MIME type already known; only derive them for new raw files.
+        if self.file and not self.file._committed:
             self.size = self.file.size  # type: ignore[assignment]
             mime, _ = mimetypes.guess_type(self.file.name)
             if mime:
                 self.mime_type = mime
-                if mime.startswith("image/"):
-                    self.media_type = MediaType.IMAGE
-                elif mime.startswith("video/"):
-                    self.media_type = MediaType.VIDEO
-                elif mime in {"application/pdf", "application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"}:
-                    self.media_type = MediaType.DOCUMENT
-                else:
-                    self.media_type = MediaType.OTHER
+                self.media_type = media_type_for_mime(mime)
         super().save(*args, **kwargs)
 
+
+class PendingFileDeletion(UUIDModel, TimeStampedModel):
+    """A stored file queued for removal once the rows referencing it are gone.
+
+    Rows are written in the same transaction that drops the last reference,
+    so a crash or storage error leaves a record to retry instead of a leak.
+    """
+
+    name = models.CharField(max_length=255)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ("created_at",)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class UploadSession(UUIDModel, TimeStampedModel):
+    """An upload in progress.
+
+    Resumable sessions receive chunks into a local staging file; direct
+    sessions (``storage_key`` set) are sent by the client straight to
+    ``media_storage`` under that key.
+    """
+
+    class Status(models.TextChoices):
+        ACTIVE = "active", "Active"
+        COMPLETED = "completed", "Completed"
+        ABORTED = "aborted", "Aborted"
+
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+    )
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=120, blank=True)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.ACTIVE)
+    title = models.CharField(max_length=200, blank=True)
+    description = models.TextField(blank=True)
+    alt_text = models.CharField(max_length=255, blank=True)
+    storage_key = models.CharField(max_length=255, blank=True)
+    media_file = models.ForeignKey(
+        MediaFile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    chunk_claimed_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Set while a request writes the chunk at ``offset``; other writers wait until it passes.",
+    )
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [models.Index(fields=("status", "updated_at"))]
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.offset}/{self.size})"
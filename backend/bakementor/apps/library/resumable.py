@@ -0,0 +1,202 @@
+"""Resumable chunked uploads.
+
+A client creates an ``UploadSession`` declaring the total size, then sends
+the bytes in any number of ``PATCH`` requests, each stating the offset it
+starts at. Chunks are appended straight to a staging file on the media
+volume and hashed as they arrive; a dropped connection keeps whatever was
+received, and the client resumes from the offset the server reports.
+Finalizing hands the staging file to the regular blob pipeline, which
+renames it into place.
+
+``hashlib`` state cannot be persisted, so the running hash is kept in a small
+per-process cache keyed by session and offset. When a chunk lands on a
+different worker the hash is recomputed once, at finalize.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import IO
+
+from django.conf import settings
+from django.db import transaction
+from django.http import UnreadablePostError
+from django.utils import timezone
+
+from .blobs import queue_file_deletions
+from .models import UploadSession
+from .uploads import HashedUploadedFile, staging_directory
+
+logger = logging.getLogger(__name__)
+
+MAX_CHUNK_SIZE = getattr(settings, "MEDIA_UPLOAD_MAX_CHUNK_SIZE", 16 * 1024 * 1024)
+MAX_UPLOAD_SIZE = getattr(settings, "MEDIA_MAX_UPLOAD_SIZE", 2 * 1024 * 1024 * 1024)
+SESSION_TTL = timedelta(hours=24)
+# How long one chunk request may take before another may write at its offset.
+CHUNK_CLAIM_TTL = timedelta(minutes=15)
+READ_SIZE = 64 * 1024
+_HASHER_CACHE_SIZE = 256
+
+_hashers: OrderedDict[str, tuple[int, "hashlib._Hash"]] = OrderedDict()
+
+
+class UploadStateError(Exception):
+    """The session cannot accept the requested operation."""
+
+
+class OffsetMismatch(UploadStateError):
+    def __init__(self, offset: int):
+        super().__init__(f"Expected offset {offset}")
+        self.offset = offset
+
+
+def staging_path(session: UploadSession) -> str:
+    return os.path.join(staging_directory(), f"{session.pk}.part")
+
+
+def expires_at(session: UploadSession):
+    return session.updated_at + SESSION_TTL
+
+
+def _take_hasher(session_id, offset: int):
+    if offset == 0:
+        _hashers.pop(str(session_id), None)
+        return hashlib.sha256()
+    entry = _hashers.pop(str(session_id), None)
+    if entry is not None and entry[0] == offset:
+        return entry[1]
+    return None
+
+
+def _keep_hasher(session_id, offset: int, hasher) -> None:
+    _hashers[str(session_id)] = (offset, hasher)
+    while len(_hashers) > _HASHER_CACHE_SIZE:
+        _hashers.popitem(last=False)
+
+
+def start_session(session: UploadSession) -> None:
+    """Create the (empty) staging file for a newly created session."""
+    with open(staging_path(session), "wb"):
+        pass
+
+
+def _claim_offset(session: UploadSession, offset: int, length: int) -> tuple[UploadSession, datetime]:
+    now = timezone.now()
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status != UploadSession.Status.ACTIVE:
+            raise UploadStateError(f"Upload is {session.status}")
+        if session.storage_key:
+            raise UploadStateError("Direct uploads are sent to storage, not in chunks")
+        if offset != session.offset or (session.chunk_claimed_until and session.chunk_claimed_until > now):
+            # A chunk being written elsewhere will move the offset; the client asks again.
+            raise OffsetMismatch(session.offset)
+        if length > MAX_CHUNK_SIZE:
+            raise UploadStateError(f"Chunks are limited to {MAX_CHUNK_SIZE} bytes")
+        if offset + length > session.size:
+            raise UploadStateError("Chunk extends past the declared upload size")
+        session.chunk_claimed_until = now + CHUNK_CLAIM_TTL
+        session.save(update_fields=["chunk_claimed_until"])
+    return session, session.chunk_claimed_until
+
+
+def _write_chunk(session: UploadSession, offset: int, stream: IO[bytes], length: int, hasher) -> int:
+    written = 0
+    with open(staging_path(session), "r+b") as fh:
+        fh.seek(offset)
+        fh.truncate()
+        while written < length:
+            try:
+                data = stream.read(min(READ_SIZE, length - written))
+            except (UnreadablePostError, ConnectionError):
+                logger.info("Upload %s interrupted at offset %s", session.pk, offset + written)
+                break
+            if not data:
+                break
+            fh.write(data)
+            if hasher is not None:
+                hasher.update(data)
+            written += len(data)
+    return written
+
+
+def append_chunk(session: UploadSession, offset: int, stream: IO[bytes], length: int) -> UploadSession:
+    """Append up to ``length`` bytes read from ``stream`` at ``offset``.
+
+    A short locked update claims the offset; the bytes are then received
+    with no transaction or row lock held, however slow the client, and a
+    second short update records the new offset. A concurrent append to the
+    same session gets ``OffsetMismatch`` while the claim lasts. Bytes past
+    the recorded offset (left by an interrupted request) are discarded
+    before writing.
+    """
+    session, claim = _claim_offset(session, offset, length)
+    claimed = UploadSession.objects.filter(pk=session.pk, chunk_claimed_until=claim)
+    hasher = _take_hasher(session.pk, offset)
+    try:
+        written = _write_chunk(session, offset, stream, length, hasher)
+    except BaseException:
+        claimed.update(chunk_claimed_until=None)
+        raise
+
+    session.offset = offset + written
+    session.chunk_claimed_until = None
+    session.updated_at = timezone.now()
+    if not claimed.filter(status=UploadSession.Status.ACTIVE).update(
+        offset=session.offset, chunk_claimed_until=None, updated_at=session.updated_at
+    ):
+        raise UploadStateError("Upload was aborted or taken over while the chunk was written")
+    if hasher is not None:
+        _keep_hasher(session.pk, session.offset, hasher)
+    return session
+
+
+def assemble(session: UploadSession) -> HashedUploadedFile:
+    """Return the completed staging file as an upload ready for ``prepare_uploads``."""
+    if session.status != UploadSession.Status.ACTIVE:
+        raise UploadStateError(f"Upload is {session.status}")
+    if session.storage_key:
+        raise UploadStateError("Direct uploads are finalized from storage")
+    if session.offset != session.size:
+        raise OffsetMismatch(session.offset)
+    path = staging_path(session)
+    hasher = _take_hasher(session.pk, session.offset)
+    if hasher is None:
+        hasher = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1024 * 1024), b""):
+                hasher.update(block)
+    return HashedUploadedFile.from_staged(path, session.filename, session.content_type or None, hasher)
+
+
+def discard_staging(session: UploadSession) -> None:
+    _hashers.pop(str(session.pk), None)
+    try:
+        os.unlink(staging_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def abort_session(session: UploadSession) -> None:
+    UploadSession.objects.filter(pk=session.pk).update(
+        status=UploadSession.Status.ABORTED, updated_at=timezone.now()
+    )
+    if session.storage_key:
+        # The client may have uploaded (part of) the object already.
+        queue_file_deletions([session.storage_key])
+    else:
+        discard_staging(session)
+
+
+def expire_stale_sessions(now=None) -> int:
+    """Abort active sessions idle for longer than ``SESSION_TTL``."""
+    cutoff = (now or timezone.now()) - SESSION_TTL
+    stale = list(
+        UploadSession.objects.filter(status=UploadSession.Status.ACTIVE, updated_at__lt=cutoff).only("id", "storage_key")
+    )
+    for session in stale:
+        abort_session(session)
+    return len(stale)
@@ -1,14 +1,23 @@
 """Serializers for media assets."""
 from __future__ import annotations
 
+from django.db import transaction
 from rest_framework import serializers
 
-from .models import MediaFile
+from .blobs import release_blob
+from .derivatives import srcset_map
+from .direct import presigned_upload, supports_direct_uploads
+from .metadata import merge_metadata
+from .models import MediaFile, UploadSession, media_type_for_mime
+from .resumable import MAX_CHUNK_SIZE, MAX_UPLOAD_SIZE, expires_at
+from .tasks import schedule_file_deletions
+from .uploads import PreparedUpload, discard_on_error, prepare_uploads, store_upload
 
 
 class MediaFileSerializer(serializers.ModelSerializer):
     uploaded_by_email = serializers.EmailField(source="uploaded_by.email", read_only=True)
     file_url = serializers.SerializerMethodField(read_only=True)
+    srcset = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = MediaFile
@@ -23,6 +32,7 @@ class MediaFileSerializer(serializers.ModelSerializer):
             "metadata",
             "file",
             "file_url",
+            "srcset",
             "uploaded_by",
             "uploaded_by_email",
             "created_at",
@@ -32,6 +42,7 @@ class MediaFileSerializer(serializers.ModelSerializer):
             "id",
             "mime_type",
             "size",
+            "srcset",
             "uploaded_by",
             "uploaded_by_email",
             "created_at",
@@ -41,6 +52,45 @@ class MediaFileSerializer(serializers.ModelSerializer):
             "file": {"write_only": False},
         }
 
+    def _prepare_file(self, validated_data: dict) -> list[PreparedUpload]:
+        upload = validated_data.pop("file", None)
+        return prepare_uploads([upload]) if upload is not None else []
+
+    def _store_file(
+        self, validated_data: dict, prepared: list[PreparedUpload], instance: MediaFile | None = None
+    ) -> dict:
+        if not prepared:
+            return validated_data
+        stored = store_upload(prepared[0])
+        # Known content already has its metadata; new blobs get it from a task.
+        if stored.blob.metadata:
+            current = validated_data.get("metadata", instance.metadata if instance else None)
+            validated_data["metadata"] = merge_metadata(current, stored.blob.metadata)
+        validated_data.update(
+            blob=stored.blob,
+            file=stored.name,
+            size=stored.size,
+            mime_type=stored.mime_type,
+            media_type=media_type_for_mime(stored.mime_type),
+        )
+        return validated_data
+
+    # New bytes are stored first; the blob reference and the row holding it
+    # then commit together, and a rollback removes the stored file.
+    def create(self, validated_data):
+        prepared = self._prepare_file(validated_data)
+        with discard_on_error(prepared), transaction.atomic():
+            return super().create(self._store_file(validated_data, prepared))
+
+    def update(self, instance, validated_data):
+        prepared = self._prepare_file(validated_data)
+        with discard_on_error(prepared), transaction.atomic():
+            previous_blob_id = instance.blob_id
+            instance = super().update(instance, self._store_file(validated_data, prepared, instance))
+            if previous_blob_id and previous_blob_id != instance.blob_id and release_blob(previous_blob_id):
+                schedule_file_deletions()
+        return instance
+
     def get_file_url(self, obj: MediaFile) -> str | None:
         request = self.context.get("request") if isinstance(self.context, dict) else None
         if not obj.file:
@@ -53,3 +103,59 @@ class MediaFileSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(url)
         return url
 
+
+    def get_srcset(self, obj: MediaFile) -> dict[str, dict[str, str]]:
+        request = self.context.get("request") if isinstance(self.context, dict) else None
+        return srcset_map(obj.blob, request)
+
+
+class MediaBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=10000)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    direct = serializers.BooleanField(write_only=True, default=False)
+    upload = serializers.SerializerMethodField()
+    expires_at = serializers.SerializerMethodField()
+    max_chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = (
+            "id",
+            "filename",
+            "content_type",
+            "size",
+            "offset",
+            "status",
+            "title",
+            "description",
+            "alt_text",
+            "media_file",
+            "direct",
+            "upload",
+            "max_chunk_size",
+            "expires_at",
+            "created_at",
+        )
+        read_only_fields = ("id", "offset", "status", "media_file", "created_at")
+
+    def validate_direct(self, value: bool) -> bool:
+        if value and not supports_direct_uploads():
+            raise serializers.ValidationError("The media storage does not accept direct uploads.")
+        return value
+
+    def validate_size(self, value: int) -> int:
+        if value > MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(f"Uploads are limited to {MAX_UPLOAD_SIZE} bytes.")
+        return value
+
+    def get_upload(self, obj: UploadSession) -> dict | None:
+        """Presigned request for direct sessions; ``None`` for chunked ones."""
+        return presigned_upload(obj)
+
+    def get_expires_at(self, obj: UploadSession):
+        return expires_at(obj)
+
+    def get_max_chunk_size(self, obj: UploadSession) -> int:
+        return MAX_CHUNK_SIZE
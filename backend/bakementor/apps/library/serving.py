@@ -0,0 +1,227 @@
+"""Serving files from ``media_storage`` with Range and conditional support.
+
+The view resolves and validates the requested name, answers conditional
+requests itself, and then hands the byte transfer to the front server when
+``MEDIA_SENDFILE_BACKEND`` is configured:
+
+* ``"nginx"``: ``X-Accel-Redirect`` to ``MEDIA_ACCEL_REDIRECT_PREFIX``, which
+  must be an ``internal`` location aliased to ``MEDIA_ROOT``;
+* ``"sendfile"``: ``X-Sendfile`` with the absolute path (Apache
+  mod_xsendfile, lighttpd).
+
+Only names matching ``SERVED_NAME_RE`` are reachable: the content-addressed
+directories, the ``YYYY/MM/DD/`` paths of files assigned directly (admin
+uploads and older rows), and the template thumbnails and component
+previews, which live in the ``default`` storage. Access is by unguessable
+name, not by owner: media is embedded in published pages and in the public
+component manifest, so these URLs must load for anonymous visitors.
+Every response carries ``X-Content-Type-Options: nosniff``; anything but
+raster images, video and audio is sent as an attachment under a sandboxing
+CSP, so uploaded HTML or SVG never runs on the app origin.
+
+The front server then also handles ``Range``. Without a backend a full
+response is a ``FileResponse``, which WSGI servers send with ``sendfile(2)``
+via ``wsgi.file_wrapper``; a single byte range is streamed from an offset.
+Remote storages (S3-compatible) are never proxied: requests are redirected
+to the storage URL.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import re
+from dataclasses import dataclass
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import Storage, default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+from .models import media_storage
+
+# Names under these prefixes embed a content hash and never change.
+IMMUTABLE_PREFIXES = ("blobs/", "derivatives/", "previews/", "uploads/")
+# ``upload_to`` directories of image fields that use the default storage.
+DEFAULT_STORAGE_PREFIXES = ("template_thumbnails/", "component_previews/")
+SERVED_PREFIXES = IMMUTABLE_PREFIXES + DEFAULT_STORAGE_PREFIXES
+# ``SERVED_PREFIXES`` plus the dated paths of ``library.models.upload_to``.
+SERVED_NAME_PATTERN = rf"(?:{'|'.join(map(re.escape, SERVED_PREFIXES))}|\d{{4}}/\d{{2}}/\d{{2}}/)"
+SERVED_NAME_RE = re.compile(SERVED_NAME_PATTERN)
+INLINE_MIME_PREFIXES = ("image/", "video/", "audio/")
+# SVG is an image type but a document that can run script.
+ACTIVE_IMAGE_TYPES = frozenset({"image/svg+xml"})
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+DEFAULT_MAX_AGE = 60 * 60
+STREAM_BLOCK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+@dataclass(frozen=True)
+class ResolvedFile:
+    name: str
+    path: str
+    size: int
+    mtime: float
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.size:x}-{int(self.mtime * 1_000_000):x}"'
+
+
+def _check_name(name: str) -> None:
+    parts = name.split("/")
+    if not SERVED_NAME_RE.match(name) or any(not part or part.startswith(".") for part in parts):
+        # Hidden segments cover the ``.incoming`` staging area and ``..``.
+        raise Http404
+
+
+def storage_for(name: str) -> Storage:
+    if name.startswith(DEFAULT_STORAGE_PREFIXES):
+        return default_storage
+    return media_storage
+
+
+def is_local_storage(storage: Storage = media_storage) -> bool:
+    try:
+        storage.path("")
+    except NotImplementedError:
+        return False
+    return True
+
+
+def resolve(name: str) -> ResolvedFile:
+    """Map a URL name to a stored file, refusing hidden and out-of-root paths."""
+    _check_name(name)
+    try:
+        path = storage_for(name).path(name)
+    except (SuspiciousFileOperation, NotImplementedError):
+        raise Http404
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+    return ResolvedFile(name=name, path=path, size=stat.st_size, mtime=stat.st_mtime)
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None | bool:
+    """Return ``(start, end)`` inclusive for a single satisfiable range.
+
+    ``None`` means "serve the whole file" (no header, multiple ranges or a
+    malformed header); ``False`` means the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        return False
+    return start, end
+
+
+def _if_range_matches(request, resolved: ResolvedFile) -> bool:
+    condition = request.headers.get("If-Range")
+    if not condition:
+        return True
+    if condition.startswith('"') or condition.startswith("W/"):
+        return condition == resolved.etag
+    modified = parse_http_date_safe(condition)
+    return modified is not None and int(resolved.mtime) <= modified
+
+
+def _iter_range(path: str, start: int, length: int):
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        while length > 0:
+            data = fh.read(min(STREAM_BLOCK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def content_type_for(name: str) -> str:
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def is_inline_type(content_type: str) -> bool:
+    return content_type.startswith(INLINE_MIME_PREFIXES) and content_type not in ACTIVE_IMAGE_TYPES
+
+
+def _cache_headers(response: HttpResponse, resolved: ResolvedFile) -> HttpResponse:
+    response["X-Content-Type-Options"] = "nosniff"
+    if not is_inline_type(content_type_for(resolved.name)):
+        filename = quote(os.path.basename(resolved.name))
+        response["Content-Disposition"] = f"attachment; filename*=UTF-8''{filename}"
+        response["Content-Security-Policy"] = "sandbox"
+    response["ETag"] = resolved.etag
+    response["Last-Modified"] = http_date(int(resolved.mtime))
+    response["Accept-Ranges"] = "bytes"
+    if resolved.name.startswith(IMMUTABLE_PREFIXES):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=DEFAULT_MAX_AGE)
+    return response
+
+
+def build_response(request, name: str) -> HttpResponse:
+    storage = storage_for(name)
+    if not is_local_storage(storage):
+        _check_name(name)
+        return HttpResponseRedirect(storage.url(name))
+    resolved = resolve(name)
+    not_modified = get_conditional_response(
+        request, etag=resolved.etag, last_modified=int(resolved.mtime)
+    )
+    if not_modified is not None:
+        return _cache_headers(not_modified, resolved)
+
+    content_type = content_type_for(resolved.name)
+    backend = getattr(settings, "MEDIA_SENDFILE_BACKEND", "")
+    if backend == "nginx":
+        prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(resolved.name)
+        return _cache_headers(response, resolved)
+    if backend == "sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = resolved.path
+        return _cache_headers(response, resolved)
+
+    byte_range = None
+    if _if_range_matches(request, resolved):
+        byte_range = parse_range(request.headers.get("Range"), resolved.size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{resolved.size}"
+        return _cache_headers(response, resolved)
+    if byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        body = () if request.method == "HEAD" else _iter_range(resolved.path, start, length)
+        response = StreamingHttpResponse(body, status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{resolved.size}"
+        response["Content-Length"] = str(length)
+        return _cache_headers(response, resolved)
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type)
+        response["Content-Length"] = str(resolved.size)
+        return _cache_headers(response, resolved)
+    response = FileResponse(open(resolved.path, "rb"), content_type=content_type)
+    return _cache_headers(response, resolved)
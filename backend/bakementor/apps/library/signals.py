@@ -0,0 +1,29 @@
+"""Signal handlers for media reference counting and blob processing."""
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .blobs import queue_file_deletions, release_blob
+from .deletion import release_is_deferred
+from .models import MediaBlob, MediaFile
+from .tasks import schedule_blob_processing, schedule_file_deletions
+
+
+@receiver(post_delete, sender=MediaFile)
+def release_media_blob(sender, instance: MediaFile, **kwargs) -> None:
+    # Covers admin and queryset hard deletes; batched purges release in bulk.
+    if release_is_deferred():
+        return
+    if instance.blob_id:
+        if release_blob(instance.blob_id):
+            schedule_file_deletions()
+    elif instance.file.name:
+        queue_file_deletions([instance.file.name])
+        schedule_file_deletions()
+
+
+@receiver(post_save, sender=MediaBlob)
+def process_new_blob(sender, instance: MediaBlob, created: bool = False, raw: bool = False, **kwargs) -> None:
+    if created and not raw:
+        schedule_blob_processing([instance])
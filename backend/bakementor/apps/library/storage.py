@@ -0,0 +1,28 @@
+"""Storage backends for media that support direct uploads from clients."""
+from __future__ import annotations
+
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+
+
+class MediaS3Storage(S3Storage):
+    """S3-compatible storage (AWS, MinIO, ...) that can presign browser uploads."""
+
+    def presigned_upload(self, name: str, content_type: str, size: int, expires_in: int) -> dict:
+        """Return a form POST the client can send the file with, bypassing Django.
+
+        The policy pins the key, the exact byte count and the content type, so
+        the object cannot differ from what the upload session declared.
+        """
+        fields = {"Content-Type": content_type} if content_type else {}
+        conditions: list = [["content-length-range", size, size]]
+        if content_type:
+            conditions.append({"Content-Type": content_type})
+        post = self.bucket.meta.client.generate_presigned_post(
+            Bucket=self.bucket_name,
+            Key=self._normalize_name(clean_name(name)),
+            Fields=fields,
+            Conditions=conditions,
+            ExpiresIn=expires_in,
+        )
+        return {"method": "POST", "url": post["url"], "fields": post["fields"]}
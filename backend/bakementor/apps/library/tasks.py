@@ -1 +1,99 @@
-﻿"""Placeholder."""
+"""Celery tasks for media processing."""
+from __future__ import annotations
+
+from typing import Iterable
+
+from celery import group, shared_task
+
+from apps.common.tasks import dispatch_on_commit
+
+from .deletion import PURGE_BATCH_SIZE, delete_pending_files, purge_deleted
+from .direct import ingest_direct_upload
+from .derivatives import generate_eager_derivatives, supports_derivatives
+from .metadata import extract_metadata, record_metadata
+from .models import MediaBlob
+from .resumable import expire_stale_sessions
+
+
+def schedule_blob_processing(blobs: Iterable[MediaBlob]) -> None:
+    """Queue metadata extraction and derivatives for new blobs as one group, on commit."""
+    signatures = []
+    for blob in blobs:
+        signatures.append(extract_blob_metadata.si(str(blob.pk)))
+        if supports_derivatives(blob.mime_type):
+            signatures.append(generate_derivatives.si(str(blob.pk)))
+    if not signatures:
+        return
+
+    dispatch_on_commit(group(signatures))
+
+
+@shared_task(name="library.generate_derivatives")
+def generate_derivatives(blob_id: str) -> None:
+    """Render the eager responsive variants of a newly stored image."""
+    blob = MediaBlob.objects.filter(id=blob_id).first()
+    if blob is None:
+        return
+    generate_eager_derivatives(blob)
+
+
+@shared_task(name="library.extract_metadata")
+def extract_blob_metadata(blob_id: str) -> None:
+    """Extract dimensions, colour, placeholder and duration for a new blob."""
+    blob = MediaBlob.objects.filter(id=blob_id).first()
+    if blob is None:
+        return
+    extracted = extract_metadata(blob)
+    if extracted:
+        record_metadata(blob.pk, extracted)
+
+
+def schedule_direct_ingest(media_id) -> None:
+    """Queue hashing of a directly uploaded file once the current transaction commits."""
+    dispatch_on_commit(ingest_direct_upload_task, str(media_id))
+
+
+@shared_task(name="library.ingest_direct_upload")
+def ingest_direct_upload_task(media_id: str) -> None:
+    """Hash a file uploaded straight to storage and attach it to its blob."""
+    ingest_direct_upload(media_id)
+    # Duplicate content leaves the uploaded copy queued for removal.
+    schedule_file_deletions()
+
+
+@shared_task(name="library.expire_upload_sessions")
+def expire_upload_sessions() -> int:
+    """Abort resumable uploads that have been idle too long and free their staging files."""
+    return expire_stale_sessions()
+
+
+def schedule_media_purge(ids) -> None:
+    """Queue hard deletion of soft-deleted rows, one task per batch, on commit."""
+    ids = [str(pk) for pk in ids]
+    if not ids:
+        return
+    batches = [ids[start : start + PURGE_BATCH_SIZE] for start in range(0, len(ids), PURGE_BATCH_SIZE)]
+    dispatch_on_commit(group(purge_media_files.si(batch) for batch in batches))
+
+
+def schedule_file_deletions() -> None:
+    """Drain the pending file deletion queue once the current transaction commits."""
+    dispatch_on_commit(delete_stored_files)
+
+
+@shared_task(name="library.purge_media_files")
+def purge_media_files(ids: list[str] | None = None) -> int:
+    """Hard-delete soft-deleted media (all of it when ``ids`` is omitted)."""
+    purged = purge_deleted(ids)
+    if purged:
+        schedule_file_deletions()
+    return purged
+
+
+@shared_task(name="library.delete_stored_files", bind=True, max_retries=6)
+def delete_stored_files(self) -> int:
+    """Unlink files queued in PendingFileDeletion, retrying with backoff on failures."""
+    deleted, failed = delete_pending_files()
+    if failed:
+        raise self.retry(countdown=60 * 2**self.request.retries)
+    return deleted
@@ -0,0 +1,29 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import override_settings
+
+from apps.library.models import media_storage
+
+# Run queued processing inline, for tests that assert on its results.
+eager_tasks = override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+
+
+def _reset_storage_paths():
+    for attr in ("base_location", "location"):
+        media_storage.__dict__.pop(attr, None)
+
+
+class TemporaryMediaRootMixin:
+    """Point ``media_storage`` at a throwaway directory for the test."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        _reset_storage_paths()
+        patcher = mock.patch.object(media_storage, "_location", self.media_root)
+        patcher.start()
+        self.addCleanup(_reset_storage_paths)
+        self.addCleanup(patcher.stop)
@@ -0,0 +1,76 @@
+import hashlib
+import io
+import os
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient, APITestCase
+
+from apps.library.models import MediaBlob, MediaFile
+
+from .mixins import TemporaryMediaRootMixin, eager_tasks
+
+User = get_user_model()
+
+
+def _png(seed):
+    buffer = io.BytesIO()
+    Image.new("RGB", (24, 16), (seed % 256, 40, 90)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@eager_tasks
+class BatchUploadTests(TemporaryMediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(email="staff@example.com", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def _batch(self, contents, **kwargs):
+        files = [SimpleUploadedFile(f"photo-{i}.png", data, content_type="image/png") for i, data in enumerate(contents)]
+        return self.client.post(reverse("media-batch"), {"files": files}, format="multipart", **kwargs)
+
+    def test_batch_creates_rows_and_shares_duplicate_blobs(self):
+        existing = self._batch([_png(1)])
+        self.assertEqual(existing.status_code, 201)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self._batch([_png(1), _png(2), _png(2), _png(3)])
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual([item["title"] for item in res.data], ["photo-0.png", "photo-1.png", "photo-2.png", "photo-3.png"])
+        self.assertEqual(MediaFile.objects.count(), 5)
+        self.assertEqual(
+            sorted(MediaBlob.objects.values_list("ref_count", flat=True)),
+            [1, 2, 2],
+        )
+        # Post-processing ran for the new blobs via the group.
+        new_hashes = [hashlib.sha256(_png(seed)).hexdigest() for seed in (2, 3)]
+        for blob in MediaBlob.objects.filter(sha256__in=new_hashes):
+            self.assertEqual(blob.metadata["width"], 24)
+            self.assertEqual(blob.derivatives["width"], 24)
+
+    def test_failed_row_insert_drops_the_blob_references(self):
+        self._batch([_png(1)])
+        with mock.patch.object(MediaFile.objects, "bulk_create", side_effect=DatabaseError("boom")):
+            with self.assertRaises(DatabaseError):
+                self._batch([_png(1), _png(2)])
+        self.assertEqual(list(MediaBlob.objects.values_list("ref_count", flat=True)), [1])
+        stored = [name for _, _, names in os.walk(os.path.join(self.media_root, "blobs")) for name in names]
+        self.assertEqual(stored, [os.path.basename(MediaBlob.objects.get().file.name)])
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self._batch([_png(i) for i in range(2)])
+        with CaptureQueriesContext(connection) as large:
+            self._batch([_png(i) for i in range(10, 30)])
+        self.assertEqual(len(large), len(small))
+
+    def test_empty_batch_is_rejected(self):
+        res = self.client.post(reverse("media-batch"), {}, format="multipart")
+        self.assertEqual(res.status_code, 400)
@@ -0,0 +1,116 @@
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient, APITestCase
+
+from apps.library.blobs import queue_file_deletions
+from apps.library.deletion import delete_pending_files, purge_deleted, soft_delete
+from apps.library.models import MediaBlob, MediaFile, MediaType, PendingFileDeletion, media_storage
+
+from .mixins import TemporaryMediaRootMixin, eager_tasks
+
+User = get_user_model()
+
+
+def _png(seed):
+    buffer = io.BytesIO()
+    Image.new("RGB", (24, 16), (seed % 256, 40, 90)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@eager_tasks
+class BulkDeleteTests(TemporaryMediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(email="staff@example.com", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def _upload(self, seed):
+        res = self.client.post(
+            reverse("media-upload"),
+            {"file": SimpleUploadedFile(f"photo-{seed}.png", _png(seed), content_type="image/png")},
+            format="multipart",
+        )
+        self.assertEqual(res.status_code, 201)
+        return res.data["id"]
+
+    def test_bulk_delete_hides_rows_before_the_purge_runs(self):
+        ids = [self._upload(seed) for seed in range(3)]
+
+        res = self.client.post(reverse("media-bulk-delete"), {"ids": ids[:2]}, format="json")
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(res.data, {"deleted": 2})
+        listed = self.client.get(reverse("media-list")).data["results"]
+        self.assertEqual([item["id"] for item in listed], [ids[2]])
+        # Rows and files remain until the purge task runs.
+        self.assertEqual(MediaFile.objects.deleted().count(), 2)
+        self.assertEqual(MediaBlob.objects.count(), 3)
+
+    def test_bulk_delete_purges_rows_and_files_on_commit(self):
+        ids = [self._upload(seed) for seed in range(2)]
+        names = list(MediaBlob.objects.values_list("file", flat=True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(reverse("media-bulk-delete"), {"ids": ids}, format="json")
+        self.assertEqual(res.status_code, 202)
+        self.assertFalse(MediaFile.objects.exists())
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(PendingFileDeletion.objects.exists())
+        for name in names:
+            self.assertFalse(media_storage.exists(name))
+
+    def test_bulk_delete_only_touches_visible_files(self):
+        foreign = self._upload(1)
+        uploader = User.objects.create_user(email="user@example.com", password="pass")
+        with mock.patch.object(User, "has_perm", return_value=True):
+            self.client.force_authenticate(uploader)
+            res = self.client.post(reverse("media-bulk-delete"), {"ids": [foreign]}, format="json")
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(res.data, {"deleted": 0})
+        self.assertFalse(MediaFile.objects.get(pk=foreign).is_deleted)
+
+
+class PurgeTests(TemporaryMediaRootMixin, TestCase):
+    def _media(self, blob, **kwargs):
+        return MediaFile.objects.create(
+            title="photo", file=blob.file.name, blob=blob, media_type=MediaType.IMAGE, **kwargs
+        )
+
+    def test_purge_releases_references_in_bulk(self):
+        shared = MediaBlob.objects.create(sha256="a" * 64, file="blobs/aa/shared.png", size=1, ref_count=3)
+        single = MediaBlob.objects.create(sha256="b" * 64, file="blobs/bb/single.png", size=1, ref_count=1)
+        rows = [self._media(shared), self._media(shared), self._media(shared), self._media(single)]
+
+        soft_delete(MediaFile.objects.filter(pk__in=[rows[0].pk, rows[1].pk, rows[3].pk]))
+        self.assertEqual(purge_deleted(batch_size=2), 3)
+
+        shared.refresh_from_db()
+        self.assertEqual(shared.ref_count, 1)
+        self.assertFalse(MediaBlob.objects.filter(pk=single.pk).exists())
+        self.assertEqual(list(PendingFileDeletion.objects.values_list("name", flat=True)), ["blobs/bb/single.png"])
+        self.assertEqual(list(MediaFile.objects.values_list("pk", flat=True)), [rows[2].pk])
+
+    def test_failed_deletions_stay_queued_with_the_error(self):
+        queue_file_deletions(["blobs/aa/broken.png"])
+        storage = mock.Mock()
+        storage.delete.side_effect = OSError("disk unavailable")
+
+        self.assertEqual(delete_pending_files(storage=storage), (0, 1))
+        pending = PendingFileDeletion.objects.get()
+        self.assertEqual(pending.attempts, 1)
+        self.assertIn("disk unavailable", pending.last_error)
+
+    def test_names_referenced_again_are_not_deleted(self):
+        blob = MediaBlob.objects.create(sha256="c" * 64, file="blobs/cc/reused.png", size=1, ref_count=1)
+        queue_file_deletions([blob.file.name, "blobs/dd/orphan.png"])
+        storage = mock.Mock()
+
+        self.assertEqual(delete_pending_files(storage=storage), (2, 0))
+        storage.delete.assert_called_once_with("blobs/dd/orphan.png")
+        self.assertFalse(PendingFileDeletion.objects.exists())
@@ -0,0 +1,96 @@
+import io
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient, APITestCase
+
+from apps.library.derivatives import derivative_name
+from apps.library.models import MediaBlob, MediaFile
+
+from .mixins import TemporaryMediaRootMixin, eager_tasks
+
+User = get_user_model()
+
+
+def _jpeg(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 80, 40)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@eager_tasks
+class DerivativeTests(TemporaryMediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(email="staff@example.com", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def _upload(self, content):
+        upload = SimpleUploadedFile("photo.jpg", content, content_type="image/jpeg")
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(reverse("media-upload"), {"file": upload}, format="multipart")
+        self.assertEqual(res.status_code, 201)
+        return MediaFile.objects.select_related("blob").get(id=res.data["id"])
+
+    def test_common_widths_are_rendered_eagerly(self):
+        media = self._upload(_jpeg(1400, 700))
+        derivatives = media.blob.derivatives
+        self.assertEqual((derivatives["width"], derivatives["height"]), (1400, 700))
+        self.assertEqual(sorted(derivatives["variants"]["webp"], key=int), ["320", "640", "1280"])
+        with Image.open(os.path.join(self.media_root, derivatives["variants"]["webp"]["640"])) as image:
+            self.assertEqual((image.format, image.size), ("WEBP", (640, 320)))
+
+    def test_srcset_links_missing_widths_to_the_lazy_endpoint(self):
+        media = self._upload(_jpeg(1400, 700))
+        res = self.client.get(reverse("media-detail", args=[media.pk]))
+        srcset = res.data["srcset"]["webp"]
+        self.assertEqual(list(srcset), ["160", "320", "480", "640", "960", "1280"])
+        self.assertIn("/media/derivatives/", srcset["640"])
+        lazy = reverse("media-derivative", kwargs={"sha256": media.blob.sha256, "width": 480, "fmt": "webp"})
+        self.assertTrue(srcset["480"].endswith(lazy))
+
+    def test_lazy_variant_is_rendered_once_and_recorded(self):
+        media = self._upload(_jpeg(1400, 700))
+        self.client.force_authenticate(None)
+        url = reverse("media-derivative", kwargs={"sha256": media.blob.sha256, "width": 480, "fmt": "webp"})
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 302)
+        name = derivative_name(media.blob.sha256, 480, "webp")
+        self.assertTrue(res["Location"].endswith(name))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+        self.assertEqual(MediaBlob.objects.get().derivatives["variants"]["webp"]["480"], name)
+
+    def test_unknown_widths_and_narrow_originals(self):
+        media = self._upload(_jpeg(300, 200))
+        self.assertEqual(media.blob.derivatives["variants"]["webp"], {})
+        sha = media.blob.sha256
+        res = self.client.get(reverse("media-derivative", kwargs={"sha256": sha, "width": 333, "fmt": "webp"}))
+        self.assertEqual(res.status_code, 404)
+        res = self.client.get(reverse("media-derivative", kwargs={"sha256": sha, "width": 640, "fmt": "webp"}))
+        self.assertEqual(res.status_code, 302)
+        self.assertTrue(res["Location"].endswith(media.blob.file.name))
+
+    def test_skipped_types_redirect_to_the_original(self):
+        gif = io.BytesIO()
+        Image.new("RGB", (1400, 700)).save(gif, format="GIF")
+        upload = SimpleUploadedFile("anim.gif", gif.getvalue(), content_type="image/gif")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("media-upload"), {"file": upload}, format="multipart")
+        blob = MediaBlob.objects.get()
+        self.client.force_authenticate(None)
+        url = reverse("media-derivative", kwargs={"sha256": blob.sha256, "width": 480, "fmt": "webp"})
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 302)
+        self.assertTrue(res["Location"].endswith(blob.file.name))
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, derivative_name(blob.sha256, 480, "webp"))))
+
+    def test_variants_are_deleted_with_the_blob(self):
+        media = self._upload(_jpeg(1400, 700))
+        path = os.path.join(self.media_root, media.blob.derivatives["variants"]["webp"]["320"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("media-detail", args=[media.pk]))
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,193 @@
+import base64
+import hashlib
+import json
+import unittest
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from apps.library.models import MediaBlob, MediaFile, PendingFileDeletion, UploadSession, media_storage
+
+from .mixins import TemporaryMediaRootMixin, eager_tasks
+
+try:
+    from botocore.stub import Stubber
+
+    from apps.library.storage import MediaS3Storage
+except ImportError:  # boto3 and django-storages are only needed for MEDIA_STORAGE_BACKEND=s3
+    MediaS3Storage = None
+
+User = get_user_model()
+
+CONTENT = b"%PDF-1.7\n" + bytes(range(256)) * 16
+
+
+def _presigned_upload(name, content_type, size, expires_in):
+    """Stand-in for an S3-compatible backend's presigned POST."""
+    return {"method": "POST", "url": "https://storage.test/media", "fields": {"key": name, "Content-Type": content_type}}
+
+
+@eager_tasks
+class DirectUploadTests(TemporaryMediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(email="staff@example.com", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        patcher = mock.patch.object(media_storage, "presigned_upload", _presigned_upload, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _create(self, size=len(CONTENT)):
+        res = self.client.post(
+            reverse("media-upload-session-list"),
+            {"filename": "Guide.PDF", "content_type": "application/pdf", "size": size, "title": "Guide", "direct": True},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 201)
+        return res.data
+
+    def _send_to_storage(self, session, content=CONTENT):
+        # What the client does with the presigned request.
+        media_storage.save(session["upload"]["fields"]["key"], ContentFile(content))
+
+    def _finalize(self, session_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse("media-upload-session-finalize", args=[session_id]))
+
+    def test_presigned_upload_is_finalized_into_a_deduplicated_media_file(self):
+        session = self._create()
+        key = session["upload"]["fields"]["key"]
+        self.assertRegex(key, r"^uploads/[0-9a-f]{32}\.pdf$")
+        self._send_to_storage(session)
+
+        res = self._finalize(session["id"])
+        self.assertEqual(res.status_code, 201)
+        media = MediaFile.objects.select_related("blob").get(id=res.data["id"])
+        self.assertEqual(media.blob.sha256, hashlib.sha256(CONTENT).hexdigest())
+        self.assertEqual(media.file.name, key)
+        self.assertEqual((media.title, media.mime_type, media.size), ("Guide", "application/pdf", len(CONTENT)))
+        self.assertIsNone(self.client.get(reverse("media-upload-session-detail", args=[session["id"]])).data["upload"])
+
+        again = self._create()
+        self._send_to_storage(again)
+        res = self._finalize(again["id"])
+        duplicate = MediaFile.objects.get(id=res.data["id"])
+        self.assertEqual(duplicate.blob_id, media.blob_id)
+        self.assertEqual(MediaBlob.objects.get().ref_count, 2)
+        self.assertFalse(media_storage.exists(again["upload"]["fields"]["key"]))
+        self.assertFalse(PendingFileDeletion.objects.exists())
+
+    def test_finalize_before_the_object_is_complete_conflicts(self):
+        session = self._create()
+        self._send_to_storage(session, CONTENT[:100])
+
+        res = self._finalize(session["id"])
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(res.data["offset"], 100)
+        self.assertFalse(MediaFile.objects.exists())
+
+    def test_direct_sessions_do_not_accept_chunks(self):
+        session = self._create()
+        res = self.client.patch(
+            reverse("media-upload-session-detail", args=[session["id"]]),
+            data=CONTENT,
+            content_type="application/offset+octet-stream",
+            HTTP_UPLOAD_OFFSET="0",
+        )
+        self.assertEqual(res.status_code, 400)
+
+    def test_aborting_queues_the_uploaded_object_for_deletion(self):
+        session = self._create()
+        self.client.delete(reverse("media-upload-session-detail", args=[session["id"]]))
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.Status.ABORTED)
+        self.assertEqual(PendingFileDeletion.objects.get().name, session["upload"]["fields"]["key"])
+
+
+class DirectUploadUnsupportedTests(TemporaryMediaRootMixin, APITestCase):
+    def test_filesystem_storage_rejects_direct_sessions(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email="staff@example.com", password="pass", is_staff=True))
+        res = client.post(
+            reverse("media-upload-session-list"),
+            {"filename": "guide.pdf", "size": 10, "direct": True},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("direct", res.data)
+
+
+def _s3_storage():
+    """The configured S3 backend pointed at a MinIO-style endpoint; requests are stubbed."""
+    options = {
+        **settings.MEDIA_STORAGES["s3"]["OPTIONS"],
+        "bucket_name": "bakementor-media",
+        "endpoint_url": "http://minio.test:9000",
+        "region_name": "us-east-1",
+        "access_key": "minioadmin",
+        "secret_key": "minioadmin",
+    }
+    return MediaS3Storage(**options)
+
+
+@unittest.skipIf(MediaS3Storage is None, "boto3 and django-storages are not installed")
+class MediaS3StorageTests(SimpleTestCase):
+    def test_presigned_post_pins_key_size_and_type(self):
+        upload = _s3_storage().presigned_upload("uploads/abc.pdf", "application/pdf", 1234, 600)
+        self.assertEqual((upload["method"], upload["url"]), ("POST", "http://minio.test:9000/bakementor-media"))
+        fields = upload["fields"]
+        self.assertEqual((fields["key"], fields["Content-Type"]), ("uploads/abc.pdf", "application/pdf"))
+        conditions = json.loads(base64.b64decode(fields["policy"]))["conditions"]
+        self.assertIn(["content-length-range", 1234, 1234], conditions)
+        self.assertIn({"Content-Type": "application/pdf"}, conditions)
+        self.assertIn({"key": "uploads/abc.pdf"}, conditions)
+        self.assertIn({"bucket": "bakementor-media"}, conditions)
+
+
+@unittest.skipIf(MediaS3Storage is None, "boto3 and django-storages are not installed")
+class S3DirectUploadTests(APITestCase):
+    def setUp(self):
+        self.storage = _s3_storage()
+        patcher = mock.patch("apps.library.direct.media_storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.stubber = Stubber(self.storage.connection.meta.client)
+        self.stubber.activate()
+        self.addCleanup(self.stubber.deactivate)
+        self.client = APIClient()
+        staff = User.objects.create_user(email="staff@example.com", password="pass", is_staff=True)
+        self.client.force_authenticate(staff)
+
+    def _head(self, key, size):
+        expected = {"Bucket": "bakementor-media", "Key": key}
+        # ``exists`` and ``size`` each issue a HEAD.
+        self.stubber.add_response("head_object", {"ContentLength": size}, expected)
+        self.stubber.add_response("head_object", {"ContentLength": size}, expected)
+
+    def test_session_is_finalized_once_the_bucket_holds_the_whole_object(self):
+        res = self.client.post(
+            reverse("media-upload-session-list"),
+            {"filename": "guide.pdf", "content_type": "application/pdf", "size": len(CONTENT), "direct": True},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 201)
+        key = res.data["upload"]["fields"]["key"]
+        self.assertTrue(res.data["upload"]["url"].startswith("http://minio.test:9000/"))
+        finalize_url = reverse("media-upload-session-finalize", args=[res.data["id"]])
+
+        self.stubber.add_client_error(
+            "head_object", http_status_code=404, expected_params={"Bucket": "bakementor-media", "Key": key}
+        )
+        self.assertEqual(self.client.post(finalize_url).data["offset"], 0)
+        self._head(key, 100)
+        self.assertEqual(self.client.post(finalize_url).status_code, 409)
+        self._head(key, len(CONTENT))
+        res = self.client.post(finalize_url)
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(MediaFile.objects.get(id=res.data["id"]).file.name, key)
+        self.stubber.assert_no_pending_responses()
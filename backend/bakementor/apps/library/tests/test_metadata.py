@@ -0,0 +1,81 @@
+import io
+import struct
+import wave
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient, APITestCase
+
+from apps.library.models import MediaFile
+
+from .mixins import TemporaryMediaRootMixin, eager_tasks
+
+User = get_user_model()
+
+
+def _jpeg(width, height, color=(200, 80, 40), orientation=None):
+    buffer = io.BytesIO()
+    image = Image.new("RGB", (width, height), color)
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(buffer, format="JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+def _box(kind, payload):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _mp4(duration_ms):
+    mvhd = _box(b"mvhd", b"\x00\x00\x00\x00" + struct.pack(">IIII", 0, 0, 1000, duration_ms) + b"\x00" * 80)
+    return _box(b"ftyp", b"isom\x00\x00\x02\x00isom") + _box(b"moov", mvhd) + _box(b"mdat", b"\x00" * 32)
+
+
+def _wav(seconds, rate=8000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(1)
+        writer.setframerate(rate)
+        writer.writeframes(b"\x80" * rate * seconds)
+    return buffer.getvalue()
+
+
+@eager_tasks
+class MetadataExtractionTests(TemporaryMediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(email="staff@example.com", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def _upload(self, content, name):
+        upload = SimpleUploadedFile(name, content, content_type="application/octet-stream")
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(reverse("media-upload"), {"file": upload}, format="multipart")
+        self.assertEqual(res.status_code, 201)
+        return MediaFile.objects.get(id=res.data["id"])
+
+    def test_image_dimensions_color_and_placeholder(self):
+        media = self._upload(_jpeg(400, 200, orientation=6), "photo.jpg")
+        metadata = media.metadata
+        self.assertEqual((metadata["width"], metadata["height"], metadata["orientation"]), (200, 400, 6))
+        red, green, blue = (int(metadata["dominant_color"][i : i + 2], 16) for i in (1, 3, 5))
+        self.assertTrue(abs(red - 200) < 8 and abs(green - 80) < 8 and abs(blue - 40) < 8)
+        self.assertTrue(metadata["placeholder"].startswith("data:image/webp;base64,"))
+        self.assertLess(len(metadata["placeholder"]), 400)
+
+    def test_durations(self):
+        self.assertEqual(self._upload(_mp4(2500), "clip.mp4").metadata, {"duration": 2.5})
+        self.assertEqual(self._upload(_wav(2), "tone.wav").metadata, {"duration": 2.0})
+
+    def test_reupload_copies_metadata_without_a_task(self):
+        first = self._upload(_jpeg(64, 32), "a.jpg")
+        with mock.patch("apps.library.signals.schedule_blob_processing") as schedule:
+            second = self._upload(_jpeg(64, 32), "b.jpg")
+        schedule.assert_not_called()
+        self.assertEqual(second.metadata, first.metadata)
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from apps.common import pagination
+from apps.library.models import MediaFile, MediaType
+
+User = get_user_model()
+
+
+class MediaLibraryPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(email="staff@example.com", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        now = timezone.now()
+        rows = [
+            MediaFile(
+                title=f"file-{i}",
+                file=f"2025/01/01/media_{i}.png",
+                media_type=MediaType.IMAGE if i % 2 else MediaType.DOCUMENT,
+                uploaded_by=self.staff,
+            )
+            for i in range(25)
+        ]
+        MediaFile.objects.bulk_create(rows)
+        for i, row in enumerate(rows):
+            MediaFile.objects.filter(pk=row.pk).update(created_at=now - timedelta(minutes=i))
+        self.titles = [row.title for row in rows]
+
+    def _walk(self, url, params):
+        titles, pages = [], 0
+        while url:
+            res = self.client.get(url, params if pages == 0 else None)
+            self.assertEqual(res.status_code, 200)
+            titles += [item["title"] for item in res.data["results"]]
+            url = res.data["next"]
+            pages += 1
+        return titles, pages, res.data
+
+    def test_cursor_pages_cover_the_library_newest_first(self):
+        titles, pages, last = self._walk(reverse("media-list"), {"page_size": 10})
+        self.assertEqual(titles, self.titles)
+        self.assertEqual(pages, 3)
+        self.assertEqual((last["count"], last["count_is_exact"]), (25, True))
+
+    def test_filters_apply_to_pages_and_count(self):
+        titles, _, last = self._walk(reverse("media-list"), {"page_size": 5, "media_type": "image"})
+        self.assertEqual(titles, [title for i, title in enumerate(self.titles) if i % 2])
+        self.assertEqual(last["count"], 12)
+
+    def test_deep_pages_cost_the_same_queries(self):
+        first = self.client.get(reverse("media-list"), {"page_size": 5})
+        with CaptureQueriesContext(connection) as shallow:
+            self.client.get(first.data["next"])
+        url = first.data["next"]
+        for _ in range(3):
+            url = self.client.get(url).data["next"]
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(url)
+        self.assertEqual(len(deep), len(shallow))
+        # The total is cached across pages rather than recounted.
+        self.assertFalse(any("COUNT(" in query["sql"] for query in deep))
+
+    def test_large_results_report_the_planner_estimate(self):
+        with mock.patch.object(pagination, "_planner_estimate", return_value=2_500_000):
+            res = self.client.get(reverse("media-list"))
+        self.assertEqual((res.data["count"], res.data["count_is_exact"]), (2_500_000, False))
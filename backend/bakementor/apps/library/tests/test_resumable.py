@@ -0,0 +1,144 @@
+import hashlib
+import io
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from apps.library import resumable
+from apps.library.models import MediaBlob, MediaFile, UploadSession
+
+from .mixins import TemporaryMediaRootMixin
+
+User = get_user_model()
+
+CONTENT = b"\x00\x00\x00\x18ftypmp42" + bytes(range(256)) * 40
+
+
+class ResumableUploadTests(TemporaryMediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(email="staff@example.com", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.addCleanup(resumable._hashers.clear)
+
+    def _create(self, size=len(CONTENT)):
+        res = self.client.post(
+            reverse("media-upload-session-list"),
+            {"filename": "clip.mp4", "size": size, "title": "Clip"},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 201)
+        return res.data["id"]
+
+    def _append(self, session_id, offset, data):
+        return self.client.patch(
+            reverse("media-upload-session-detail", args=[session_id]),
+            data=data,
+            content_type="application/offset+octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def _finalize(self, session_id):
+        return self.client.post(reverse("media-upload-session-finalize", args=[session_id]))
+
+    def test_chunks_are_appended_and_finalized_into_a_media_file(self):
+        session_id = self._create()
+        res = self._append(session_id, 0, CONTENT[:4000])
+        self.assertEqual((res.status_code, res["Upload-Offset"]), (200, "4000"))
+        res = self._append(session_id, 4000, CONTENT[4000:])
+        self.assertEqual(res.data["offset"], len(CONTENT))
+
+        res = self._finalize(session_id)
+        self.assertEqual(res.status_code, 201)
+        media = MediaFile.objects.select_related("blob").get(id=res.data["id"])
+        self.assertEqual(media.blob.sha256, hashlib.sha256(CONTENT).hexdigest())
+        self.assertEqual((media.title, media.mime_type, media.size), ("Clip", "video/mp4", len(CONTENT)))
+        with media.file.open("rb") as fh:
+            self.assertEqual(fh.read(), CONTENT)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, ".incoming", f"{session_id}.part")))
+
+        again = self._finalize(session_id)
+        self.assertEqual((again.status_code, again.data["id"]), (200, res.data["id"]))
+
+    def test_remote_storage_stages_chunks_in_the_local_staging_root(self):
+        staging_root = os.path.join(self.media_root, "staging")
+        with mock.patch("apps.library.uploads.incoming_directory", return_value=None), override_settings(
+            MEDIA_UPLOAD_STAGING_ROOT=staging_root
+        ):
+            session_id = self._create()
+            self.assertEqual(os.listdir(staging_root), [f"{session_id}.part"])
+            self._append(session_id, 0, CONTENT)
+            self.assertEqual(self._finalize(session_id).status_code, 201)
+            self.assertEqual(os.listdir(staging_root), [])
+
+    def test_chunk_bytes_are_read_outside_the_claiming_transaction(self):
+        session = UploadSession.objects.get(pk=self._create())
+        outer_blocks = len(connection.atomic_blocks)
+        seen = []
+
+        class SlowClient(io.BytesIO):
+            def read(inner, size=-1):
+                seen.append(len(connection.atomic_blocks))
+                if len(seen) == 1:
+                    # A second request for the same offset is turned away meanwhile.
+                    with self.assertRaises(resumable.OffsetMismatch):
+                        resumable.append_chunk(session, 0, io.BytesIO(CONTENT[:10]), 10)
+                return super().read(size)
+
+        session = resumable.append_chunk(session, 0, SlowClient(CONTENT[:1000]), 1000)
+        self.assertEqual(set(seen), {outer_blocks})
+        session.refresh_from_db()
+        self.assertEqual((session.offset, session.chunk_claimed_until), (1000, None))
+
+    def test_resume_after_offset_mismatch_and_lost_hash_state(self):
+        session_id = self._create()
+        self._append(session_id, 0, CONTENT[:1000])
+        res = self._append(session_id, 500, CONTENT[500:2000])
+        self.assertEqual((res.status_code, res.data["offset"]), (409, 1000))
+
+        head = self.client.head(reverse("media-upload-session-detail", args=[session_id]))
+        self.assertEqual(head["Upload-Offset"], "1000")
+        # The next chunk lands on a "different worker" with no running hash.
+        resumable._hashers.clear()
+        self._append(session_id, 1000, CONTENT[1000:])
+        self.assertEqual(self._finalize(session_id).status_code, 201)
+        self.assertEqual(MediaFile.objects.get().blob.sha256, hashlib.sha256(CONTENT).hexdigest())
+
+    def test_incomplete_and_oversized_chunks_are_rejected(self):
+        session_id = self._create(size=10)
+        self.assertEqual(self._append(session_id, 0, b"x" * 11).status_code, 400)
+        self._append(session_id, 0, b"x" * 4)
+        res = self._finalize(session_id)
+        self.assertEqual((res.status_code, res.data["offset"]), (409, 4))
+
+    def test_abort_and_expiry_remove_staging_files(self):
+        aborted = self._create()
+        self.assertEqual(self.client.delete(reverse("media-upload-session-detail", args=[aborted])).status_code, 204)
+        stale = self._create()
+        UploadSession.objects.filter(id=stale).update(updated_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(resumable.expire_stale_sessions(), 1)
+        self.assertEqual(
+            set(UploadSession.objects.values_list("status", flat=True)), {UploadSession.Status.ABORTED}
+        )
+        self.assertEqual(os.listdir(os.path.join(self.media_root, ".incoming")), [])
+
+    def test_largest_accepted_upload_fits_the_size_columns(self):
+        blob = MediaBlob.objects.create(sha256="0" * 64, file="blobs/00/big.mp4", size=resumable.MAX_UPLOAD_SIZE)
+        media = MediaFile.objects.create(file=blob.file.name, blob=blob, size=resumable.MAX_UPLOAD_SIZE)
+        self.assertEqual(MediaFile.objects.get(pk=media.pk).size, resumable.MAX_UPLOAD_SIZE)
+        self.assertEqual(MediaBlob.objects.get(pk=blob.pk).size, resumable.MAX_UPLOAD_SIZE)
+
+    def test_sessions_are_private_to_their_owner(self):
+        session_id = self._create()
+        other = User.objects.create_user(email="other@example.com", password="pass", is_staff=True)
+        self.client.force_authenticate(other)
+        res = self.client.get(reverse("media-upload-session-detail", args=[session_id]))
+        self.assertEqual(res.status_code, 404)
@@ -0,0 +1,95 @@
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.library.models import media_storage
+from apps.library.serving import parse_range
+
+from .mixins import TemporaryMediaRootMixin
+
+CONTENT = bytes(range(256)) * 4
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_forms(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=50-500", 100), (50, 99))
+        self.assertIs(parse_range("bytes=100-", 100), False)
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertIsNone(parse_range(None, 100))
+
+
+class ServeMediaTests(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.name = media_storage.save("blobs/ab/clip.mp4", ContentFile(CONTENT))
+        self.url = f"/media/{self.name}"
+
+    def test_full_response_streams_the_file(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b"".join(res.streaming_content), CONTENT)
+        self.assertEqual(res["Content-Type"], "video/mp4")
+        self.assertEqual(res["Accept-Ranges"], "bytes")
+        self.assertIn("immutable", res["Cache-Control"])
+        self.assertEqual(res["X-Content-Type-Options"], "nosniff")
+        self.assertFalse(res.get("Content-Disposition", "").startswith("attachment"))
+
+    def test_active_content_is_downloaded_in_a_sandbox(self):
+        for filename in ("page.html", "icon.svg", "notes.bin"):
+            name = media_storage.save(f"blobs/cd/{filename}", ContentFile(b"<script>alert(1)</script>"))
+            res = self.client.get(f"/media/{name}")
+            self.assertEqual(res.status_code, 200)
+            self.assertTrue(res["Content-Disposition"].startswith("attachment;"))
+            self.assertEqual(res["Content-Security-Policy"], "sandbox")
+            self.assertEqual(res["X-Content-Type-Options"], "nosniff")
+
+    def test_range_and_conditional_requests(self):
+        res = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(res["Content-Range"], f"bytes 10-19/{len(CONTENT)}")
+        self.assertEqual(b"".join(res.streaming_content), CONTENT[10:20])
+
+        etag = res["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        stale = self.client.get(self.url, HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"other"')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE=f"bytes={len(CONTENT)}-").status_code, 416)
+
+    @override_settings(MEDIA_SENDFILE_BACKEND="nginx", MEDIA_ACCEL_REDIRECT_PREFIX="/protected-media/")
+    def test_transfer_is_delegated_to_nginx(self):
+        res = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["X-Accel-Redirect"], f"/protected-media/{self.name}")
+        self.assertEqual(res.content, b"")
+
+    @override_settings(MEDIA_SENDFILE_BACKEND="sendfile")
+    def test_transfer_is_delegated_with_x_sendfile(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res["X-Sendfile"], media_storage.path(self.name))
+
+    def test_dated_uploads_and_default_storage_images_are_served(self):
+        dated = media_storage.save("2025/10/03/media_ab12cd34ef56a789.html", ContentFile(b"<p>hi</p>"))
+        res = self.client.get(f"/media/{dated}")
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res["Content-Disposition"].startswith("attachment;"))
+        self.assertNotIn("immutable", res["Cache-Control"])
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            for prefix in ("template_thumbnails", "component_previews"):
+                name = default_storage.save(f"{prefix}/hero.png", ContentFile(CONTENT))
+                res = self.client.get(f"/media/{name}")
+                self.assertEqual(res.status_code, 200)
+                self.assertEqual(res["Content-Type"], "image/png")
+                self.assertEqual(res["X-Content-Type-Options"], "nosniff")
+
+    def test_hidden_and_missing_paths_are_not_served(self):
+        media_storage.save(".incoming/partial.part", ContentFile(b"secret"))
+        self.assertEqual(self.client.get("/media/.incoming/partial.part").status_code, 404)
+        self.assertEqual(self.client.get("/media/blobs/../.incoming/partial.part").status_code, 404)
+        self.assertEqual(self.client.get("/media/blobs/missing.bin").status_code, 404)
+        media_storage.save("exports/report.csv", ContentFile(b"private"))
+        self.assertEqual(self.client.get("/media/exports/report.csv").status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
@@ -0,0 +1,136 @@
+import hashlib
+import os
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from apps.library.models import MediaBlob, MediaFile, media_storage
+from apps.library.uploads import INCOMING_DIR, HashedUploadedFile, sniff_mime_type
+
+from .mixins import TemporaryMediaRootMixin, eager_tasks
+
+User = get_user_model()
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 256
+
+
+class SniffMimeTypeTests(SimpleTestCase):
+    def test_known_signatures(self):
+        self.assertEqual(sniff_mime_type(PNG_BYTES), "image/png")
+        self.assertEqual(sniff_mime_type(b"RIFF\x00\x00\x00\x00WEBPVP8 "), "image/webp")
+        self.assertEqual(sniff_mime_type(b"\x00\x00\x00\x18ftypmp42"), "video/mp4")
+        self.assertEqual(sniff_mime_type(b"%PDF-1.7"), "application/pdf")
+        self.assertIsNone(sniff_mime_type(b"hello world"))
+
+
+class StreamingUploadTests(TemporaryMediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(email="staff@example.com", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def _upload(self, content, name="logo.bin"):
+        upload = SimpleUploadedFile(name, content, content_type="application/octet-stream")
+        res = self.client.post(reverse("media-upload"), {"file": upload}, format="multipart")
+        self.assertEqual(res.status_code, 201)
+        return MediaFile.objects.get(id=res.data["id"])
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=64)
+    def test_upload_is_hashed_sniffed_and_moved_into_place(self):
+        media = self._upload(PNG_BYTES)
+        digest = hashlib.sha256(PNG_BYTES).hexdigest()
+        self.assertEqual(media.file.name, f"blobs/{digest[:2]}/{digest}.bin")
+        self.assertEqual(media.blob.sha256, digest)
+        self.assertEqual(media.mime_type, "image/png")
+        self.assertEqual(media.media_type, "image")
+        self.assertEqual(media.size, len(PNG_BYTES))
+        with media.file.open("rb") as fh:
+            self.assertEqual(fh.read(), PNG_BYTES)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, INCOMING_DIR)), [])
+
+    def test_small_uploads_stay_in_memory_until_rollover(self):
+        upload = HashedUploadedFile("a.bin", None, max_memory_size=8, directory=self.media_root)
+        upload.write_chunk(b"1234")
+        self.assertTrue(upload.in_memory)
+        upload.write_chunk(b"56789")
+        self.assertFalse(upload.in_memory)
+        upload.finish()
+        self.assertEqual(upload.file.read(), b"123456789")
+        self.assertEqual(upload.sha256, hashlib.sha256(b"123456789").hexdigest())
+        upload.close()
+
+
+@eager_tasks
+class DeduplicationTests(TemporaryMediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(email="staff@example.com", password="pass", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def _upload(self, content, name="logo.png"):
+        upload = SimpleUploadedFile(name, content, content_type="image/png")
+        res = self.client.post(reverse("media-upload"), {"file": upload}, format="multipart")
+        self.assertEqual(res.status_code, 201)
+        return MediaFile.objects.get(id=res.data["id"])
+
+    def test_reupload_references_the_existing_blob(self):
+        first = self._upload(PNG_BYTES)
+        with mock.patch.object(media_storage, "save", wraps=media_storage.save) as save:
+            second = self._upload(PNG_BYTES, name="logo-copy.png")
+        save.assert_not_called()
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(second.file.name, first.file.name)
+        self.assertEqual(MediaBlob.objects.get().ref_count, 2)
+
+    def test_failed_row_insert_drops_the_blob_reference(self):
+        self._upload(PNG_BYTES)
+        upload = SimpleUploadedFile("logo.png", PNG_BYTES, content_type="image/png")
+        with mock.patch.object(MediaFile._default_manager, "create", side_effect=DatabaseError("boom")):
+            with self.assertRaises(DatabaseError):
+                self.client.post(reverse("media-upload"), {"file": upload}, format="multipart")
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+
+    def test_failed_row_insert_removes_the_new_file(self):
+        upload = SimpleUploadedFile("logo.png", PNG_BYTES, content_type="image/png")
+        with mock.patch.object(MediaFile._default_manager, "create", side_effect=DatabaseError("boom")):
+            with self.assertRaises(DatabaseError):
+                self.client.post(reverse("media-upload"), {"file": upload}, format="multipart")
+        self.assertFalse(MediaBlob.objects.exists())
+        stored = [name for _, _, names in os.walk(os.path.join(self.media_root, "blobs")) for name in names]
+        self.assertEqual(stored, [])
+
+    def test_blob_is_removed_with_its_last_reference(self):
+        first = self._upload(PNG_BYTES)
+        second = self._upload(PNG_BYTES)
+        path = first.file.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.delete(reverse("media-detail", args=[first.pk]))
+        self.assertEqual(res.status_code, 204)
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("media-detail", args=[second.pk]))
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_replacing_a_file_releases_the_previous_blob(self):
+        media = self._upload(PNG_BYTES)
+        other = PNG_BYTES + b"\x01"
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(
+                reverse("media-detail", args=[media.pk]),
+                {"file": SimpleUploadedFile("new.png", other, content_type="image/png")},
+                format="multipart",
+            )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(list(MediaBlob.objects.values_list("sha256", flat=True)), [hashlib.sha256(other).hexdigest()])
@@ -1,7 +1,7 @@
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth import get_user_model
-from .models import MediaFile
+from apps.library.models import MediaFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 User = get_user_model()
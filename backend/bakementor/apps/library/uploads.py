@@ -0,0 +1,321 @@
+"""Single-pass upload ingestion.
+
+``HashingUploadHandler`` replaces Django's default handlers for media
+uploads. As request body chunks arrive it hashes them, counts their size,
+keeps the leading bytes for MIME sniffing and buffers them (spooling large
+files to a temporary file on the media volume). Once the content hash is
+known the upload either references an existing blob, discarding the buffer,
+or is renamed into its content-addressed path, so new bytes are written to
+disk once and never read back.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import mimetypes
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import Storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+from .blobs import acquire_blob, acquire_blobs, write_blob_files
+from .models import MediaBlob, media_storage
+
+INCOMING_DIR = ".incoming"
+SNIFF_BYTES = 64
+
+# (offset, signature, mime type); checked in order against the leading bytes.
+_MAGIC_SIGNATURES: tuple[tuple[int, bytes, str], ...] = (
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"BM", "image/bmp"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"\x00\x00\x01\x00", "image/x-icon"),
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"\x1a\x45\xdf\xa3", "video/webm"),
+    (0, b"OggS", "audio/ogg"),
+    (0, b"ID3", "audio/mpeg"),
+    (0, b"fLaC", "audio/flac"),
+)
+# ISO base media (``....ftyp<brand>``) brands.
+_FTYP_BRANDS = {
+    b"avif": "image/avif",
+    b"avis": "image/avif",
+    b"heic": "image/heic",
+    b"heix": "image/heic",
+    b"mif1": "image/heif",
+    b"qt  ": "video/quicktime",
+    b"M4A ": "audio/mp4",
+}
+
+
+def sniff_mime_type(head: bytes) -> str | None:
+    """Identify a file type from its leading bytes, or return ``None``."""
+    if head[:4] == b"RIFF" and len(head) >= 12:
+        return {b"WEBP": "image/webp", b"WAVE": "audio/wav", b"AVI ": "video/x-msvideo"}.get(head[8:12])
+    if head[4:8] == b"ftyp":
+        return _FTYP_BRANDS.get(head[8:12], "video/mp4")
+    for offset, signature, mime in _MAGIC_SIGNATURES:
+        if head[offset : offset + len(signature)] == signature:
+            return mime
+    return None
+
+
+def incoming_directory(storage: Storage = media_storage) -> str | None:
+    """Spool directory on the same volume as ``storage`` so finalizing is a rename."""
+    try:
+        directory = storage.path(INCOMING_DIR)
+    except NotImplementedError:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def staging_directory(storage: Storage = media_storage) -> str:
+    """Local directory for partial resumable uploads.
+
+    ``incoming_directory`` when ``storage`` is on disk; remote storages stage in
+    ``MEDIA_UPLOAD_STAGING_ROOT`` (shared by every web worker) instead.
+    """
+    directory = incoming_directory(storage)
+    if directory is None:
+        directory = getattr(settings, "MEDIA_UPLOAD_STAGING_ROOT", None) or os.path.join(
+            tempfile.gettempdir(), "bakementor-uploads"
+        )
+        os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+class HashedUploadedFile(UploadedFile):
+    """Upload that tracks its sha256, size and leading bytes while written.
+
+    Content is buffered in memory up to ``FILE_UPLOAD_MAX_MEMORY_SIZE`` and
+    rolled over to a temporary file on the media volume beyond that, so small
+    uploads whose bytes are already stored never touch the disk.
+    """
+
+    def __init__(
+        self, name, content_type, charset=None, content_type_extra=None, directory=None, max_memory_size=None
+    ):
+        super().__init__(io.BytesIO(), name, content_type, 0, charset, content_type_extra)
+        self._directory = directory
+        self._max_memory_size = (
+            settings.FILE_UPLOAD_MAX_MEMORY_SIZE if max_memory_size is None else max_memory_size
+        )
+        self._hasher = hashlib.sha256()
+        self.head = b""
+
+    @classmethod
+    def from_staged(cls, path: str, name: str, content_type: str | None, hasher) -> "HashedUploadedFile":
+        """Wrap a fully written staging file whose content ``hasher`` has already seen."""
+        upload = cls(name, content_type, max_memory_size=0)
+        upload.file = open(path, "rb")
+        upload.size = os.path.getsize(path)
+        upload._hasher = hasher
+        upload.head = upload.file.read(SNIFF_BYTES)
+        upload.file.seek(0)
+        return upload
+
+    @property
+    def in_memory(self) -> bool:
+        return isinstance(self.file, io.BytesIO)
+
+    def write_chunk(self, data: bytes) -> None:
+        if len(self.head) < SNIFF_BYTES:
+            self.head += data[: SNIFF_BYTES - len(self.head)]
+        self._hasher.update(data)
+        if self.in_memory and self.size + len(data) > self._max_memory_size:
+            self._rollover()
+        self.file.write(data)
+        self.size += len(data)
+
+    def _rollover(self) -> None:
+        directory = self._directory if self._directory is not None else incoming_directory()
+        spool = tempfile.NamedTemporaryFile(suffix=".upload", dir=directory)
+        spool.write(self.file.getvalue())
+        self.file = spool
+
+    def finish(self) -> None:
+        self.file.flush()
+        self.file.seek(0)
+
+    @property
+    def sha256(self) -> str:
+        return self._hasher.hexdigest()
+
+    def storage_content(self) -> File:
+        """What to hand to ``Storage.save``: the upload itself (moved) or its buffer (written)."""
+        return File(self.file, self.name) if self.in_memory else _SpooledFile(self)
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # The file was moved into storage; nothing is left to delete.
+            pass
+
+
+class _SpooledFile(File):
+    """Exposes ``temporary_file_path`` so ``FileSystemStorage`` renames instead of copying."""
+
+    def __init__(self, upload: HashedUploadedFile):
+        super().__init__(upload.file, upload.name)
+        self.size = upload.size
+
+    def temporary_file_path(self) -> str:
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            pass
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """Hash uploaded files as they stream in, spooling large ones to the media volume.
+
+    The in-memory budget (``FILE_UPLOAD_MAX_MEMORY_SIZE``) is shared by all
+    files in the request, so a batch of many files spools instead of
+    multiplying memory use.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self._memory_left = settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = HashedUploadedFile(
+            self.file_name,
+            self.content_type,
+            self.charset,
+            self.content_type_extra,
+            max_memory_size=self._memory_left,
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file.write_chunk(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.finish()
+        if self.file.in_memory:
+            self._memory_left -= self.file.size
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, "file"):
+            self.file.close()
+
+
+def spool_upload(upload, directory: str | None = None) -> HashedUploadedFile:
+    """Copy any file-like upload into a ``HashedUploadedFile`` in one pass."""
+    spooled = HashedUploadedFile(
+        getattr(upload, "name", None) or "upload",
+        getattr(upload, "content_type", None),
+        directory=directory,
+    )
+    if hasattr(upload, "seek"):
+        upload.seek(0)
+    chunks = upload.chunks() if hasattr(upload, "chunks") else iter(lambda: upload.read(64 * 1024), b"")
+    for chunk in chunks:
+        spooled.write_chunk(chunk)
+    spooled.finish()
+    return spooled
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    name: str
+    size: int
+    sha256: str
+    mime_type: str
+    blob: MediaBlob
+
+
+def detect_mime_type(upload: HashedUploadedFile) -> str:
+    return (
+        sniff_mime_type(upload.head)
+        or mimetypes.guess_type(upload.name or "")[0]
+        or upload.content_type
+        or "application/octet-stream"
+    )
+
+
+@dataclass(frozen=True)
+class PreparedUpload:
+    """A spooled upload whose bytes are in storage, or known to a blob already."""
+
+    upload: HashedUploadedFile
+    mime_type: str
+    # Where ``prepare_uploads`` stored new content; ``None`` when a blob held it.
+    written: str | None
+
+
+def prepare_uploads(uploads, storage: Storage = media_storage) -> list[PreparedUpload]:
+    """Spool ``uploads`` and store the bytes no blob holds yet.
+
+    Call it before the transaction that references the blobs and inserts the
+    rows (``store_upload``/``store_uploads``), and wrap that transaction in
+    ``discard_on_error``.
+    """
+    spooled = [upload if isinstance(upload, HashedUploadedFile) else spool_upload(upload) for upload in uploads]
+    try:
+        written = write_blob_files(spooled, storage)
+    except BaseException:
+        for upload in spooled:
+            upload.close()
+        raise
+    prepared = []
+    for upload in spooled:
+        name = written.pop(upload.sha256, None)
+        prepared.append(PreparedUpload(upload, detect_mime_type(upload), name))
+    return prepared
+
+
+@contextmanager
+def discard_on_error(prepared: list[PreparedUpload], storage: Storage = media_storage):
+    """Delete the files ``prepare_uploads`` wrote when the block raises."""
+    try:
+        yield
+    except BaseException:
+        for item in prepared:
+            item.upload.close()
+            if item.written:
+                storage.delete(item.written)
+        raise
+
+
+def store_upload(prepared: PreparedUpload, storage: Storage = media_storage) -> StoredUpload:
+    """Reference the blob for a prepared upload's content."""
+    try:
+        blob = acquire_blob(prepared.upload, prepared.mime_type, storage=storage, written=prepared.written)
+    finally:
+        prepared.upload.close()
+    return StoredUpload(
+        name=blob.file.name, size=blob.size, sha256=blob.sha256, mime_type=blob.mime_type, blob=blob
+    )
+
+
+def store_uploads(prepared: list[PreparedUpload]) -> tuple[list[StoredUpload], list[MediaBlob]]:
+    """Batch form of ``store_upload``; also returns the blobs inserted in bulk."""
+    written = {item.upload.sha256: item.written for item in prepared if item.written}
+    try:
+        blobs, bulk_created = acquire_blobs([(item.upload, item.mime_type) for item in prepared], written=written)
+    finally:
+        for item in prepared:
+            item.upload.close()
+    stored = [
+        StoredUpload(name=blob.file.name, size=blob.size, sha256=blob.sha256, mime_type=blob.mime_type, blob=blob)
+        for blob in blobs
+    ]
+    return stored, bulk_created
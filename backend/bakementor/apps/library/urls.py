@@ -1,9 +1,19 @@
 """API routes for media management."""
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import MediaFileViewSet
+from .views import MediaDerivativeView, MediaFileViewSet, UploadSessionViewSet
 
 router = DefaultRouter()
+# Registered before the root-prefixed viewset so ``uploads/`` is not taken for a detail lookup.
+router.register(r"uploads", UploadSessionViewSet, basename="media-upload-session")
 router.register(r"", MediaFileViewSet, basename="media")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path(
+        "derivatives/<str:sha256>/<int:width>.<str:fmt>",
+        MediaDerivativeView.as_view(),
+        name="media-derivative",
+    ),
+    *router.urls,
+]
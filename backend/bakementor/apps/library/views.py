@@ -1,21 +1,48 @@
 """Viewsets for managing media files."""
 from __future__ import annotations
 
-from rest_framework import permissions, viewsets, status
+from rest_framework import mixins, permissions, viewsets, status
 from rest_framework.decorators import action
-from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.views import APIView
 from django.contrib.auth.models import Permission
+from django.db import transaction
+from django.http import Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_http_methods
 
-from .models import MediaFile
-from .serializers import MediaFileSerializer
+from apps.common.pagination import ApproximateCountCursorPagination
 
+from .derivatives import DERIVATIVE_WIDTHS, derivative_formats, ensure_derivative, supports_derivatives
+from .models import MediaBlob, MediaFile, UploadSession, media_storage, media_type_for_mime
+from .resumable import (
+    OffsetMismatch,
+    UploadStateError,
+    abort_session,
+    append_chunk,
+    assemble,
+    discard_staging,
+    start_session,
+)
+from .deletion import soft_delete
+from .direct import direct_upload_key, finalize_direct_upload
+from .serializers import MediaBulkDeleteSerializer, MediaFileSerializer, UploadSessionSerializer
+from .serving import build_response
+from .tasks import schedule_blob_processing, schedule_direct_ingest, schedule_media_purge
+from .uploads import HashingUploadHandler, discard_on_error, prepare_uploads, store_uploads
+
+
+class MediaLibraryPagination(ApproximateCountCursorPagination):
+    """Infinite scroll for the asset picker, newest first.
+
+    Each page is an index range scan on one of the ``MediaFile`` composite
+    indexes, whatever the filter combination.
+    """
 
-class StandardResultsSetPagination(PageNumberPagination):
     page_size = 24
-    page_size_query_param = "page_size"
-    max_page_size = 100
+    ordering = "-created_at"
 
 
 class IsLibraryUploader(permissions.BasePermission):
@@ -33,8 +60,15 @@ class IsLibraryUploader(permissions.BasePermission):
 class MediaFileViewSet(viewsets.ModelViewSet):
     serializer_class = MediaFileSerializer
     permission_classes = [IsLibraryUploader]
-    parser_classes = (MultiPartParser, FormParser)
-    pagination_class = StandardResultsSetPagination
+    parser_classes = (MultiPartParser, FormParser, JSONParser)
+    pagination_class = MediaLibraryPagination
+    # Cursors need a stable, indexed ordering; other sort keys are not offered.
+    ordering_fields = ("created_at",)
+
+    def initialize_request(self, request, *args, **kwargs):
+        # Must be swapped before the body is parsed: hash and spool uploads in one pass.
+        request.upload_handlers = [HashingUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
 
     def get_queryset(self):
         """Return files visible to the current user.
@@ -42,7 +76,7 @@ class MediaFileViewSet(viewsets.ModelViewSet):
         By default non-staff users see only their own uploads. Staff can see all.
         Supports filtering by media_type via ?media_type=image
         """
-        qs = MediaFile.objects.all().order_by("-created_at")
+        qs = MediaFile.objects.alive().select_related("blob").order_by("-created_at")
         if not self.request.user.is_staff:
             qs = qs.filter(uploaded_by=self.request.user)
         media_type = self.request.query_params.get("media_type")
@@ -54,11 +88,20 @@ class MediaFileViewSet(viewsets.ModelViewSet):
         serializer.save(uploaded_by=self.request.user)
 
     def perform_destroy(self, instance):
-        storage = instance.file.storage
-        file_name = instance.file.name
-        super().perform_destroy(instance)
-        if file_name:
-            storage.delete(file_name)
+        # Hide the row now; a worker removes it and any file it was the last user of.
+        schedule_media_purge(soft_delete(MediaFile.objects.filter(pk=instance.pk)))
+
+    @action(detail=False, methods=["post"], permission_classes=[IsLibraryUploader], url_path="bulk-delete")
+    def bulk_delete(self, request):
+        """Soft-delete many files in one call and purge them in the background.
+
+        Only files visible to the caller are affected; returns how many were removed.
+        """
+        serializer = MediaBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = soft_delete(self.get_queryset().filter(id__in=serializer.validated_data["ids"]))
+        schedule_media_purge(ids)
+        return Response({"deleted": len(ids)}, status=status.HTTP_202_ACCEPTED)
 
     @action(detail=False, methods=["post"], permission_classes=[IsLibraryUploader], url_path="upload")
     def upload(self, request):
@@ -66,7 +109,8 @@ class MediaFileViewSet(viewsets.ModelViewSet):
 
         Returns created object or validation errors.
         """
-        data = request.data.copy()
+        # QueryDict.copy() deep-copies values, which fails for spooled uploads.
+        data = request.data.dict() if hasattr(request.data, "dict") else dict(request.data)
         # If user didn't provide title, use filename
         file_obj = data.get("file")
         if file_obj and not data.get("title"):
@@ -78,3 +122,193 @@ class MediaFileViewSet(viewsets.ModelViewSet):
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @action(detail=False, methods=["post"], permission_classes=[IsLibraryUploader], url_path="batch")
+    def batch(self, request):
+        """Upload many files (multipart ``files``) in one request.
+
+        Blobs are resolved in bulk, rows are inserted with one ``bulk_create``
+        and post-processing for new content is queued as a single group.
+        Titles default to the file names.
+        """
+        files = request.FILES.getlist("files")
+        if not files:
+            return Response({"files": ["No files were submitted."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        # New bytes are stored first; the blob references and the rows holding
+        # them then commit together, and a rollback removes the stored files.
+        prepared = prepare_uploads(files)
+        with discard_on_error(prepared), transaction.atomic():
+            stored, bulk_created = store_uploads(prepared)
+            rows = [
+                MediaFile(
+                    file=item.name,
+                    blob=item.blob,
+                    title=(upload.name or "Untitled")[:200],
+                    uploaded_by=request.user,
+                    size=item.size,
+                    mime_type=item.mime_type,
+                    media_type=media_type_for_mime(item.mime_type),
+                    metadata=dict(item.blob.metadata or {}),
+                )
+                for upload, item in zip(files, stored)
+            ]
+            MediaFile.objects.bulk_create(rows)
+            schedule_blob_processing(bulk_created)
+        serializer = self.get_serializer(rows, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+
+class UploadSessionViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Resumable chunked uploads and direct-to-storage uploads.
+
+    ``POST`` declares the file, ``PATCH`` appends raw bytes at the offset in
+    the ``Upload-Offset`` header, ``HEAD``/``GET`` report the current offset
+    after an interruption, ``finalize`` turns the upload into a MediaFile and
+    ``DELETE`` aborts it.
+
+    With ``"direct": true`` (S3-compatible storage only) the response carries
+    a presigned ``upload`` request instead; the client sends the file to
+    storage with it and then calls ``finalize``.
+    """
+
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsLibraryUploader]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(uploaded_by=self.request.user)
+
+    def perform_create(self, serializer):
+        if serializer.validated_data.pop("direct"):
+            key = direct_upload_key(serializer.validated_data["filename"])
+            serializer.save(uploaded_by=self.request.user, storage_key=key)
+        else:
+            start_session(serializer.save(uploaded_by=self.request.user))
+
+    def _with_offset(self, response: Response, session: UploadSession) -> Response:
+        response["Upload-Offset"] = str(session.offset)
+        response["Upload-Length"] = str(session.size)
+        response["Cache-Control"] = "no-store"
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        session = self.get_object()
+        return self._with_offset(Response(self.get_serializer(session).data), session)
+
+    def partial_update(self, request, *args, **kwargs):
+        session = self.get_object()
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.headers["Content-Length"])
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "Upload-Offset and Content-Length headers are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            session = append_chunk(session, offset, request.stream, length) if length else session
+        except OffsetMismatch as exc:
+            response = Response({"detail": str(exc), "offset": exc.offset}, status=status.HTTP_409_CONFLICT)
+            return self._with_offset(response, session)
+        except UploadStateError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._with_offset(Response(self.get_serializer(session).data), session)
+
+    def perform_destroy(self, instance):
+        if instance.status == UploadSession.Status.ACTIVE:
+            abort_session(instance)
+
+    def destroy(self, request, *args, **kwargs):
+        self.perform_destroy(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=["post"])
+    def finalize(self, request, pk=None):
+        """Assemble the received bytes into a MediaFile (idempotent once completed)."""
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=self.get_object().pk)
+            if session.status == UploadSession.Status.COMPLETED and session.media_file_id:
+                serializer = MediaFileSerializer(session.media_file, context=self.get_serializer_context())
+                return Response(serializer.data)
+            if session.storage_key:
+                return self._finalize_direct(session)
+            try:
+                upload = assemble(session)
+            except OffsetMismatch as exc:
+                return self._with_offset(
+                    Response({"detail": "Upload is incomplete.", "offset": exc.offset}, status=status.HTTP_409_CONFLICT),
+                    session,
+                )
+            except UploadStateError as exc:
+                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            serializer = MediaFileSerializer(
+                data={
+                    "file": upload,
+                    "title": session.title or session.filename,
+                    "description": session.description,
+                    "alt_text": session.alt_text,
+                },
+                context=self.get_serializer_context(),
+            )
+            try:
+                serializer.is_valid(raise_exception=True)
+                media = serializer.save(uploaded_by=request.user)
+            finally:
+                # Content already in storage is referenced, not moved; drop the copy.
+                upload.close()
+                discard_staging(session)
+            session.status = UploadSession.Status.COMPLETED
+            session.media_file = media
+            session.save(update_fields=["status", "media_file", "updated_at"])
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def _finalize_direct(self, session: UploadSession) -> Response:
+        try:
+            media = finalize_direct_upload(session, self.request.user)
+        except OffsetMismatch as exc:
+            return self._with_offset(
+                Response({"detail": "Upload is incomplete.", "offset": exc.offset}, status=status.HTTP_409_CONFLICT),
+                session,
+            )
+        except UploadStateError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        schedule_direct_ingest(media.pk)
+        serializer = MediaFileSerializer(media, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class MediaDerivativeView(APIView):
+    """Redirect to a responsive image variant, rendering it on first request.
+
+    Variants are addressed by content hash and are as public as the stored
+    files themselves, so the endpoint needs no authentication.
+    """
+
+    permission_classes = [permissions.AllowAny]
+    authentication_classes: list = []
+
+    def get(self, request, sha256: str, width: int, fmt: str):
+        if width not in DERIVATIVE_WIDTHS or fmt not in derivative_formats():
+            raise Http404
+        blob = get_object_or_404(MediaBlob, sha256=sha256, mime_type__startswith="image/")
+        if not supports_derivatives(blob.mime_type):
+            # Animated and vector images are never resized, as on upload.
+            return HttpResponseRedirect(blob.file.url)
+        name = ensure_derivative(blob, width, fmt)
+        if name is None:
+            # Narrower than requested, unreadable, or being rendered: serve the original.
+            return HttpResponseRedirect(blob.file.url)
+        response = HttpResponseRedirect(media_storage.url(name))
+        patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 30)
+        return response
+
+
+@require_http_methods(["GET", "HEAD"])
+def serve_media(request, name: str):
+    """Serve a stored media file, delegating the transfer to the front server when configured."""
+    return build_response(request, name)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder_templates', '0001_initial'),
+        ('pages', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pageversion',
+            name='source_template',
+            field=models.ForeignKey(blank=True, help_text='Template whose tree this version shares until it is materialized.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='instantiated_versions', to='builder_templates.pagetemplate'),
+        ),
+    ]
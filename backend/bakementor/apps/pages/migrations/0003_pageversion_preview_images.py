@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0002_pageversion_source_template'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pageversion',
+            name='preview_images',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -78,7 +78,16 @@ class PageVersion(UUIDModel, TimeStampedModel):
     title = models.CharField(max_length=200)
     notes = models.TextField(blank=True)
     component_tree = models.JSONField(default=dict)
+    source_template = models.ForeignKey(
+        "builder_templates.PageTemplate",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="instantiated_versions",
+        help_text="Template whose tree this version shares until it is materialized.",
+    )
     metadata = models.JSONField(default=dict, blank=True)
+    preview_images = models.JSONField(default=dict, blank=True, editable=False)
     is_published = models.BooleanField(default=False)
 
     class Meta:
@@ -88,6 +97,13 @@ class PageVersion(UUIDModel, TimeStampedModel):
     def __str__(self) -> str:
         return f"{self.page.title} v{self.version}"
 
+    @property
+    def tree(self) -> dict:
+        """Return the effective component tree, following a shared template reference."""
+        if self.source_template_id:
+            return self.source_template.component_tree
+        return self.component_tree
+
     def mark_as_published(self) -> None:
         self.is_published = True
         self.save(update_fields=["is_published"])
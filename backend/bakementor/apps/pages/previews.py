@@ -0,0 +1,275 @@
+"""Low-fidelity raster previews of component trees.
+
+The renderer lays out a tree with a simplified box model (block stacking,
+flex rows and column grids), paints backgrounds and draws placeholder bars
+for text and media. Images are stored in ``media_storage`` keyed by the tree
+content hash, so identical trees share the same files.
+"""
+from __future__ import annotations
+
+import io
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageColor, ImageDraw
+
+from apps.common.hashing import content_hash
+from apps.library.models import media_storage
+
+CANVAS_WIDTH = 1280
+VIEWPORT_HEIGHT = 800
+MAX_CANVAS_HEIGHT = 4000
+PREVIEW_WIDTHS = (320, 640)
+PREVIEW_FORMAT = "WEBP"
+PREVIEW_EXTENSION = "webp"
+PREVIEW_DIR = "previews"
+
+MAX_DEPTH = 64
+# Trees reach this module unvalidated (template saves), so each node is laid
+# out once and the total number of boxes is bounded.
+MAX_BOXES = 2000
+DEFAULT_BACKGROUND = (255, 255, 255)
+TEXT_COLOR = (203, 213, 225)
+HEADING_COLOR = (100, 116, 139)
+MEDIA_COLOR = (226, 232, 240)
+BUTTON_COLOR = (37, 99, 235)
+FIELD_COLOR = (241, 245, 249)
+FIELD_BORDER = (203, 213, 225)
+
+_PX_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*(px)?\s*$")
+_HEADING_HEIGHTS = {"h1": 56, "h2": 44, "h3": 36, "h4": 30}
+
+
+@dataclass
+class _Box:
+    node: dict
+    x: int
+    y: int
+    width: int
+    height: int = 0
+    style: dict = field(default_factory=dict)
+
+
+def _px(value: Any, default: int = 0) -> int:
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        match = _PX_RE.match(value)
+        if match:
+            return int(float(match.group(1)))
+    return default
+
+
+def _sides(value: Any) -> tuple[int, int, int, int]:
+    """Return (top, right, bottom, left) pixel values for a FourSideValue."""
+    if isinstance(value, dict):
+        top = _px(value.get("top"))
+        right = _px(value.get("right"), top)
+        bottom = _px(value.get("bottom"), top)
+        left = _px(value.get("left"), right)
+        return top, right, bottom, left
+    if isinstance(value, str):
+        parts = [_px(part) for part in value.split()]
+        if len(parts) == 1:
+            return parts[0], parts[0], parts[0], parts[0]
+        if len(parts) == 2:
+            return parts[0], parts[1], parts[0], parts[1]
+        if len(parts) == 3:
+            return parts[0], parts[1], parts[2], parts[1]
+        if len(parts) >= 4:
+            return parts[0], parts[1], parts[2], parts[3]
+    return 0, 0, 0, 0
+
+
+def _color(value: Any) -> tuple[int, int, int] | None:
+    if isinstance(value, dict):
+        if value.get("type") == "solid":
+            value = value.get("value")
+        elif value.get("stops"):
+            value = value["stops"][0].get("color")
+    if not isinstance(value, str):
+        return None
+    try:
+        return ImageColor.getrgb(value)[:3]
+    except ValueError:
+        # Token references (``color.primary.500``) and CSS functions are skipped.
+        return None
+
+
+def _column_count(node: dict, style: dict) -> int:
+    component = node.get("component", "")
+    if component.startswith("layout.columns-"):
+        return max(1, _px(component.rsplit("-", 1)[-1], 1))
+    columns = (node.get("props") or {}).get("columns")
+    if isinstance(columns, dict):
+        columns = columns.get("base")
+    if isinstance(columns, int) and columns > 0:
+        return columns
+    template = style.get("gridTemplateColumns")
+    if isinstance(template, str):
+        match = re.search(r"repeat\(\s*(\d+)", template)
+        if match:
+            return max(1, int(match.group(1)))
+        return max(1, len(template.split()))
+    return 1
+
+
+def _is_row(node: dict, style: dict) -> bool:
+    if style.get("display") in {"flex", "inline-flex"}:
+        return style.get("flexDirection", "row") == "row"
+    return node.get("component") in {"layout.row", "layout.navbar", "layout.navMenu"}
+
+
+def _leaf_height(node: dict, width: int) -> int:
+    component = node.get("component", "")
+    props = node.get("props") or {}
+    if component in {"content.richText", "content.link", "content.navLink"}:
+        tag = props.get("tag", "p")
+        if tag in _HEADING_HEIGHTS:
+            return _HEADING_HEIGHTS[tag]
+        text = str(props.get("text", ""))
+        chars_per_line = max(1, width // 9)
+        return 24 * max(1, min(8, -(-len(text) // chars_per_line)))
+    if component in {"content.image", "media.video", "media.slider"}:
+        return int(width * 9 / 16)
+    if component == "forms.textarea":
+        return 96
+    if component.startswith("forms.") or component == "content.button":
+        return 44
+    return 48
+
+
+def _layout(
+    tree: dict, node_id: str, x: int, y: int, width: int, boxes: list[_Box], seen: set[str], depth: int = 0
+) -> int:
+    nodes = tree.get("nodes") or {}
+    if not isinstance(node_id, str) or node_id in seen or len(boxes) >= MAX_BOXES:
+        return 0
+    node = nodes.get(node_id)
+    if not isinstance(node, dict) or depth > MAX_DEPTH or y > MAX_CANVAS_HEIGHT:
+        return 0
+    seen.add(node_id)
+    style = (node.get("styles") or {}).get("base") or {}
+    max_width = _px(style.get("maxWidth"), 0) or _px(style.get("width"), 0)
+    if max_width and max_width < width:
+        margin = style.get("margin")
+        if isinstance(margin, dict) and margin.get("left") == "auto":
+            x += (width - max_width) // 2
+        width = max_width
+
+    box = _Box(node=node, x=x, y=y, width=width, style=style)
+    boxes.append(box)
+
+    top, right, bottom, left = _sides(style.get("padding"))
+    inner_x, inner_y = x + left, y + top
+    inner_width = max(1, width - left - right)
+    gap = _px(style.get("gap"), 0)
+    children = [child for child in node.get("children") or [] if isinstance(child, str) and child in nodes]
+
+    if not children:
+        content_height = _leaf_height(node, inner_width)
+    else:
+        columns = len(children) if _is_row(node, style) else _column_count(node, style)
+        content_height = 0
+        if columns <= 1:
+            cursor = inner_y
+            for index, child_id in enumerate(children):
+                cursor += _layout(tree, child_id, inner_x, cursor, inner_width, boxes, seen, depth + 1)
+                if index < len(children) - 1:
+                    cursor += gap
+            content_height = cursor - inner_y
+        else:
+            column_width = max(1, (inner_width - gap * (columns - 1)) // columns)
+            row_y = inner_y
+            for start in range(0, len(children), columns):
+                row_height = 0
+                for offset, child_id in enumerate(children[start : start + columns]):
+                    child_x = inner_x + offset * (column_width + gap)
+                    row_height = max(
+                        row_height, _layout(tree, child_id, child_x, row_y, column_width, boxes, seen, depth + 1)
+                    )
+                row_y += row_height + gap
+            content_height = max(0, row_y - gap - inner_y)
+
+    box.height = max(_px(style.get("minHeight"), 0), top + content_height + bottom)
+    return box.height
+
+
+def _paint(draw: ImageDraw.ImageDraw, box: _Box) -> None:
+    x0, y0, x1, y1 = box.x, box.y, box.x + box.width, box.y + box.height
+    background = _color(box.style.get("background")) or _color(box.style.get("backgroundColor"))
+    radius = _px(box.style.get("borderRadius"), 0)
+    if background:
+        draw.rounded_rectangle((x0, y0, x1, y1), radius=radius, fill=background)
+    if box.node.get("children"):
+        return
+
+    component = box.node.get("component", "")
+    top, right, bottom, left = _sides(box.style.get("padding"))
+    cx0, cy0, cx1, cy1 = x0 + left, y0 + top, x1 - right, y1 - bottom
+    if cx1 <= cx0 or cy1 <= cy0:
+        return
+    if component in {"content.image", "media.video", "media.slider"}:
+        draw.rectangle((cx0, cy0, cx1, cy1), fill=MEDIA_COLOR)
+    elif component == "content.button":
+        fill = background or BUTTON_COLOR
+        draw.rounded_rectangle((cx0, cy0, min(cx1, cx0 + 160), cy1), radius=8, fill=fill)
+    elif component.startswith("forms."):
+        draw.rounded_rectangle((cx0, cy0, cx1, cy1), radius=6, fill=FIELD_COLOR, outline=FIELD_BORDER)
+    elif component in {"content.richText", "content.link", "content.navLink"}:
+        tag = (box.node.get("props") or {}).get("tag", "p")
+        heading = tag in _HEADING_HEIGHTS
+        line_height = cy1 - cy0 if heading else 24
+        bar_height = max(6, int(line_height * 0.6))
+        color = _color(box.style.get("color")) or (HEADING_COLOR if heading else TEXT_COLOR)
+        y = cy0
+        while y + bar_height <= cy1:
+            draw.rounded_rectangle((cx0, y, cx1, y + bar_height), radius=bar_height // 2, fill=color)
+            y += line_height
+
+
+def render_tree(tree: dict) -> Image.Image:
+    """Render ``tree`` into a full-width RGB image cropped to the first viewport."""
+    boxes: list[_Box] = []
+    root = tree.get("root") if isinstance(tree, dict) else None
+    height = _layout(tree, root, 0, 0, CANVAS_WIDTH, boxes, set()) if root else 0
+    height = max(VIEWPORT_HEIGHT, min(height, MAX_CANVAS_HEIGHT))
+    image = Image.new("RGB", (CANVAS_WIDTH, height), DEFAULT_BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    for box in boxes:
+        _paint(draw, box)
+    return image.crop((0, 0, CANVAS_WIDTH, VIEWPORT_HEIGHT))
+
+
+def preview_name(tree_hash: str, width: int) -> str:
+    return f"{PREVIEW_DIR}/{tree_hash[:2]}/{tree_hash}-{width}.{PREVIEW_EXTENSION}"
+
+
+def generate_previews(tree: dict) -> dict[str, Any]:
+    """Render and store previews for ``tree`` unless they already exist.
+
+    Returns ``{"hash": <tree hash>, "sizes": {"<width>": <storage name>}}``.
+    """
+    tree_hash = content_hash(tree)
+    names = {str(width): preview_name(tree_hash, width) for width in PREVIEW_WIDTHS}
+    missing = {width: name for width, name in names.items() if not media_storage.exists(name)}
+    if missing:
+        image = render_tree(tree)
+        for width, name in missing.items():
+            target = int(width)
+            resized = image.resize((target, target * VIEWPORT_HEIGHT // CANVAS_WIDTH), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, format=PREVIEW_FORMAT, quality=80)
+            names[width] = media_storage.save(name, ContentFile(buffer.getvalue()))
+    return {"hash": tree_hash, "sizes": names}
+
+
+def preview_urls(previews: dict | None, request=None) -> dict[str, str]:
+    """Map preview widths to (absolute, when a request is given) URLs."""
+    urls: dict[str, str] = {}
+    for width, name in ((previews or {}).get("sizes") or {}).items():
+        url = media_storage.url(name)
+        urls[width] = request.build_absolute_uri(url) if request else url
+    return urls
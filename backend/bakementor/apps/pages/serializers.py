@@ -5,12 +5,23 @@ from django.utils import timezone
 from rest_framework import serializers
 
 from .models import Page, PageVersion
+from .previews import preview_urls
+from .tasks import schedule_version_preview
+from .validation import validate_tree
 
 
-class PageListVersionSerializer(serializers.ModelSerializer):
+class PreviewUrlsMixin(serializers.Serializer):
+    preview_urls = serializers.SerializerMethodField(read_only=True)
+
+    def get_preview_urls(self, obj) -> dict[str, str]:
+        request = self.context.get("request") if isinstance(self.context, dict) else None
+        return preview_urls(obj.preview_images, request)
+
+
+class PageListVersionSerializer(PreviewUrlsMixin, serializers.ModelSerializer):
     class Meta:
         model = PageVersion
-        exclude = ("component_tree",)
+        exclude = ("component_tree", "preview_images")
 
 
 class PageListSerializer(serializers.ModelSerializer):
@@ -48,8 +59,16 @@ class PageVersionWriteSerializer(serializers.ModelSerializer):
             "metadata",
         )
 
+    def validate_component_tree(self, value):
+        errors = validate_tree(value)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return value
+
+
+class PageVersionSerializer(PreviewUrlsMixin, serializers.ModelSerializer):
+    component_tree = serializers.JSONField(source="tree", read_only=True)
 
-class PageVersionSerializer(serializers.ModelSerializer):
     class Meta:
         model = PageVersion
         fields = (
@@ -59,12 +78,22 @@ class PageVersionSerializer(serializers.ModelSerializer):
             "title",
             "notes",
             "component_tree",
+            "source_template",
             "metadata",
+            "preview_urls",
+            "is_published",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = (
+            "id",
+            "page",
+            "version",
+            "source_template",
             "is_published",
             "created_at",
             "updated_at",
         )
-        read_only_fields = ("id", "page", "version", "is_published", "created_at", "updated_at")
 
 
 class PageSerializer(serializers.ModelSerializer):
@@ -146,6 +175,9 @@ class PagePublishSerializer(serializers.Serializer):
             version = page.current_version
         if version is None:
             raise serializers.ValidationError("Page has no version to publish")
+        errors = validate_tree(version.tree)
+        if errors:
+            raise serializers.ValidationError({"component_tree": errors})
         attrs["version"] = version
         return attrs
 
@@ -154,6 +186,7 @@ class PagePublishSerializer(serializers.Serializer):
         version: PageVersion = self.validated_data["version"]
         version.mark_as_published()
         page.mark_published(version)
+        schedule_version_preview(version.id)
         return {
             "page_id": str(page.id),
             "published_at": timezone.localtime(page.published_at) if page.published_at else None,
@@ -0,0 +1,207 @@
+"""Compile node style declarations into deduplicated atomic CSS.
+
+Each ``(breakpoint scope, property, value)`` triple becomes one class whose
+name is derived from its content, so identical declarations across nodes and
+pages share a class. Base declarations apply everywhere; ``tablet`` and
+``mobile`` overrides are wrapped in the documented breakpoint ranges, which
+reproduces the builder's ``base + breakpoint`` merge without client work.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from functools import lru_cache
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.common.hashing import canonical_json
+
+BREAKPOINTS = {
+    "desktop": {"min": 1280},
+    "tablet": {"min": 768, "max": 1279},
+    "mobile": {"max": 767},
+}
+SCOPE_ORDER = ("base", "tablet", "mobile")
+
+DEFAULT_DESIGN_TOKENS: dict[str, str] = {
+    "spacing.0": "0",
+    "spacing.50": "2px",
+    "spacing.100": "4px",
+    "spacing.200": "8px",
+    "spacing.300": "12px",
+    "spacing.400": "16px",
+    "spacing.500": "24px",
+    "spacing.600": "32px",
+    "spacing.700": "48px",
+    "spacing.800": "64px",
+    "spacing.900": "96px",
+    "radius.none": "0",
+    "radius.sm": "4px",
+    "radius.md": "8px",
+    "radius.lg": "16px",
+    "radius.full": "9999px",
+    "shadow.sm": "0 1px 2px rgba(15, 23, 42, 0.08)",
+    "shadow.md": "0 4px 12px rgba(15, 23, 42, 0.12)",
+    "shadow.lg": "0 12px 32px rgba(15, 23, 42, 0.16)",
+    "font.size.sm": "14px",
+    "font.size.md": "16px",
+    "font.size.lg": "20px",
+    "font.size.xl": "28px",
+    "font.size.2xl": "40px",
+}
+
+STYLES_CACHE_PREFIX = "pages:styles:"
+STYLES_CACHE_TTL_SECONDS = 60 * 60 * 24
+
+_TOKEN_RE = re.compile(r"^[a-zA-Z][\w-]*(?:\.[\w-]+)+$")
+_CAMEL_RE = re.compile(r"(?<!^)(?=[A-Z])")
+# Property names are emitted verbatim, so anything beyond letters and dashes is dropped.
+_PROPERTY_RE = re.compile(r"^[a-zA-Z][a-zA-Z-]*$")
+_FOUR_SIDE_PROPERTIES = frozenset({"padding", "margin", "borderWidth"})
+
+
+def _flatten_tokens(tokens: dict, prefix: str = "") -> dict[str, str]:
+    flat: dict[str, str] = {}
+    for key, value in tokens.items():
+        if isinstance(value, dict):
+            flat.update(_flatten_tokens(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = str(value)
+    return flat
+
+
+def design_tokens() -> dict[str, str]:
+    """Default tokens plus ``BUILDER_DESIGN_TOKENS``, which may nest by path segment."""
+    return {**DEFAULT_DESIGN_TOKENS, **_flatten_tokens(getattr(settings, "BUILDER_DESIGN_TOKENS", {}))}
+
+
+def _media_query(scope: str) -> str | None:
+    bounds = BREAKPOINTS.get(scope)
+    if scope == "base" or not bounds:
+        return None
+    parts = []
+    if "min" in bounds:
+        parts.append(f"(min-width: {bounds['min']}px)")
+    if "max" in bounds:
+        parts.append(f"(max-width: {bounds['max']}px)")
+    return "@media " + " and ".join(parts)
+
+
+def _resolve(value: Any, tokens: dict[str, str]) -> str | None:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return str(value)
+    if not isinstance(value, str) or not value.strip():
+        return None
+    if _TOKEN_RE.match(value):
+        # Unknown token paths are not valid CSS; the declaration is dropped.
+        return tokens.get(value)
+    return value
+
+
+def _four_side(value: Any, tokens: dict[str, str]) -> str | None:
+    if not isinstance(value, dict):
+        return _resolve(value, tokens)
+    top = _resolve(value.get("top"), tokens) or "0"
+    right = _resolve(value.get("right"), tokens) or top
+    bottom = _resolve(value.get("bottom"), tokens) or top
+    left = _resolve(value.get("left"), tokens) or right
+    return f"{top} {right} {bottom} {left}"
+
+
+def _background(value: Any, tokens: dict[str, str]) -> str | None:
+    if not isinstance(value, dict):
+        return _resolve(value, tokens)
+    if value.get("type") == "solid":
+        return _resolve(value.get("value"), tokens)
+    if value.get("type") == "gradient" and value.get("stops"):
+        stops = ", ".join(
+            f"{_resolve(stop.get('color'), tokens)} {stop.get('position', 0)}%"
+            for stop in value["stops"]
+            if isinstance(stop, dict) and _resolve(stop.get("color"), tokens)
+        )
+        return f"linear-gradient(90deg, {stops})"
+    return None
+
+
+def _declarations(declaration: dict, tokens: dict[str, str]) -> list[tuple[str, str]]:
+    result = []
+    for key, raw in sorted(declaration.items()):
+        if not isinstance(key, str) or not _PROPERTY_RE.match(key):
+            continue
+        if key in _FOUR_SIDE_PROPERTIES:
+            value = _four_side(raw, tokens)
+        elif key == "background":
+            value = _background(raw, tokens)
+        else:
+            value = _resolve(raw, tokens)
+        if value is None or any(char in value for char in ";{}<>"):
+            continue
+        result.append((_CAMEL_RE.sub("-", key).lower(), value))
+    return result
+
+
+def _class_name(scope: str, prop: str, value: str) -> str:
+    digest = hashlib.sha1(f"{scope}|{prop}|{value}".encode("utf-8")).hexdigest()[:8]
+    return f"s{digest}"
+
+
+@lru_cache(maxsize=4096)
+def compile_node_styles(styles_json: str) -> tuple[tuple[str, str, str], ...]:
+    """Compile one node's ``styles`` (as canonical JSON) into atomic rules.
+
+    Returns ``(class name, scope, "prop:value")`` triples; memoized by the
+    serialized style object, so repeated style objects compile once.
+    """
+    styles = json.loads(styles_json)
+    if not isinstance(styles, dict):
+        return ()
+    tokens = design_tokens()
+    rules = []
+    for scope in SCOPE_ORDER:
+        declaration = styles.get(scope)
+        if not isinstance(declaration, dict):
+            continue
+        for prop, value in _declarations(declaration, tokens):
+            rules.append((_class_name(scope, prop, value), scope, f"{prop}:{value}"))
+    return tuple(rules)
+
+
+def compile_tree_styles(tree: dict) -> dict[str, Any]:
+    """Return ``{"css": <stylesheet>, "classes": {node_id: "cls cls ..."}}`` for ``tree``."""
+    rules_by_scope: dict[str, dict[str, str]] = {scope: {} for scope in SCOPE_ORDER}
+    classes: dict[str, str] = {}
+    nodes = tree.get("nodes") if isinstance(tree, dict) else None
+    for node_id, node in (nodes or {}).items():
+        styles = node.get("styles") if isinstance(node, dict) else None
+        if not styles:
+            continue
+        compiled = compile_node_styles(canonical_json(styles))
+        if not compiled:
+            continue
+        classes[node_id] = " ".join(name for name, _, _ in compiled)
+        for name, scope, body in compiled:
+            rules_by_scope[scope][name] = body
+
+    chunks = []
+    for scope in SCOPE_ORDER:
+        rules = "".join(f".{name}{{{body}}}" for name, body in sorted(rules_by_scope[scope].items()))
+        if not rules:
+            continue
+        query = _media_query(scope)
+        chunks.append(f"{query}{{{rules}}}" if query else rules)
+    return {"css": "\n".join(chunks), "classes": classes}
+
+
+def get_version_styles(version) -> dict[str, Any]:
+    """Compiled styles for a page version, cached per version revision."""
+    key = f"{STYLES_CACHE_PREFIX}{version.pk}:{version.updated_at.timestamp()}"
+    compiled = cache.get(key)
+    if compiled is None:
+        compiled = compile_tree_styles(version.tree)
+        cache.set(key, compiled, timeout=STYLES_CACHE_TTL_SECONDS)
+    return compiled
@@ -4,7 +4,19 @@ from __future__ import annotations
 from celery import shared_task
 from django.db import transaction
 
+from apps.common.tasks import dispatch_on_commit
+
 from .models import Page, PageVersion
+from .previews import generate_previews
+
+# Versions rendered per run of ``render_missing_previews``, which catches
+# renders that were never queued (for example during a broker outage).
+PREVIEW_SWEEP_BATCH = 20
+
+
+def schedule_version_preview(version_id) -> None:
+    """Queue preview rendering once the surrounding transaction commits."""
+    dispatch_on_commit(render_version_preview, str(version_id))
 
 
 @shared_task(name="pages.publish_version")
@@ -18,4 +30,31 @@ def publish_page_version(page_id: str, version_id: str) -> None:
     with transaction.atomic():
         version.mark_as_published()
         page.mark_published(version)
+    schedule_version_preview(version.id)
+
+
+@shared_task(name="pages.render_version_preview")
+def render_version_preview(version_id: str) -> None:
+    """Render raster previews for a published version's tree."""
+    try:
+        version = PageVersion.objects.select_related("source_template").get(id=version_id)
+    except PageVersion.DoesNotExist:
+        return
+    _store_previews(version)
+
+
+@shared_task(name="pages.render_missing_previews")
+def render_missing_previews() -> int:
+    """Render previews for published versions that still have none."""
+    versions = PageVersion.objects.select_related("source_template").filter(is_published=True, preview_images={})
+    rendered = 0
+    for version in versions.order_by("created_at")[:PREVIEW_SWEEP_BATCH]:
+        _store_previews(version)
+        rendered += 1
+    return rendered
+
 
+def _store_previews(version: PageVersion) -> None:
+    previews = generate_previews(version.tree)
+    if previews != version.preview_images:
+        PageVersion.objects.filter(id=version.id).update(preview_images=previews)
@@ -0,0 +1,122 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase, TestCase
+from PIL import Image
+
+from apps.builder_templates.models import PageTemplate
+from apps.builder_templates.tasks import render_stale_template_previews
+from apps.common.hashing import content_hash
+from apps.pages import previews
+from apps.pages.models import Page, PageVersion
+from apps.pages.tasks import render_missing_previews
+
+TREE = {
+    "version": "2025-10-01",
+    "root": "root",
+    "nodes": {
+        "root": {
+            "id": "root",
+            "type": "layout",
+            "component": "layout.section",
+            "props": {},
+            "children": ["grid"],
+            "styles": {"base": {"backgroundColor": "#0f172a", "padding": "64px 32px"}},
+        },
+        "grid": {
+            "id": "grid",
+            "type": "layout",
+            "component": "layout.columns-2",
+            "props": {},
+            "children": ["title", "image"],
+            "styles": {"base": {"gap": "24px"}},
+        },
+        "title": {
+            "id": "title",
+            "type": "component",
+            "component": "content.richText",
+            "props": {"text": "Hello", "tag": "h1"},
+            "children": [],
+        },
+        "image": {"id": "image", "type": "component", "component": "content.image", "props": {}, "children": []},
+    },
+}
+
+
+class PreviewRenderTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        patcher = mock.patch.object(previews, "media_storage", FileSystemStorage(location=self.media_root))
+        self.storage = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_render_paints_backgrounds(self):
+        image = previews.render_tree(TREE)
+        self.assertEqual(image.size, (previews.CANVAS_WIDTH, previews.VIEWPORT_HEIGHT))
+        self.assertEqual(image.getpixel((5, 5)), (15, 23, 42))
+
+    def test_generate_previews_stores_each_size_once(self):
+        result = previews.generate_previews(TREE)
+        self.assertEqual(set(result["sizes"]), {str(width) for width in previews.PREVIEW_WIDTHS})
+        for width, name in result["sizes"].items():
+            with self.storage.open(name) as fh:
+                self.assertEqual(Image.open(fh).width, int(width))
+
+        with mock.patch.object(previews, "render_tree") as render:
+            self.assertEqual(previews.generate_previews(dict(TREE)), result)
+        render.assert_not_called()
+
+    def test_render_tolerates_broken_trees(self):
+        broken = {"root": "missing", "nodes": {"a": {"children": ["a"]}}}
+        self.assertEqual(previews.render_tree(broken).size[0], previews.CANVAS_WIDTH)
+
+    def test_shared_children_are_laid_out_once(self):
+        # Each row lists the next row twice; followed blindly this is 2**40 boxes.
+        nodes = {
+            f"n{index}": {"component": "layout.row", "children": [f"n{index + 1}", f"n{index + 1}", ["x"]]}
+            for index in range(40)
+        }
+        nodes["n40"] = {"component": "content.richText", "props": {"text": "end"}}
+        tree = {"root": "n0", "nodes": nodes}
+        boxes = []
+        previews._layout(tree, "n0", 0, 0, previews.CANVAS_WIDTH, boxes, set())
+        self.assertEqual(len(boxes), 41)
+        self.assertEqual(previews.render_tree(tree).size[0], previews.CANVAS_WIDTH)
+
+
+class PreviewSweepTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        patcher = mock.patch.object(previews, "media_storage", FileSystemStorage(location=self.media_root))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        owner = get_user_model().objects.create_user(email="owner@example.com", password="pass")
+        self.page = Page.objects.create(owner=owner, title="Home", slug="home")
+
+    def test_published_versions_without_previews_are_rendered(self):
+        published = PageVersion.objects.create(page=self.page, version=1, title="v1", component_tree=TREE)
+        published.mark_as_published()
+        draft = PageVersion.objects.create(page=self.page, version=2, title="v2", component_tree=TREE)
+
+        self.assertEqual(render_missing_previews(), 1)
+        published.refresh_from_db()
+        draft.refresh_from_db()
+        self.assertEqual(published.preview_images["hash"], content_hash(TREE))
+        self.assertEqual(draft.preview_images, {})
+        self.assertEqual(render_missing_previews(), 0)
+
+    def test_templates_with_missing_or_outdated_previews_are_rendered(self):
+        template = PageTemplate.objects.create(name="Landing", component_tree=TREE)
+        self.assertEqual(render_stale_template_previews(), 1)
+        self.assertEqual(render_stale_template_previews(), 0)
+
+        tree = {**TREE, "version": "2025-11-01"}
+        PageTemplate.objects.filter(pk=template.pk).update(component_tree=tree)
+        self.assertEqual(render_stale_template_previews(), 1)
+        template.refresh_from_db()
+        self.assertEqual(template.preview_images["hash"], content_hash(tree))
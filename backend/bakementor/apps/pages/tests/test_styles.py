@@ -0,0 +1,58 @@
+from django.test import SimpleTestCase, override_settings
+
+from apps.pages.styles import compile_tree_styles
+
+
+def _node(node_id, styles):
+    return {"id": node_id, "type": "component", "component": "content.richText", "props": {}, "children": [], "styles": styles}
+
+
+class StyleCompilerTests(SimpleTestCase):
+    def test_tokens_resolve_and_breakpoints_wrap_overrides(self):
+        tree = {
+            "root": "a",
+            "nodes": {
+                "a": _node(
+                    "a",
+                    {
+                        "base": {"gap": "spacing.400", "padding": {"top": "64px", "left": "32px"}},
+                        "mobile": {"gap": "spacing.200"},
+                    },
+                )
+            },
+        }
+        result = compile_tree_styles(tree)
+        self.assertIn("gap:16px", result["css"])
+        self.assertIn("padding:64px 64px 64px 32px", result["css"])
+        self.assertIn("@media (max-width: 767px){", result["css"])
+        self.assertTrue(result["css"].index("gap:16px") < result["css"].index("@media"))
+        self.assertEqual(len(result["classes"]["a"].split()), 3)
+
+    def test_identical_declarations_share_classes(self):
+        styles = {"base": {"textAlign": "center", "color": "#111"}}
+        nodes = {f"n{i}": _node(f"n{i}", styles) for i in range(1000)}
+        result = compile_tree_styles({"root": "n0", "nodes": nodes})
+        self.assertEqual(result["css"].count("{"), 2)
+        self.assertEqual(len(set(result["classes"].values())), 1)
+
+    def test_unsafe_values_are_dropped(self):
+        tree = {"root": "a", "nodes": {"a": _node("a", {"base": {"color": "red;}body{display:none"}})}}
+        self.assertEqual(compile_tree_styles(tree), {"css": "", "classes": {}})
+
+    def test_unsafe_property_names_are_dropped(self):
+        hostile = "color:red}</style><script>alert(1)</script><style>a{x"
+        tree = {"root": "a", "nodes": {"a": _node("a", {"base": {hostile: "blue", "fontSize": "12px"}})}}
+        css = compile_tree_styles(tree)["css"]
+        self.assertNotIn("script", css)
+        self.assertNotIn("blue", css)
+        self.assertIn("font-size:12px", css)
+
+    @override_settings(BUILDER_DESIGN_TOKENS={"color": {"primary": {"500": "#2563eb"}}})
+    def test_nested_tokens_resolve_and_unknown_tokens_are_dropped(self):
+        styles = {"base": {"color": "color.primary.500", "borderColor": "color.primary.900", "gap": "spacing.999"}}
+        tree = {"root": "a", "nodes": {"a": _node("a", styles)}}
+        result = compile_tree_styles(tree)
+        self.assertIn("color:#2563eb", result["css"])
+        self.assertNotIn("border-color", result["css"])
+        self.assertNotIn("gap", result["css"])
+        self.assertEqual(len(result["classes"]["a"].split()), 1)
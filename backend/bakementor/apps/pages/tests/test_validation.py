@@ -0,0 +1,103 @@
+import time
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.builder_templates.models import ComponentCategory, ComponentDefinition
+from apps.pages.validation import validate_tree
+
+
+def _node(node_id, component="content.richText", children=(), **props):
+    return {
+        "id": node_id,
+        "type": "layout" if children else "component",
+        "component": component,
+        "props": props,
+        "children": list(children),
+    }
+
+
+def _tree(*nodes, root="root"):
+    return {"version": "1", "root": root, "nodes": {node["id"]: node for node in nodes}}
+
+
+class TreeValidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ComponentDefinition.objects.create(
+            key="content.richText",
+            name="Rich text",
+            category=ComponentCategory.CONTENT,
+            props_schema={
+                "type": "object",
+                "properties": {"text": {"type": "string"}, "tag": {"enum": ["h1", "h2", "p"]}},
+                "required": ["text"],
+            },
+        )
+
+    def test_valid_tree_and_empty_draft(self):
+        tree = _tree(_node("root", "layout.section", children=["a"]), _node("a", text="Hi", tag="h1"))
+        self.assertEqual(validate_tree(tree), [])
+        self.assertEqual(validate_tree({}), [])
+
+    def test_props_checked_against_schema(self):
+        tree = _tree(_node("root", "layout.section", children=["a"]), _node("a", tag="h9"))
+        errors = validate_tree(tree)
+        self.assertIn("nodes.a.props.text: is required", errors)
+        self.assertTrue(any(error.startswith("nodes.a.props.tag:") for error in errors))
+
+    def test_structure_errors(self):
+        tree = _tree(
+            _node("root", "layout.section", children=["a", "missing"]),
+            _node("a", text="x"),
+            _node("orphan", text="x"),
+            _node("loop-1", "layout.row", children=["loop-2"]),
+            _node("loop-2", "layout.row", children=["loop-1"]),
+        )
+        errors = validate_tree(tree)
+        self.assertIn("nodes.root.children: unknown node 'missing'", errors)
+        self.assertIn("nodes.orphan: is not reachable from the root", errors)
+        self.assertIn("nodes.loop-1: is part of a cycle", errors)
+        self.assertIn("nodes.loop-2: is part of a cycle", errors)
+
+    def test_shared_child_rejected(self):
+        tree = _tree(
+            _node("root", "layout.section", children=["a", "b"]),
+            _node("a", "layout.row", children=["c"]),
+            _node("b", "layout.row", children=["c"]),
+            _node("c", text="x"),
+        )
+        self.assertIn("nodes.b.children: 'c' already belongs to 'a'", validate_tree(tree))
+
+    def test_non_string_child_ids_are_errors(self):
+        tree = _tree(_node("root", "layout.section", children=[["a"], {"id": "a"}, "a"]), _node("a", text="x"))
+        errors = validate_tree(tree)
+        self.assertIn("nodes.root.children: unknown node ['a']", errors)
+        self.assertIn("nodes.root.children: unknown node {'id': 'a'}", errors)
+
+    def test_schema_change_recompiles_validator(self):
+        tree = _tree(_node("root", "layout.section", children=["a"]), _node("a", text="x"))
+        self.assertEqual(validate_tree(tree), [])
+        definition = ComponentDefinition.objects.get(key="content.richText")
+        definition.props_schema = {"type": "object", "properties": {"text": {"maxLength": 0}}}
+        with self.captureOnCommitCallbacks(execute=True):
+            definition.save()
+        self.assertEqual(validate_tree(tree), ["nodes.a.props.text: longer than 0 characters"])
+
+    def test_stored_malformed_schema_is_reported_not_raised(self):
+        ComponentDefinition.objects.filter(key="content.richText").update(
+            props_schema={"type": "object", "properties": {"text": {"pattern": "("}}}
+        )
+        cache.clear()
+        tree = _tree(_node("root", "layout.section", children=["a"]), _node("a", text="x"))
+        errors = validate_tree(tree)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith("nodes.a.props: component props_schema is invalid"))
+
+    def test_large_tree_validates_quickly(self):
+        leaves = [_node(f"n{i}", text="Lorem ipsum", tag="p") for i in range(5000)]
+        tree = _tree(_node("root", "layout.section", children=[leaf["id"] for leaf in leaves]), *leaves)
+        validate_tree(tree)
+        started = time.perf_counter()
+        self.assertEqual(validate_tree(tree), [])
+        self.assertLess(time.perf_counter() - started, 0.25)
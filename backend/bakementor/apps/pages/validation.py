@@ -0,0 +1,121 @@
+"""Structural and props validation for builder component trees."""
+from __future__ import annotations
+
+from typing import Any
+
+from apps.builder_templates.manifest import get_props_validators
+
+NODE_TYPES = frozenset({"layout", "component", "slot"})
+STYLE_SCOPES = frozenset({"base", "tablet", "mobile"})
+MAX_ERRORS = 50
+
+_EMPTY: dict = {}
+_EMPTY_LIST: list = []
+
+
+def validate_tree(tree: Any) -> list[str]:
+    """Return a list of problems found in ``tree`` (empty when it is valid).
+
+    Checks the document shape, every node's fields, that ``children`` point at
+    existing nodes, that each node has a single parent, that the graph has no
+    cycles or orphans, and that ``props`` match the component's
+    ``props_schema``. An empty document is accepted as a blank draft.
+    """
+    if tree == {}:
+        return []
+    if not isinstance(tree, dict):
+        return ["component_tree: expected an object"]
+    root = tree.get("root")
+    nodes = tree.get("nodes")
+    errors: list[str] = []
+    if not isinstance(root, str):
+        errors.append("root: expected a node id")
+    if not isinstance(nodes, dict):
+        errors.append("nodes: expected an object")
+    if errors:
+        return errors
+    if root not in nodes:
+        return [f"root: unknown node {root!r}"]
+
+    validators = get_props_validators()
+    parents: dict[str, str] = {}
+    # Paths are only formatted on failure; this loop runs on every autosave.
+    for node_id, node in nodes.items():
+        if type(node) is not dict:
+            errors.append(f"nodes.{node_id}: expected an object")
+            continue
+        if node.get("id", node_id) != node_id:
+            errors.append(f"nodes.{node_id}.id: does not match its key")
+        if node.get("type") not in NODE_TYPES:
+            errors.append(f"nodes.{node_id}.type: must be one of {sorted(NODE_TYPES)}")
+        component = node.get("component")
+        if type(component) is not str or not component:
+            errors.append(f"nodes.{node_id}.component: expected a component key")
+            component = None
+        props = node.get("props", _EMPTY)
+        if type(props) is not dict:
+            errors.append(f"nodes.{node_id}.props: expected an object")
+        elif component is not None:
+            check = validators.get(component)
+            if check is not None:
+                check(props, f"nodes.{node_id}.props", errors)
+        styles = node.get("styles")
+        if styles is not None:
+            if type(styles) is not dict:
+                errors.append(f"nodes.{node_id}.styles: expected an object")
+            else:
+                for scope, declaration in styles.items():
+                    if scope not in STYLE_SCOPES:
+                        errors.append(f"nodes.{node_id}.styles.{scope}: unknown breakpoint scope")
+                    elif type(declaration) is not dict:
+                        errors.append(f"nodes.{node_id}.styles.{scope}: expected an object")
+        children = node.get("children", _EMPTY_LIST)
+        if type(children) is not list:
+            errors.append(f"nodes.{node_id}.children: expected a list")
+            continue
+        for child_id in children:
+            if type(child_id) is not str or child_id in parents or child_id == root or child_id not in nodes:
+                errors.append(f"nodes.{node_id}.children: {_child_error(child_id, root, nodes, parents)}")
+            else:
+                parents[child_id] = node_id
+        if len(errors) >= MAX_ERRORS:
+            return errors[:MAX_ERRORS]
+
+    # Every non-root node has at most one parent at this point, so following
+    # recorded parent links from the root finds the tree; anything left over
+    # is either an orphan subtree or a detached cycle.
+    reachable = {root}
+    stack = [root]
+    while stack:
+        node_id = stack.pop()
+        node = nodes[node_id]
+        children = node.get("children") if isinstance(node, dict) else None
+        for child_id in children if isinstance(children, list) else ():
+            if type(child_id) is str and parents.get(child_id) == node_id and child_id not in reachable:
+                reachable.add(child_id)
+                stack.append(child_id)
+    if len(reachable) != len(nodes):
+        detached = sorted(node_id for node_id in nodes if node_id not in reachable)
+        for node_id in detached[: MAX_ERRORS - len(errors)]:
+            reason = "is part of a cycle" if _in_cycle(node_id, parents) else "is not reachable from the root"
+            errors.append(f"nodes.{node_id}: {reason}")
+    return errors[:MAX_ERRORS]
+
+
+def _in_cycle(node_id: str, parents: dict[str, str]) -> bool:
+    seen = set()
+    current = parents.get(node_id)
+    while current is not None and current not in seen:
+        if current == node_id:
+            return True
+        seen.add(current)
+        current = parents.get(current)
+    return False
+
+
+def _child_error(child_id: Any, root: str, nodes: dict, parents: dict[str, str]) -> str:
+    if type(child_id) is not str or child_id not in nodes:
+        return f"unknown node {child_id!r}"
+    if child_id == root:
+        return "the root node cannot be a child"
+    return f"{child_id!r} already belongs to {parents[child_id]!r}"
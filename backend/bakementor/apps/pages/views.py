@@ -16,17 +16,21 @@ from .serializers import (
     PageVersionWriteSerializer,
     PageListSerializer,
 )
+from .styles import get_version_styles
 
 
 class PageViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return (
-            Page.objects.select_related("owner", "current_version", "published_version")
-            .filter(owner=self.request.user, is_deleted=False)
-            .order_by("title")
-        )
+        queryset = Page.objects.select_related("owner", "current_version", "published_version")
+        if self.action != "list":
+            # Detail responses include the tree, which may live on a shared template.
+            queryset = queryset.select_related(
+                "current_version__source_template",
+                "published_version__source_template",
+            )
+        return queryset.filter(owner=self.request.user, is_deleted=False).order_by("title")
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -54,7 +58,7 @@ class PageViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"], url_path="versions")
     def list_versions(self, request, pk=None):
         page = self.get_object()
-        versions = page.versions.order_by("-created_at")
+        versions = page.versions.select_related("source_template").order_by("-created_at")
         serializer = PageVersionSerializer(versions, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
 
@@ -78,7 +82,7 @@ class PageViewSet(viewsets.ModelViewSet):
 
 class PublicPageViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     permission_classes = [permissions.AllowAny]
-    queryset = Page.objects.select_related("published_version")
+    queryset = Page.objects.select_related("owner", "published_version__source_template")
     lookup_field = "slug"
 
     def retrieve(self, request, *args, **kwargs):
@@ -90,6 +94,7 @@ class PublicPageViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
             {
                 "page": PageSerializer(page, context=self.get_serializer_context()).data,
                 "version": serializer.data,
+                "styles": get_version_styles(page.published_version),
             }
         )
 
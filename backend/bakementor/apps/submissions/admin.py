@@ -0,0 +1,16 @@
+"""Admin registrations for form submissions."""
+from __future__ import annotations
+
+from django.contrib import admin
+
+from .models import FormSubmission
+
+
+@admin.register(FormSubmission)
+class FormSubmissionAdmin(admin.ModelAdmin):
+    list_display = ("page", "form_id", "submitted_at", "ip_address")
+    list_filter = ("submitted_at",)
+    search_fields = ("page__title", "form_id")
+    readonly_fields = ("created_at", "updated_at")
+    autocomplete_fields = ("page",)
+    raw_id_fields = ("version",)
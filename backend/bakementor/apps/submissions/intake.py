@@ -0,0 +1,102 @@
+"""Buffered intake of form submissions through a Redis stream.
+
+The public endpoint validates a submission against the cached form
+definition and appends it to ``STREAM_KEY`` (one ``XADD``); it never
+inserts. ``submissions.drain`` workers read the stream through a consumer
+group (see ``apps.common.streams``), store each batch with one
+``bulk_create`` and only then acknowledge the entries, so a spike of
+submissions becomes a few large inserts.
+
+Delivery is at-least-once, as for page visits (see
+``apps.analytics.ingest``): ids are derived from stream entry ids, so a
+redelivered batch inserts nothing twice. Unlike visits, submissions are not
+dropped when Redis is unavailable; they are inserted directly instead.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+
+import redis
+from django.conf import settings
+
+from apps.common.streams import StreamConsumer, entry_time, redis_client
+from apps.pages.models import Page
+
+from .models import FormSubmission
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "forms:submissions"
+GROUP = "forms-intake"
+STREAM_MAXLEN = 1_000_000
+BATCH_SIZE = 1000
+DRAIN_TIME_BUDGET = 9.0
+
+# Namespace for submission ids derived from stream entry ids.
+SUBMISSION_NAMESPACE = uuid.UUID("4f0d6c1e-8a7b-4c35-9e21-b3a6d0f5c7e9")
+
+
+def get_redis() -> redis.Redis:
+    return redis_client(settings.SUBMISSIONS_REDIS_URL)
+
+
+def record_submission(page_id, version_id, form_id: str, data: dict, ip_address: str | None = None) -> bool:
+    """Queue a validated submission; return ``False`` if it had to be inserted directly."""
+    fields = {
+        "page": str(page_id),
+        "version": str(version_id or ""),
+        "form": form_id,
+        "ip": ip_address or "",
+        "data": json.dumps(data, separators=(",", ":")),
+    }
+    try:
+        get_redis().xadd(STREAM_KEY, fields, maxlen=STREAM_MAXLEN, approximate=True)
+        return True
+    except redis.RedisError:
+        logger.warning("Submission buffer unavailable; storing form %s of page %s directly", form_id, page_id, exc_info=True)
+    FormSubmission.objects.create(
+        page_id=page_id, version_id=version_id or None, form_id=form_id, data=data, ip_address=ip_address or None
+    )
+    return False
+
+
+def _submission(entry_id: str, fields: dict | None) -> FormSubmission | None:
+    if not fields:
+        return None
+    try:
+        return FormSubmission(
+            id=uuid.uuid5(SUBMISSION_NAMESPACE, entry_id),
+            page_id=uuid.UUID(fields["page"]),
+            version_id=uuid.UUID(fields["version"]) if fields.get("version") else None,
+            form_id=fields["form"],
+            data=json.loads(fields["data"]),
+            ip_address=fields.get("ip") or None,
+            submitted_at=entry_time(entry_id),
+        )
+    except (KeyError, ValueError):
+        return None
+
+
+def persist_submissions(entries: list[tuple[str, dict | None]]) -> list[FormSubmission]:
+    """Insert the submissions in ``entries`` with one ``bulk_create``; return those kept.
+
+    Malformed entries and submissions to pages deleted since are dropped;
+    entries stored before (redelivery) are skipped by the primary key.
+    """
+    submissions = [item for item in (_submission(entry_id, fields) for entry_id, fields in entries) if item]
+    if not submissions:
+        return []
+    known = set(Page.objects.filter(id__in={item.page_id for item in submissions}).values_list("id", flat=True))
+    submissions = [item for item in submissions if item.page_id in known]
+    FormSubmission.objects.bulk_create(submissions, batch_size=500, ignore_conflicts=True)
+    return submissions
+
+
+submissions_stream = StreamConsumer(STREAM_KEY, GROUP, persist_submissions)
+
+
+def drain(consumer: str, batch_size: int = BATCH_SIZE, time_budget: float = DRAIN_TIME_BUDGET) -> int:
+    """Move buffered submissions into ``FormSubmission`` until the stream is empty or time runs out."""
+    return submissions_stream.drain(get_redis(), consumer, batch_size, time_budget)
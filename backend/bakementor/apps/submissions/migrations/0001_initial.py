@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:18
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('pages', '0003_pageversion_preview_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormSubmission',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('form_id', models.CharField(max_length=100)),
+                ('data', models.JSONField(default=dict)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('submitted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('page', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='form_submissions', to='pages.page')),
+                ('version', models.ForeignKey(blank=True, help_text='Published version whose field definitions the data was validated against.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='form_submissions', to='pages.pageversion')),
+            ],
+            options={
+                'ordering': ('-submitted_at',),
+                'indexes': [models.Index(fields=['page', 'form_id', 'submitted_at', 'id'], name='submissions_form_recent')],
+            },
+        ),
+    ]
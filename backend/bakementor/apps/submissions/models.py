@@ -0,0 +1,36 @@
+"""Submissions of forms built into published pages."""
+from __future__ import annotations
+
+from django.db import models
+from django.utils import timezone
+
+from apps.common.models import TimeStampedModel, UUIDModel
+
+
+class FormSubmission(UUIDModel, TimeStampedModel):
+    """One submission of the form rooted at node ``form_id`` of a page."""
+
+    # Indexed by ``submissions_form_recent``, whose leading column it is.
+    page = models.ForeignKey("pages.Page", related_name="form_submissions", on_delete=models.CASCADE, db_index=False)
+    version = models.ForeignKey(
+        "pages.PageVersion",
+        related_name="form_submissions",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        help_text="Published version whose field definitions the data was validated against.",
+    )
+    form_id = models.CharField(max_length=100)
+    data = models.JSONField(default=dict)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    # Set from the buffered event, not the insert time (see ``apps.submissions.intake``).
+    submitted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("-submitted_at",)
+        indexes = [
+            models.Index(fields=("page", "form_id", "submitted_at", "id"), name="submissions_form_recent"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.form_id} @ {self.submitted_at:%Y-%m-%d %H:%M}"
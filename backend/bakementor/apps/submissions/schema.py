@@ -0,0 +1,182 @@
+"""Field definitions of builder forms and validation of submitted data.
+
+A form is any node of a published component tree; its fields are the
+``forms.*`` components below it (the node itself included), keyed by their
+``name`` prop. Radio buttons sharing a name make one field whose choices
+are their values. Definitions are read from the page's published version
+and cached briefly, so intake does not touch the database per submission.
+Cache keys carry a per-page generation that ``invalidate_published_forms``
+bumps when the page is published, hidden or deleted.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator, validate_email
+from django.utils.dateparse import parse_datetime
+
+from apps.pages.models import Page
+
+FIELD_PREFIX = "forms."
+MAX_TEXT_LENGTH = 1000
+MAX_TEXTAREA_LENGTH = 5000
+SCHEMA_CACHE_TIMEOUT = 60
+
+
+@dataclass(frozen=True)
+class FormField:
+    name: str
+    component: str
+    required: bool = False
+    input_type: str = "text"
+    choices: tuple[str, ...] = field(default=())
+
+
+@dataclass(frozen=True)
+class PublishedForm:
+    page_id: str
+    version_id: str
+    fields: tuple[FormField, ...]
+
+
+def _flag(value) -> bool:
+    return value is True or value == "true"
+
+
+def form_fields(tree: dict, form_id: str) -> tuple[FormField, ...] | None:
+    """Fields of the form rooted at ``form_id`` in document order; ``None`` if there is no such form."""
+    nodes = tree.get("nodes") if isinstance(tree, dict) else None
+    if not isinstance(nodes, dict) or not isinstance(nodes.get(form_id), dict):
+        return None
+    fields: dict[str, FormField] = {}
+    stack, seen = [form_id], set()
+    while stack:
+        node_id = stack.pop()
+        node = nodes.get(node_id)
+        if node_id in seen or not isinstance(node, dict):
+            continue
+        seen.add(node_id)
+        component, props = node.get("component"), node.get("props") or {}
+        if isinstance(component, str) and component.startswith(FIELD_PREFIX) and isinstance(props, dict):
+            name = str(props.get("name") or node_id)
+            required = _flag(props.get("required"))
+            if component == "forms.select":
+                choices = tuple(line.strip() for line in str(props.get("options", "")).splitlines() if line.strip())
+            elif component == "forms.radio":
+                value = str(props.get("value") or props.get("label") or "")
+                previous = fields.get(name)
+                choices = (previous.choices if previous else ()) + (value,)
+                required = required or (previous.required if previous else False)
+            else:
+                choices = ()
+            fields[name] = FormField(
+                name=name,
+                component=component,
+                required=required,
+                input_type=str(props.get("type") or "text"),
+                choices=choices,
+            )
+        children = node.get("children")
+        if isinstance(children, list):
+            stack.extend(reversed(children))
+    return tuple(fields.values()) or None
+
+
+def _generation_key(page_id) -> str:
+    return f"forms:schema:{page_id}:generation"
+
+
+def invalidate_published_forms(page_id) -> None:
+    """Stop serving the page's cached form definitions."""
+    key = _generation_key(page_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_published_form(page_id, form_id: str) -> PublishedForm | None:
+    """The form ``form_id`` of the page's published version, if the page is public."""
+    generation = cache.get(_generation_key(page_id), 0)
+    key = f"forms:schema:{page_id}:{generation}:{form_id}"
+    cached = cache.get(key)
+    if cached is not None:
+        return cached or None
+    page = (
+        Page.objects.alive()
+        .filter(pk=page_id, is_public=True)
+        .select_related("published_version__source_template")
+        .first()
+    )
+    form = None
+    if page is not None and page.published_version is not None:
+        fields = form_fields(page.published_version.tree, form_id)
+        if fields:
+            form = PublishedForm(page_id=str(page.pk), version_id=str(page.published_version_id), fields=fields)
+    # Unknown forms are cached too, so junk posts cannot reach the database.
+    cache.set(key, form or False, SCHEMA_CACHE_TIMEOUT)
+    return form
+
+
+def _clean_text(spec: FormField, value, limit: int):
+    if not isinstance(value, str):
+        raise ValidationError("Expected text.")
+    value = value.strip()
+    if len(value) > limit:
+        raise ValidationError(f"Ensure this value has at most {limit} characters.")
+    if spec.input_type == "email":
+        validate_email(value)
+    elif spec.input_type == "url":
+        URLValidator()(value)
+    elif spec.input_type == "number":
+        try:
+            float(value)
+        except ValueError:
+            raise ValidationError("Enter a number.")
+    return value
+
+
+def _clean_value(spec: FormField, value):
+    if spec.component == "forms.checkbox":
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value in {"true", "on", "1"}:
+            return True
+        if isinstance(value, str) and value in {"false", "off", "0"}:
+            return False
+        raise ValidationError("Expected a boolean.")
+    if spec.component in {"forms.select", "forms.radio"}:
+        if not isinstance(value, str) or value not in spec.choices:
+            raise ValidationError("Select a valid choice.")
+        return value
+    if spec.component == "forms.datetime":
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+        if parsed is None:
+            raise ValidationError("Enter a valid date and time.")
+        return parsed.isoformat()
+    limit = MAX_TEXTAREA_LENGTH if spec.component == "forms.textarea" else MAX_TEXT_LENGTH
+    return _clean_text(spec, value, limit)
+
+
+def clean_submission(fields: tuple[FormField, ...], data: dict) -> tuple[dict, dict[str, list[str]]]:
+    """Validate ``data`` against ``fields``; return ``(cleaned, errors)``.
+
+    Keys that are not fields of the form are dropped. Empty optional fields
+    are left out of ``cleaned``; an unchecked required checkbox is an error.
+    """
+    cleaned, errors = {}, {}
+    for spec in fields:
+        value = data.get(spec.name)
+        if value is None or value == "" or (spec.component == "forms.checkbox" and value is False):
+            if spec.required:
+                errors[spec.name] = ["This field is required."]
+            elif spec.component == "forms.checkbox" and value is False:
+                cleaned[spec.name] = False
+            continue
+        try:
+            cleaned[spec.name] = _clean_value(spec, value)
+        except ValidationError as exc:
+            errors[spec.name] = list(exc.messages)
+    return cleaned, errors
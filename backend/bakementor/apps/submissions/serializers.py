@@ -0,0 +1,31 @@
+"""Form submission serializers."""
+from __future__ import annotations
+
+from rest_framework import serializers
+
+from .models import FormSubmission
+
+
+class FormSubmissionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FormSubmission
+        fields = (
+            "id",
+            "page",
+            "version",
+            "form_id",
+            "data",
+            "ip_address",
+            "submitted_at",
+        )
+        read_only_fields = fields
+
+
+class SubmissionFilterSerializer(serializers.Serializer):
+    page = serializers.UUIDField(required=False)
+    form = serializers.CharField(required=False, max_length=100)
+
+
+class SubmissionExportQuerySerializer(serializers.Serializer):
+    page = serializers.UUIDField()
+    form = serializers.CharField(max_length=100)
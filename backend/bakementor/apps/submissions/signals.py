@@ -0,0 +1,25 @@
+"""Signal handlers keeping cached form definitions in step with their pages."""
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.pages.models import Page
+
+from .schema import invalidate_published_forms
+
+# Fields that decide which form definitions, if any, intake accepts.
+FORM_FIELDS = frozenset({"published_version", "is_public", "is_deleted"})
+
+
+@receiver(post_save, sender=Page)
+def invalidate_forms_on_publish(sender, instance: Page, raw: bool = False, update_fields=None, **kwargs) -> None:
+    if raw or (update_fields is not None and not FORM_FIELDS.intersection(update_fields)):
+        return
+    transaction.on_commit(lambda: invalidate_published_forms(instance.pk))
+
+
+@receiver(post_delete, sender=Page)
+def invalidate_forms_on_delete(sender, instance: Page, **kwargs) -> None:
+    transaction.on_commit(lambda: invalidate_published_forms(instance.pk))
@@ -0,0 +1,15 @@
+"""Celery tasks for form submissions."""
+from __future__ import annotations
+
+import os
+import socket
+
+from celery import shared_task
+
+from .intake import drain
+
+
+@shared_task(name="submissions.drain")
+def drain_submissions() -> int:
+    """Bulk-insert submissions buffered by the intake endpoint."""
+    return drain(consumer=f"{socket.gethostname()}-{os.getpid()}")
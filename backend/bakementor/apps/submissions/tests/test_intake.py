@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import uuid
+from unittest import mock
+
+import redis
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.throttling import ScopedRateThrottle
+
+from apps.pages.models import Page, PageVersion
+from apps.submissions import intake
+from apps.submissions.models import FormSubmission
+from apps.submissions.views import FormIntakeView
+
+User = get_user_model()
+
+TREE = {
+    "root": "form",
+    "nodes": {
+        "form": {"id": "form", "component": "layout.container", "props": {}, "children": ["email", "message"]},
+        "email": {"id": "email", "component": "forms.input", "props": {"name": "email", "type": "email", "required": True}},
+        "message": {"id": "message", "component": "forms.textarea", "props": {"name": "message"}},
+    },
+}
+
+
+class SubmissionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.redis = mock.Mock()
+        patcher = mock.patch.object(intake, "get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.owner = User.objects.create_user(email="owner@example.com", password="pass")
+        self.page = Page.objects.create(owner=self.owner, title="Contact", slug="contact")
+        self.version = PageVersion.objects.create(page=self.page, version=1, title="v1", component_tree=TREE)
+        self.page.current_version = self.version
+        self.page.save(update_fields=["current_version"])
+        self.page.mark_published(self.version)
+
+
+class FormIntakeTests(SubmissionTestCase):
+    def _submit(self, data, form_id="form", page_id=None):
+        url = reverse("form-submit", args=[page_id or self.page.pk, form_id])
+        return APIClient().post(url, data, format="json")
+
+    def test_valid_submission_is_buffered_without_inserting(self):
+        self._submit({"email": "a@example.com"})  # warms the schema cache
+        with self.assertNumQueries(0):
+            res = self._submit({"email": "b@example.com", "message": "Hi", "spam": "x"})
+        self.assertEqual(res.status_code, 202)
+        (key, fields), _ = self.redis.xadd.call_args
+        self.assertEqual(key, intake.STREAM_KEY)
+        self.assertEqual(fields["form"], "form")
+        self.assertEqual(fields["version"], str(self.version.pk))
+        self.assertEqual(fields["data"], '{"email":"b@example.com","message":"Hi"}')
+        self.assertFalse(FormSubmission.objects.exists())
+
+    def test_invalid_submissions_and_unknown_forms_are_rejected(self):
+        res = self._submit({"email": "nope"})
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("email", res.json())
+        self.assertEqual(self._submit({"email": "a@example.com"}, form_id="email-x").status_code, 404)
+        self.assertEqual(self._submit({"email": "a@example.com"}, page_id=uuid.uuid4()).status_code, 404)
+        self.redis.xadd.assert_not_called()
+
+    def test_oversized_and_malformed_lengths_are_handled(self):
+        self.assertEqual(self._submit({"email": "a@example.com", "message": "x" * 40_000}).status_code, 413)
+        url = reverse("form-submit", args=[self.page.pk, "form"])
+        res = APIClient().post(url, {"email": "a@example.com"}, format="json", CONTENT_LENGTH="abc")
+        self.assertNotEqual(res.status_code, 500)
+
+    def test_bodies_without_a_length_header_are_measured(self):
+        url = reverse("form-submit", args=[self.page.pk, "form"])
+        request = APIRequestFactory().post(url, {"email": "a@example.com", "message": "x" * 40_000}, format="json")
+        del request.META["CONTENT_LENGTH"]  # as for a chunked request body
+        res = FormIntakeView.as_view()(request, page_id=self.page.pk, form_id="form")
+        self.assertEqual(res.status_code, 413)
+        self.redis.xadd.assert_not_called()
+
+    def test_submissions_are_throttled_per_client_and_per_form(self):
+        # Every request counts towards the form's limit, even one refused per client.
+        rates = {"form-intake": "2/min", "form-intake-form": "4/min"}
+        with mock.patch.object(ScopedRateThrottle, "THROTTLE_RATES", rates):
+            self.assertEqual(self._submit({"email": "a@example.com"}).status_code, 202)
+            self.assertEqual(self._submit({"email": "a@example.com"}).status_code, 202)
+            self.assertEqual(self._submit({"email": "a@example.com"}).status_code, 429)
+
+            url = reverse("form-submit", args=[self.page.pk, "form"])
+            other = APIClient(REMOTE_ADDR="10.0.0.2")
+            self.assertEqual(other.post(url, {"email": "b@example.com"}, format="json").status_code, 202)
+            self.assertEqual(other.post(url, {"email": "b@example.com"}, format="json").status_code, 429)
+
+    def test_publishing_and_hiding_the_page_drop_the_cached_form(self):
+        self.assertEqual(self._submit({"email": "a@example.com"}).status_code, 202)
+        tree = json.loads(json.dumps(TREE))
+        tree["nodes"]["message"]["props"]["required"] = True
+        version = PageVersion.objects.create(page=self.page, version=2, title="v2", component_tree=tree)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.page.mark_published(version)
+        self.assertIn("message", self._submit({"email": "a@example.com"}).json())
+
+        self.page.is_public = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.page.save(update_fields=["is_public"])
+        self.assertEqual(self._submit({"email": "a@example.com", "message": "Hi"}).status_code, 404)
+
+    def test_buffer_outage_stores_the_submission_directly(self):
+        self.redis.xadd.side_effect = redis.ConnectionError("down")
+        self.assertEqual(self._submit({"email": "a@example.com"}).status_code, 202)
+        submission = FormSubmission.objects.get()
+        self.assertEqual((submission.form_id, submission.data), ("form", {"email": "a@example.com"}))
+
+
+class PersistSubmissionsTests(SubmissionTestCase):
+    def _entry(self, entry_id, **fields):
+        data = {
+            "page": str(self.page.pk),
+            "version": str(self.version.pk),
+            "form": "form",
+            "ip": "10.0.0.1",
+            "data": '{"email":"a@example.com"}',
+        }
+        return entry_id, {**data, **fields}
+
+    def test_submissions_are_inserted_once_even_when_redelivered(self):
+        entries = [
+            self._entry("1700000000000-0"),
+            self._entry("1700000000500-0", page=str(uuid.uuid4())),
+            self._entry("1700000000600-0", data="not json"),
+            ("1700000000700-0", None),
+        ]
+        self.assertEqual(len(intake.persist_submissions(entries)), 1)
+        self.assertEqual(len(intake.persist_submissions(entries)), 1)
+        submission = FormSubmission.objects.get()
+        self.assertEqual(submission.submitted_at.timestamp(), 1_700_000_000)
+        self.assertEqual(submission.data, {"email": "a@example.com"})
+
+    def test_drain_stores_and_acknowledges_a_batch(self):
+        self.redis.xautoclaim.return_value = ["0-0", [], []]
+        self.redis.xreadgroup.return_value = [[intake.STREAM_KEY, [self._entry("1700000000000-0")]]]
+        self.assertEqual(intake.drain("worker", batch_size=10), 1)
+        pipe = self.redis.pipeline.return_value
+        pipe.xack.assert_called_once_with(intake.STREAM_KEY, intake.GROUP, "1700000000000-0")
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
+
+class SubmissionListTests(SubmissionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+        submitted = [
+            {"email": "a@example.com"},
+            {"email": "b@example.com", "message": '=HYPERLINK("x")', "phone": "123"},
+        ]
+        entries = [
+            (f"170000000{index}000-0", {"page": str(self.page.pk), "form": "form", "data": json.dumps(data)})
+            for index, data in enumerate(submitted)
+        ]
+        intake.persist_submissions(entries)
+
+    def test_owner_lists_submissions_newest_first(self):
+        res = self.api.get(reverse("form-submissions-list"), {"page": self.page.pk, "form": "form"})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([row["data"]["email"] for row in res.json()["results"]], ["b@example.com", "a@example.com"])
+
+        stranger = APIClient()
+        stranger.force_authenticate(User.objects.create_user(email="other@example.com", password="pass"))
+        self.assertEqual(stranger.get(reverse("form-submissions-list")).json()["results"], [])
+
+    def test_export_streams_csv_with_form_columns(self):
+        res = self.api.get(reverse("form-submissions-export"), {"page": self.page.pk, "form": "form"})
+        self.assertEqual(res.status_code, 200)
+        rows = list(csv.reader(io.StringIO(b"".join(res.streaming_content).decode())))
+        self.assertEqual(rows[0], ["id", "submitted_at", "email", "message", "other"])
+        self.assertEqual([row[2] for row in rows[1:]], ["a@example.com", "b@example.com"])
+        self.assertEqual(rows[2][3], "'=HYPERLINK(\"x\")")
+        self.assertEqual(rows[2][4], '{"phone": "123"}')
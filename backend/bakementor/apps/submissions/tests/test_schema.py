@@ -0,0 +1,51 @@
+from django.test import SimpleTestCase
+
+from apps.submissions.schema import clean_submission, form_fields
+
+TREE = {
+    "root": "root",
+    "nodes": {
+        "root": {"id": "root", "component": "layout.section", "props": {}, "children": ["form", "footer"]},
+        "form": {"id": "form", "component": "layout.container", "props": {}, "children": ["email", "plan-a", "plan-b", "terms", "when"]},
+        "email": {"id": "email", "component": "forms.input", "props": {"name": "email", "type": "email", "required": True}},
+        "plan-a": {"id": "plan-a", "component": "forms.radio", "props": {"name": "plan", "value": "basic"}},
+        "plan-b": {"id": "plan-b", "component": "forms.radio", "props": {"name": "plan", "value": "pro", "required": True}},
+        "terms": {"id": "terms", "component": "forms.checkbox", "props": {"name": "terms", "required": "true"}},
+        "when": {"id": "when", "component": "forms.datetime", "props": {"name": "when"}},
+        "footer": {"id": "footer", "component": "forms.input", "props": {"name": "newsletter"}},
+    },
+}
+
+
+class FormFieldsTests(SimpleTestCase):
+    def test_fields_are_collected_below_the_form_node_in_document_order(self):
+        fields = form_fields(TREE, "form")
+        self.assertEqual([spec.name for spec in fields], ["email", "plan", "terms", "when"])
+        plan = fields[1]
+        self.assertEqual(plan.choices, ("basic", "pro"))
+        self.assertTrue(plan.required)
+
+    def test_unknown_or_fieldless_nodes_are_not_forms(self):
+        self.assertIsNone(form_fields(TREE, "missing"))
+        self.assertIsNone(form_fields({"nodes": {"x": {"component": "layout.section"}}}, "x"))
+
+
+class CleanSubmissionTests(SimpleTestCase):
+    def setUp(self):
+        self.fields = form_fields(TREE, "form")
+
+    def test_valid_data_is_normalised_and_unknown_keys_dropped(self):
+        cleaned, errors = clean_submission(
+            self.fields, {"email": " a@example.com ", "plan": "pro", "terms": "on", "extra": "x"}
+        )
+        self.assertEqual(errors, {})
+        self.assertEqual(cleaned, {"email": "a@example.com", "plan": "pro", "terms": True})
+
+    def test_invalid_and_missing_fields_are_reported(self):
+        _, errors = clean_submission(self.fields, {"email": "nope", "plan": "gold", "when": "soon"})
+        self.assertEqual(set(errors), {"email", "plan", "terms", "when"})
+        self.assertEqual(errors["terms"], ["This field is required."])
+
+    def test_structured_values_are_rejected(self):
+        _, errors = clean_submission(self.fields, {"email": ["a"], "plan": {"x": 1}, "terms": ["on"], "when": [1]})
+        self.assertEqual(set(errors), {"email", "plan", "terms", "when"})
@@ -0,0 +1,13 @@
+"""Form submission API routes."""
+from django.urls import path
+from rest_framework.routers import DefaultRouter
+
+from .views import FormIntakeView, FormSubmissionViewSet
+
+router = DefaultRouter()
+router.register(r"submissions", FormSubmissionViewSet, basename="form-submissions")
+
+urlpatterns = [
+    path("<uuid:page_id>/<str:form_id>/submit/", FormIntakeView.as_view(), name="form-submit"),
+    *router.urls,
+]
@@ -0,0 +1,145 @@
+"""Form submission endpoints."""
+from __future__ import annotations
+
+import json
+
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.views import APIView
+
+from apps.common.pagination import KeysetPagination
+from apps.common.streaming import iter_csv
+from apps.pages.models import Page
+
+from .intake import record_submission
+from .models import FormSubmission
+from .schema import clean_submission, form_fields, get_published_form
+from .serializers import FormSubmissionSerializer, SubmissionExportQuerySerializer, SubmissionFilterSerializer
+
+MAX_SUBMISSION_BYTES = 32 * 1024
+EXPORT_CHUNK = 2000
+
+
+def _content_length(request) -> int:
+    # Malformed headers count as empty, as in ``WSGIRequest``.
+    try:
+        return int(request.META.get("CONTENT_LENGTH"))
+    except (ValueError, TypeError):
+        return 0
+
+
+def _body_size(request) -> int:
+    # Chunked bodies carry no Content-Length, so measure what was read;
+    # ``request.body`` itself stops at ``DATA_UPLOAD_MAX_MEMORY_SIZE``.
+    try:
+        return len(request.body)
+    except ValueError:  # malformed Content-Length, parsed as empty by DRF
+        return 0
+
+
+class FormRateThrottle(ScopedRateThrottle):
+    """Limits submissions to one form from all clients together."""
+
+    scope_attr = "form_throttle_scope"
+
+    def get_cache_key(self, request, view):
+        ident = f"{view.kwargs['page_id']}:{view.kwargs['form_id']}"
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class FormIntakeView(APIView):
+    """Public endpoint receiving a submission of form ``form_id`` on a published page.
+
+    The body (JSON or form-encoded) maps field names to values and is
+    validated against the form's fields in the published version. Valid
+    submissions are queued and stored in batches (see
+    ``apps.submissions.intake``); the response is ``202``. Requests are
+    throttled per client address and per form (``form-intake`` and
+    ``form-intake-form`` in ``DEFAULT_THROTTLE_RATES``).
+    """
+
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    parser_classes = [JSONParser, FormParser]
+    throttle_classes = [ScopedRateThrottle, FormRateThrottle]
+    throttle_scope = "form-intake"
+    form_throttle_scope = "form-intake-form"
+
+    def post(self, request, page_id, form_id):
+        if _content_length(request) > MAX_SUBMISSION_BYTES or _body_size(request) > MAX_SUBMISSION_BYTES:
+            return Response({"detail": "Payload too large."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        form = get_published_form(page_id, form_id)
+        if form is None:
+            return Response({"detail": "Form not found."}, status=status.HTTP_404_NOT_FOUND)
+        data = request.data.dict() if hasattr(request.data, "dict") else request.data
+        if not isinstance(data, dict):
+            return Response({"detail": "Expected an object of field values."}, status=status.HTTP_400_BAD_REQUEST)
+        cleaned, errors = clean_submission(form.fields, data)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        record_submission(form.page_id, form.version_id, form_id, cleaned, request.META.get("REMOTE_ADDR"))
+        return Response({"accepted": True}, status=status.HTTP_202_ACCEPTED)
+
+
+class SubmissionPagination(KeysetPagination):
+    ordering = ("-submitted_at", "-id")
+    page_size = 50
+    max_page_size = 500
+
+
+class FormSubmissionViewSet(viewsets.ReadOnlyModelViewSet):
+    """Submissions to the user's pages, newest first; ``?page=`` and ``?form=`` narrow them."""
+
+    serializer_class = FormSubmissionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SubmissionPagination
+    # The keyset order is fixed; a client-chosen ``?ordering=`` would break the cursor.
+    filter_backends = ()
+
+    def get_queryset(self):
+        queryset = FormSubmission.objects.filter(page__owner=self.request.user)
+        query = SubmissionFilterSerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        if "page" in query.validated_data:
+            queryset = queryset.filter(page_id=query.validated_data["page"])
+        if "form" in query.validated_data:
+            queryset = queryset.filter(form_id=query.validated_data["form"])
+        return queryset.order_by(*SubmissionPagination.ordering)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Every submission of one form as CSV, oldest first, streamed from a server-side cursor.
+
+        Columns follow the form's fields in the published (or current)
+        version; values of fields no longer on the form go to ``other``.
+        """
+        query = SubmissionExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        page = get_object_or_404(
+            Page.objects.select_related("published_version__source_template", "current_version__source_template"),
+            pk=query.validated_data["page"],
+            owner=request.user,
+        )
+        form_id = query.validated_data["form"]
+        version = page.published_version or page.current_version
+        names = [spec.name for spec in (form_fields(version.tree, form_id) if version else None) or ()]
+        rows = (
+            FormSubmission.objects.filter(page=page, form_id=form_id)
+            .order_by("submitted_at", "id")
+            .values_list("id", "submitted_at", "data")
+            .iterator(chunk_size=EXPORT_CHUNK)
+        )
+
+        def lines():
+            for pk, submitted_at, data in rows:
+                other = {key: value for key, value in data.items() if key not in names}
+                yield [pk, submitted_at.isoformat(), *(data.get(name, "") for name in names), json.dumps(other) if other else ""]
+
+        response = StreamingHttpResponse(iter_csv(["id", "submitted_at", *names, "other"], lines()), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="{page.slug}-{form_id}.csv"'
+        return response
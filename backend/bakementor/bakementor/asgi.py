@@ -2,6 +2,8 @@
 ASGI config for bakementor project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+This is the application the Docker image serves (gunicorn with uvicorn
+workers); long-lived responses such as the live analytics stream rely on it.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +11,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bakementor.settings')
 
 application = get_asgi_application()
+
+if settings.DEBUG:
+    # What ``runserver`` does for the admin's static files in development.
+    application = ASGIStaticFilesHandler(application)
@@ -44,6 +44,7 @@ LOCAL_APPS = [
     "apps.pages",
     "apps.builder_templates",
     "apps.analytics",
+    "apps.submissions",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -108,6 +109,51 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Batch uploads (api/v1/media/batch/) accept up to this many files per request.
+DATA_UPLOAD_MAX_NUMBER_FILES = 200
+# Where media bytes live: "filesystem" (MEDIA_ROOT) or "s3" (any S3-compatible
+# service, e.g. MinIO). With "s3" clients upload straight to the bucket through
+# presigned requests (api/v1/media/uploads/ with "direct": true).
+MEDIA_STORAGE_BACKEND = env("MEDIA_STORAGE_BACKEND", default="filesystem")
+MEDIA_STORAGES = {
+    "filesystem": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": MEDIA_ROOT},
+    },
+    "s3": {
+        "BACKEND": "apps.library.storage.MediaS3Storage",
+        "OPTIONS": {
+            "bucket_name": env("MEDIA_S3_BUCKET", default="bakementor-media"),
+            "endpoint_url": env("MEDIA_S3_ENDPOINT_URL", default=None),
+            "region_name": env("MEDIA_S3_REGION", default=None),
+            "access_key": env("MEDIA_S3_ACCESS_KEY", default=None),
+            "secret_key": env("MEDIA_S3_SECRET_KEY", default=None),
+            "custom_domain": env("MEDIA_S3_CUSTOM_DOMAIN", default=None),
+            "querystring_auth": env.bool("MEDIA_S3_QUERYSTRING_AUTH", default=False),
+            "file_overwrite": False,
+        },
+    },
+}
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    "media": MEDIA_STORAGES[MEDIA_STORAGE_BACKEND],
+    # Files handed out only by views that check ownership (analytics exports).
+    # It lies outside MEDIA_ROOT so the public media route cannot reach it.
+    "exports": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": env("EXPORTS_ROOT", default=str(BASE_DIR / "private" / "exports"))},
+    },
+}
+# Partial resumable uploads when media is remote; on disk they stay in MEDIA_ROOT/.incoming.
+# Every web worker must see the same directory.
+MEDIA_UPLOAD_STAGING_ROOT = env("MEDIA_UPLOAD_STAGING_ROOT", default=str(BASE_DIR / "private" / "uploads"))
+# Lifetime of presigned direct-upload requests, in seconds.
+MEDIA_DIRECT_UPLOAD_EXPIRY = env.int("MEDIA_DIRECT_UPLOAD_EXPIRY", default=60 * 60)
+# "nginx" (X-Accel-Redirect), "sendfile" (X-Sendfile) or "" to stream from Django.
+MEDIA_SENDFILE_BACKEND = env("MEDIA_SENDFILE_BACKEND", default="")
+# nginx: `location /protected-media/ { internal; alias <MEDIA_ROOT>/; }`
+MEDIA_ACCEL_REDIRECT_PREFIX = env("MEDIA_ACCEL_REDIRECT_PREFIX", default="/protected-media/")
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "accounts.User"
@@ -127,6 +173,11 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
         "rest_framework.filters.SearchFilter",
     ],
+    "DEFAULT_THROTTLE_RATES": {
+        # Public form intake: per client address, and per form across all clients.
+        "form-intake": env("FORM_INTAKE_RATE", default="20/min"),
+        "form-intake-form": env("FORM_INTAKE_FORM_RATE", default="600/min"),
+    },
 }
 
 SIMPLE_JWT = {
@@ -148,6 +199,55 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    "library-expire-upload-sessions": {
+        "task": "library.expire_upload_sessions",
+        "schedule": timedelta(hours=1),
+    },
+    "library-purge-deleted-media": {
+        "task": "library.purge_media_files",
+        "schedule": timedelta(minutes=15),
+    },
+    "library-delete-stored-files": {
+        "task": "library.delete_stored_files",
+        "schedule": timedelta(minutes=15),
+    },
+    "analytics-drain-visits": {
+        "task": "analytics.drain_visits",
+        "schedule": timedelta(seconds=10),
+        "options": {"expires": 10},
+    },
+    "analytics-rollup-daily-summaries": {
+        "task": "analytics.rollup_daily_summaries",
+        "schedule": timedelta(minutes=5),
+    },
+    "analytics-maintain-visit-partitions": {
+        "task": "analytics.maintain_visit_partitions",
+        "schedule": timedelta(hours=12),
+    },
+    "analytics-expire-leaderboards": {
+        "task": "analytics.expire_leaderboards",
+        "schedule": timedelta(minutes=1),
+        "options": {"expires": 60},
+    },
+    "submissions-drain": {
+        "task": "submissions.drain",
+        "schedule": timedelta(seconds=10),
+        "options": {"expires": 10},
+    },
+    "analytics-purge-exports": {
+        "task": "analytics.purge_exports",
+        "schedule": timedelta(hours=1),
+    },
+    "pages-render-missing-previews": {
+        "task": "pages.render_missing_previews",
+        "schedule": timedelta(minutes=15),
+    },
+    "builder-templates-render-stale-previews": {
+        "task": "builder_templates.render_stale_template_previews",
+        "schedule": timedelta(minutes=15),
+    },
+}
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "BakeMentor API",
@@ -163,6 +263,17 @@ CACHES = {
     }
 }
 
+# Buffer for analytics events (visit beacon stream). Enable AOF persistence
+# on this instance to bound event loss on a Redis restart.
+ANALYTICS_REDIS_URL = env("ANALYTICS_REDIS_URL", default="redis://redis:6379/3")
+# Raw visits are kept this many whole months (daily summaries are kept forever);
+# monthly partitions are created this far ahead.
+ANALYTICS_VISIT_RETENTION_MONTHS = env.int("ANALYTICS_VISIT_RETENTION_MONTHS", default=13)
+ANALYTICS_VISIT_PARTITIONS_AHEAD = env.int("ANALYTICS_VISIT_PARTITIONS_AHEAD", default=3)
+# Redis buffering form submissions between the public intake endpoint and the
+# batch inserts of the submissions.drain task.
+SUBMISSIONS_REDIS_URL = env("SUBMISSIONS_REDIS_URL", default="redis://redis:6379/4")
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
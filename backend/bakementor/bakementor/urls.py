@@ -1,10 +1,12 @@
 """Root URL configuration for BakeMentor."""
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 
+from apps.library.serving import SERVED_NAME_PATTERN
+from apps.library.views import serve_media
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
@@ -23,7 +25,10 @@ urlpatterns = [
     path("api/v1/templates/", include("apps.builder_templates.urls")),
     path("api/v1/media/", include("apps.library.urls")),
     path("api/v1/analytics/", include("apps.analytics.urls")),
+    path("api/v1/forms/", include("apps.submissions.urls")),
+    re_path(
+        rf"^{settings.MEDIA_URL.strip('/')}/(?P<name>{SERVED_NAME_PATTERN}.+)$",
+        serve_media,
+        name="media-serve",
+    ),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)